@@ -1,7 +1,8 @@
 
-from flask import Flask, render_template, redirect, url_for, request, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, render_template, redirect, url_for, request, flash, session, jsonify, Response, stream_with_context
 from functools import wraps
+import hmac
+import json
 import os
 from dotenv import load_dotenv
 
@@ -9,12 +10,28 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import modules
-from modules import data_manager, operacional, estoque, financeiro, rh
+from modules import data_manager, operacional, estoque, financeiro, rh, auth, instrumentation, profiler
+# Terminal command registry (aliased: /terminal is also a view function here)
+from modules import terminal as comandos
 
 app = Flask(__name__)
 # Use environment variable for secret key, with fallback for development
 app.secret_key = os.getenv('SECRET_KEY', 'dev-key-only-change-in-production')
 
+# Per-route latency, data access and module timings (served at /metrics)
+instrumentation.install(app, timed=[
+    (financeiro, 'calcular_indicadores_financeiros'),
+    (financeiro, 'montar_relatorio_fabrica'),
+    (operacional, 'agregar_producao'),
+    (operacional, 'relatorio_semanal'),
+    (operacional, 'total_produzido'),
+    (estoque, 'calcular_custos'),
+    (rh, 'calcular_folha_lote'),
+    (comandos, 'executar'),
+])
+# Thread -> endpoint map for the on-demand profiler (/admin/profile)
+profiler.install(app)
+
 def init_db():
     # Initialize JSON files if empty
     if not data_manager.load_data('despesas.json'):
@@ -29,7 +46,7 @@ def init_db():
     # Ensure users.json exists (seeded by seed_users.py, but good to have check)
     if not data_manager.load_data('users.json'):
         # Create default admin if completely empty
-        admin_pass = generate_password_hash('admin123')
+        admin_pass = auth.gerar_hash('admin123')
         data_manager.save_data('users.json', [{'username': 'admin', 'password': admin_pass, 'role': 'admin'}])
 
 # Role Definitions based on Organogram
@@ -65,6 +82,58 @@ def role_required(allowed_roles):
         return decorated_function
     return decorator
 
+# Table pagination (page, per_page, sort, q, after on the query string)
+PER_PAGE_DEFAULT = 50
+PER_PAGE_MAX = 200
+
+def page_args(sortable, default_sort, filename=None):
+    """
+    Reads the table query parameters: page, per_page (capped at PER_PAGE_MAX),
+    sort ('campo' or '-campo' for descending, only fields in sortable),
+    q (search text) and after (keyset cursor of the next page of filename;
+    None when it is not a valid one).
+    Returns the keyword arguments for data_manager.query_page.
+    """
+    sort = request.args.get('sort', default_sort)
+    if sort.lstrip('-') not in sortable:
+        sort = default_sort
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(PER_PAGE_MAX, max(1, int(request.args.get('per_page', PER_PAGE_DEFAULT))))
+    except ValueError:
+        page, per_page = 1, PER_PAGE_DEFAULT
+    after = request.args.get('after') or None
+    if after is not None:
+        try:
+            after = data_manager.decode_cursor(after, filename)
+        except ValueError:
+            after = None
+    return {
+        'sort': sort.lstrip('-'),
+        'descending': sort.startswith('-'),
+        'q': request.args.get('q', '').strip() or None,
+        'page': page,
+        'per_page': per_page,
+        'after': after,
+    }
+
+# Server-side tables (module pages and JSON API): file -> (sortable fields, default sort, search fields)
+TABLES = {
+    'producao.json': (('data', 'dia', 'turno', 'quantidade'), '-data', ('data', 'dia', 'turno')),
+    'produtos.json': (('codigo', 'nome', 'fornecedor', 'quantidade', 'valor_compra'), 'codigo', ('codigo', 'nome')),
+    'funcionarios.json': (('nome', 'cargo', 'matricula', 'valor_hora'), 'nome', ('nome', 'cargo', 'cpf', 'matricula')),
+    'despesas.json': (('tipo', 'descricao', 'valor'), '-valor', ('tipo', 'descricao')),
+}
+
+def query_table(filename):
+    """One page of a collection for a module table, plus the parameters the pager template needs."""
+    sortable, default_sort, search = TABLES[filename]
+    args = page_args(sortable, default_sort, filename)
+    pagina = data_manager.query_page(filename, search=search, **args)
+    pagina['sort'] = ('-' if args['descending'] else '') + args['sort']
+    pagina['q'] = args['q'] or ''
+    return pagina
+
 # Routes
 @app.route('/')
 def index():
@@ -78,10 +147,14 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        users = data_manager.load_data('users.json')
-        user = next((u for u in users if u['username'] == username), None)
+        try:
+            # Indexed lookup; the hash check runs on the bounded auth pool
+            user = auth.autenticar(username, password)
+        except auth.FilaCheia:
+            flash('Muitas tentativas de login no momento. Tente novamente em instantes.', 'warning')
+            return render_template('auth/login.html'), 503
         
-        if user and check_password_hash(user['password'], password):
+        if user:
             session['user_id'] = user['username'] # Use username as ID for JSON
             session['username'] = user['username']
             session['role'] = user['role']
@@ -101,18 +174,14 @@ def create_user():
         password = request.form['password']
         role = request.form.get('role', 'user')
         
-        users = data_manager.load_data('users.json')
-        
-        if any(u['username'] == username for u in users):
+        # Check + append under the lock on the username index (threads and gunicorn workers)
+        if auth.buscar_usuario(username) is not None or not data_manager.insert_unique('users.json', {
+            'username': username,
+            'password': auth.gerar_hash(password),
+            'role': role
+        }):
             flash('Usuário já existe.', 'danger')
         else:
-            hashed_password = generate_password_hash(password)
-            users.append({
-                'username': username,
-                'password': hashed_password,
-                'role': role
-            })
-            data_manager.save_data('users.json', users)
             flash(f'Usuário {username} criado com sucesso!', 'success')
             return redirect(url_for('dashboard'))
             
@@ -133,15 +202,11 @@ def dashboard():
     stats = {}
     if user_role in ROLES_GLOBAL:
         # 1. Produção Semanal
-        producao = data_manager.load_data('producao.json')
-        stats['total_semanal'] = sum(row['quantidade'] for row in producao)
+        stats['total_semanal'] = operacional.total_produzido()
         
         # 2. Custo Total Produção (Fixas + Insumos)
-        despesas = data_manager.load_data('despesas.json')
-        total_fixo = sum(d['valor'] for d in despesas)
-        
-        produtos = data_manager.load_data('produtos.json')
-        custo_insumos = sum(p['quantidade'] * p['valor_compra'] for p in produtos)
+        total_fixo = data_manager.sum_field('despesas.json', 'valor')
+        custo_insumos = data_manager.sum_field('produtos.json', 'quantidade', 'valor_compra')
         
         stats['custo_total_producao'] = financeiro.calcular_custo_producao(total_fixo, custo_insumos)
         
@@ -151,8 +216,7 @@ def dashboard():
         stats['preco_venda'] = financeiro.calcular_preco_venda(custo_unitario)
         
         # 4. Funcionários
-        funcionarios = data_manager.load_data('funcionarios.json')
-        stats['qtd_funcionarios'] = len(funcionarios)
+        stats['qtd_funcionarios'] = data_manager.count_data('funcionarios.json')
         
     return render_template('dashboard.html', 
                            user=session['username'], 
@@ -170,55 +234,67 @@ def profile():
 @login_required
 @role_required(ROLES_OPERACIONAL)
 def mod_operacional():
-    if request.method == 'POST':
+    if request.method == 'POST' and 'meta_mensal' in request.form:
+        # Persisted production target (monthly, for the whole plant or one month)
+        try:
+            periodo = request.form.get('periodo') or 'padrao'
+            operacional.definir_meta(request.form['meta_mensal'], periodo=periodo)
+            flash('Meta de produção atualizada!', 'success')
+        except ValueError:
+            flash('Meta ou período inválido.', 'danger')
+        except IOError:
+            flash('Erro ao salvar a meta de produção.', 'danger')
+    elif request.method == 'POST':
         dia = request.form['dia']
         turno = request.form['turno']
         try:
             quantidade = int(request.form['quantidade'])
+            # Optional date; without it the weekday is placed in the current week
+            data = request.form.get('data')
+            if data:
+                dia = operacional.dia_da_data(data)
+            else:
+                data = operacional.data_do_dia(dia)
             if quantidade < 0:
                 flash('Quantidade não pode ser negativa.', 'warning')
             else:
-                # Load, Append, Save
-                producao = data_manager.load_data('producao.json')
-                producao.append({
+                # Append-only: grava só a nova linha no log e atualiza o rollup
+                operacional.registrar_producao([{
                     'dia': dia,
                     'turno': turno,
-                    'quantidade': quantidade
-                })
-                data_manager.save_data('producao.json', producao)
+                    'quantidade': quantidade,
+                    'data': data
+                }])
                 flash('Produção registrada com sucesso!', 'success')
         except ValueError:
-            flash('Quantidade inválida.', 'danger')
-    
-    # Fetch data for report
-    producao_db = data_manager.load_data('producao.json')
+            flash('Quantidade ou data inválida.', 'danger')
     
-    # Transform for statistics
-    dados_formatados = []
-    dias_semana = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+    # One page of the history table (sorted/filtered server-side)
+    pagina = query_table('producao.json')
     
-    for dia in dias_semana:
-        turnos_dia = {"Manhã": 0, "Tarde": 0, "Noite": 0}
-        rows = [row for row in producao_db if row['dia'] == dia]
-        for row in rows:
-            if row['turno'] in turnos_dia:
-                turnos_dia[row['turno']] += row['quantidade']
-        
-        dados_formatados.append({"dia": dia, "turnos": turnos_dia})
+    # Weekly report: the dated rows of one ISO week (?semana=AAAA-MM-DD, any
+    # day of it; current week by default)
+    try:
+        relatorio = operacional.relatorio_semanal(request.args.get('semana') or None)
+    except ValueError:
+        flash('Semana inválida: use uma data AAAA-MM-DD.', 'warning')
+        relatorio = operacional.relatorio_semanal()
         
     # Use Core Module Functions
-    stats = operacional.calcular_estatisticas(dados_formatados)
-    ideal = operacional.calcular_capacidade_ideal(meta_mensal=750) # Passando meta padrão para evitar input interativo
+    stats = operacional.calcular_estatisticas(relatorio['dados'])
+    ideal = operacional.calcular_capacidade_ideal()  # Persisted target, never prompts
     mensal_est, anual_est = operacional.simular_producao(stats['total_semanal'])
     
     return render_template('modules/operacional.html', 
-                           producao=producao_db, 
+                           producao=pagina['items'],
+                           pagina=pagina,
                            total_semanal=stats['total_semanal'],
                            total_turnos=stats['total_por_turno'],
                            media_diaria=stats['media_diaria'],
                            mensal_est=mensal_est,
                            anual_est=anual_est,
-                           ideal=ideal)
+                           ideal=ideal,
+                           relatorio=relatorio)
 
 @app.route('/estoque', methods=['GET', 'POST'])
 @login_required
@@ -233,34 +309,33 @@ def mod_estoque():
             quantidade = int(request.form['quantidade'])
             valor_compra = float(request.form['valor_compra'])
             
-            produtos = data_manager.load_data('produtos.json')
-            
-            # Check duplicate
-            exists = any(p['codigo'] == codigo for p in produtos)
-            if exists:
+            # Check duplicate (O(1) on the codigo index)
+            if data_manager.get_by_key('produtos.json', 'codigo', codigo) is not None:
                 flash(f'Produto com código {codigo} já existe.', 'danger')
-            else:
-                produtos.append({
-                    'codigo': codigo,
-                    'nome': nome,
-                    'data_fabricacao': data_fab,
-                    'fornecedor': fornecedor,
-                    'quantidade': quantidade,
-                    'valor_compra': valor_compra
-                })
-                data_manager.save_data('produtos.json', produtos)
+            # Check + append again under the lock: concurrent inserts can't duplicate the code
+            elif data_manager.insert_unique('produtos.json', {
+                'codigo': codigo,
+                'nome': nome,
+                'data_fabricacao': data_fab,
+                'fornecedor': fornecedor,
+                'quantidade': quantidade,
+                'valor_compra': valor_compra
+            }):
                 flash(f'Produto {nome} cadastrado com sucesso!', 'success')
+            else:
+                flash(f'Produto com código {codigo} já existe.', 'danger')
         except ValueError:
             flash('Valores inválidos para quantidade ou preço.', 'danger')
             
-    # Fetch products
-    produtos_db = data_manager.load_data('produtos.json')
+    # One page of products (sorted/filtered server-side)
+    pagina = query_table('produtos.json')
     
-    # Use Core Module Function
-    custos = estoque.calcular_custos(produtos_db)
+    # Use Core Module Function (totals over the whole stock)
+    custos = estoque.calcular_custos()
     
     return render_template('modules/estoque.html', 
-                           produtos=produtos_db,
+                           produtos=pagina['items'],
+                           pagina=pagina,
                            custo_total_atual=custos['total_atual'],
                            custo_mensal=custos['mensal_projetado'],
                            custo_anual=custos['anual_projetado'])
@@ -271,17 +346,19 @@ def mod_estoque():
 def mod_financeiro():
     if request.method == 'POST':
         try:
-            despesas = data_manager.load_data('despesas.json')
-            # Update expenses
-            for key in request.form:
-                if key.startswith('despesa_'):
-                    tipo = key.replace('despesa_', '')
-                    valor = float(request.form[key])
-                    # Update in list
-                    for d in despesas:
-                        if d['tipo'] == tipo:
-                            d['valor'] = valor
-            data_manager.save_data('despesas.json', despesas)
+            # Lock across read-modify-write (threads and gunicorn workers)
+            with data_manager.file_lock('despesas.json'):
+                despesas = data_manager.load_data('despesas.json')
+                # Update expenses
+                for key in request.form:
+                    if key.startswith('despesa_'):
+                        tipo = key.replace('despesa_', '')
+                        valor = float(request.form[key])
+                        # Update in list
+                        for d in despesas:
+                            if d['tipo'] == tipo:
+                                d['valor'] = valor
+                data_manager.save_data('despesas.json', despesas)
             flash('Despesas atualizadas com sucesso!', 'success')
         except ValueError:
             flash('Valores inválidos.', 'danger')
@@ -291,12 +368,10 @@ def mod_financeiro():
     total_fixo = sum(d['valor'] for d in despesas)
     
     # Fetch production cost (Insumos) from Estoque
-    produtos = data_manager.load_data('produtos.json')
-    custo_insumos = sum(p['quantidade'] * p['valor_compra'] for p in produtos)
+    custo_insumos = data_manager.sum_field('produtos.json', 'quantidade', 'valor_compra')
     
-    # Fetch production quantity from Operacional
-    producao = data_manager.load_data('producao.json')
-    qtd_carros = sum(row['quantidade'] for row in producao)
+    # Fetch production quantity from Operacional (cached until producao changes)
+    qtd_carros = financeiro.obter_no('total_produzido')
     
     # Calculations
     custo_total_producao = financeiro.calcular_custo_producao(total_fixo, custo_insumos)
@@ -304,7 +379,7 @@ def mod_financeiro():
     preco_venda = financeiro.calcular_preco_venda(custo_unitario)
     
     # Advanced Reports (Factory & Indicators)
-    relatorio_fabrica = financeiro.gerar_relatorio_fabrica()
+    relatorio_fabrica = financeiro.montar_relatorio_fabrica()
     indicadores = financeiro.calcular_indicadores_financeiros()
     
     return render_template('modules/financeiro.html', 
@@ -333,21 +408,14 @@ def mod_rh():
             qtd_filhos = int(request.form['qtd_filhos'])
             valor_hora = float(request.form['valor_hora'])
             
-            funcionarios = data_manager.load_data('funcionarios.json')
-            
-            # Check duplicate CPF
-            exists = any(f['cpf'] == cpf for f in funcionarios)
-            if exists:
+            # Check duplicate CPF (index on the normalized CPF)
+            if data_manager.get_by_key('funcionarios.json', 'cpf', cpf) is not None:
                 flash(f'Funcionário com CPF {cpf} já existe.', 'danger')
             else:
-                # Generate Matricula
-                # Need to import rh module functions properly or replicate logic? 
-                # Better to use rh.gerar_matricula if possible, but it requires 'setor'.
-                # We can infer sector from cargo or ask user. For now, let's infer or pass dummy.
+                # Matricula from the persisted sequence (no scan of the employees).
+                # Sector inferred from the cargo
                 setor = rh.obter_setor_funcionario(cargo) or "RH" # Fallback
-                matricula = rh.gerar_matricula(setor, cargo, funcionarios)
-                
-                funcionarios.append({
+                funcionario = {
                     'nome': nome,
                     'cpf': cpf,
                     'rg': rg,
@@ -356,54 +424,48 @@ def mod_rh():
                     'qtd_filhos': qtd_filhos,
                     'cargo': cargo,
                     'valor_hora': valor_hora,
-                    'matricula': matricula,
+                    'matricula': rh.gerar_matricula(setor, cargo, avisar=False),
                     'CTPS': 'N/A' # Default
-                })
-                data_manager.save_data('funcionarios.json', funcionarios)
-                flash(f'Funcionário {nome} cadastrado com sucesso!', 'success')
+                }
+                # Check + insert again under the lock (CPF and matricula unique)
+                if rh.inserir_funcionario(funcionario, setor):
+                    flash(f'Funcionário {nome} cadastrado com sucesso! Matrícula: {funcionario["matricula"]}', 'success')
+                else:
+                    flash(f'Funcionário com CPF {cpf} já existe.', 'danger')
         except ValueError:
             flash('Valores inválidos.', 'danger')
             
-    # Fetch employees
-    funcionarios = data_manager.load_data('funcionarios.json')
-    funcionarios.sort(key=lambda x: x['nome'])
-    
-    # Generate Payroll Data
-    folha = []
-    for f in funcionarios:
-        # Simulation: 160h regular + 10h overtime
-        horas_trab = 160
-        horas_ext = 10
-        
-        bruto = rh.calcular_salario_bruto(horas_trab, f['valor_hora'])
-        extra = rh.calcular_horas_extras(horas_ext, f['valor_hora'], f['cargo'])
-        total_bruto = bruto + extra
-        
-        irpf = rh.calcular_irpf(total_bruto)
-        liquido = rh.calcular_liquido(total_bruto, irpf)
-        
-        folha.append({
+    # One page of employees (sorted/filtered server-side)
+    pagina = query_table('funcionarios.json')
+    funcionarios = pagina['items']
+    
+    # Generate Payroll Data for the page (simulation: 160h regular + 10h overtime, one batch pass)
+    lote = rh.calcular_folha_lote(funcionarios, horas_trabalhadas=160, horas_extras=10)
+    folha = [
+        {
             'nome': f['nome'],
             'cargo': f['cargo'],
+            'cpf': f.get('cpf'),
+            'endereco': f.get('endereco', ''),
+            'telefone': f.get('telefone', ''),
             'bruto': total_bruto,
             'irpf': irpf,
             'liquido': liquido
-        })
+        }
+        for f, total_bruto, irpf, liquido in zip(funcionarios, lote['total_bruto'], lote['irpf'], lote['liquido'])
+    ]
     
     return render_template('modules/rh.html', 
                            funcionarios=funcionarios,
-                           folha=folha)
+                           folha=folha,
+                           pagina=pagina)
 
 @app.route('/rh/delete/<cpf>', methods=['POST'])
 @login_required
 @role_required(ROLES_RH)
 def rh_delete(cpf):
-    funcionarios = data_manager.load_data('funcionarios.json')
-    # Filter out the employee with the given CPF
-    new_funcionarios = [f for f in funcionarios if f['cpf'] != cpf]
-    
-    if len(new_funcionarios) < len(funcionarios):
-        data_manager.save_data('funcionarios.json', new_funcionarios)
+    # Point delete by CPF (appends one entry to the log, no full rewrite)
+    if data_manager.delete_by_key('funcionarios.json', cpf):
         flash('Funcionário removido com sucesso.', 'success')
     else:
         flash('Funcionário não encontrado.', 'danger')
@@ -414,22 +476,154 @@ def rh_delete(cpf):
 @login_required
 @role_required(ROLES_RH)
 def rh_edit(cpf):
-    funcionarios = data_manager.load_data('funcionarios.json')
-    funcionario = next((f for f in funcionarios if f['cpf'] == cpf), None)
-    
+    # Point update by CPF (appends one entry to the log, no full rewrite)
+    # Note: Cargo/Setor changes might require re-generating matricula, skipping for simplicity as per CLI
+    funcionario = data_manager.update_by_key('funcionarios.json', cpf, {
+        'nome': request.form['nome'],
+        'endereco': request.form['endereco'],
+        'telefone': request.form['telefone'],
+    })
+
     if funcionario:
-        funcionario['nome'] = request.form['nome']
-        funcionario['endereco'] = request.form['endereco']
-        funcionario['telefone'] = request.form['telefone']
-        # Note: Cargo/Setor changes might require re-generating matricula, skipping for simplicity as per CLI
-        
-        data_manager.save_data('funcionarios.json', funcionarios)
         flash('Funcionário atualizado com sucesso.', 'success')
     else:
         flash('Funcionário não encontrado.', 'danger')
         
     return redirect(url_for('mod_rh'))
 
+# JSON API v1 (same role lists as the module pages)
+API_COLLECTIONS = {
+    'produtos': ('produtos.json', ROLES_ESTOQUE),
+    'funcionarios': ('funcionarios.json', ROLES_RH),
+    'producao': ('producao.json', ROLES_OPERACIONAL),
+    'despesas': ('despesas.json', ROLES_FINANCEIRO),
+}
+# Rows per chunk written to an NDJSON stream
+NDJSON_CHUNK_ROWS = 500
+
+def api_error(message, status):
+    return jsonify({'error': message}), status
+
+def api_access_error(allowed_roles):
+    """JSON 401/403 response when the session may not read the resource, else None."""
+    if 'user_id' not in session:
+        return api_error('Autenticação necessária.', 401)
+    if session.get('role') not in allowed_roles:
+        return api_error('Acesso negado.', 403)
+    return None
+
+def api_fields():
+    """fields=a,b projection from the query string (None = every field)."""
+    fields = tuple(f.strip() for f in request.args.get('fields', '').split(',') if f.strip())
+    return fields or None
+
+def project(row, fields):
+    if fields is None or not isinstance(row, dict):
+        return row
+    return {f: row[f] for f in fields if f in row}
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+def ndjson_rows(filename, fields):
+    """
+    Streams a whole collection as NDJSON, in storage order, NDJSON_CHUNK_ROWS
+    lines per chunk. Rows come from data_manager.iter_data, so the response
+    is never built in memory.
+    """
+    chunk = []
+    for row in data_manager.iter_data(filename):
+        chunk.append(json.dumps(project(row, fields), ensure_ascii=False))
+        if len(chunk) == NDJSON_CHUNK_ROWS:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+# Prometheus metrics: admin session, or Authorization: Bearer <METRICS_TOKEN> for scrapers
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+instrumentation.gauge('carangos_auth_queue_depth', 'Password checks waiting for the auth pool.',
+                      lambda: auth.estatisticas()['na_fila'])
+instrumentation.gauge('carangos_auth_in_flight', 'Password checks running on the auth pool.',
+                      lambda: auth.estatisticas()['em_execucao'])
+instrumentation.gauge('carangos_data_cache_hits', 'Read cache hits since start.',
+                      lambda: data_manager.cache_stats()['hits'])
+instrumentation.gauge('carangos_data_cache_misses', 'Read cache misses (files parsed) since start.',
+                      lambda: data_manager.cache_stats()['misses'])
+
+@app.route('/metrics')
+def metrics():
+    if not (METRICS_TOKEN and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}')):
+        denied = api_access_error(['admin'])
+        if denied:
+            return denied
+    return Response(instrumentation.render_prometheus(), content_type=instrumentation.PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/admin/profile')
+def admin_profile():
+    """
+    Samples the stacks of this worker's request threads for ?seconds= (default
+    5, max profiler.MAX_SECONDS) every ?interval_ms= (default 5) and returns
+    them as collapsed stacks grouped by endpoint (flamegraph-ready).
+    ?route=<endpoint> keeps one endpoint; ?idle=1 adds the threads not serving
+    a request. Only the worker that answers is profiled.
+    """
+    denied = api_access_error(ROLES_GLOBAL)
+    if denied:
+        return denied
+    try:
+        seconds = float(request.args.get('seconds', 5))
+        interval = float(request.args.get('interval_ms', profiler.DEFAULT_INTERVAL * 1000)) / 1000
+    except ValueError:
+        return api_error('Parâmetros inválidos.', 400)
+    if interval <= 0:
+        return api_error('Parâmetros inválidos.', 400)
+    try:
+        counts, snapshots = profiler.sample(seconds, interval, include_idle=request.args.get('idle') == '1')
+    except RuntimeError:
+        return api_error('Já há um perfil em execução neste worker.', 409)
+    response = Response(profiler.collapsed(counts, request.args.get('route') or None), mimetype='text/plain')
+    response.headers['X-Profile-Snapshots'] = str(snapshots)
+    response.headers['X-Profile-Worker'] = str(os.getpid())
+    return response
+
+@app.route('/api/v1/indicadores')
+def api_indicadores():
+    denied = api_access_error(ROLES_FINANCEIRO)
+    if denied:
+        return denied
+    return jsonify(project(financeiro.calcular_indicadores_financeiros(), api_fields()))
+
+@app.route('/api/v1/<colecao>')
+def api_collection(colecao):
+    """
+    One page of a collection as JSON (same sort, q, per_page and after
+    parameters as the module tables; follow 'next' with ?after=), or the
+    whole collection as NDJSON with ?format=ndjson or Accept: application/x-ndjson.
+    fields=a,b keeps only those fields in every row.
+    """
+    if colecao not in API_COLLECTIONS:
+        return api_error(f'Coleção desconhecida: {colecao}', 404)
+    filename, allowed_roles = API_COLLECTIONS[colecao]
+    denied = api_access_error(allowed_roles)
+    if denied:
+        return denied
+    fields = api_fields()
+
+    if wants_ndjson():
+        return Response(stream_with_context(ndjson_rows(filename, fields)), mimetype='application/x-ndjson')
+
+    sortable, default_sort, search = TABLES[filename]
+    args = page_args(sortable, default_sort, filename)
+    if request.args.get('after') and args['after'] is None:
+        return api_error('Cursor inválido.', 400)
+    pagina = data_manager.query_page(filename, search=search, **args)
+    pagina['items'] = [project(row, fields) for row in pagina['items']]
+    pagina['sort'] = ('-' if args['descending'] else '') + args['sort']
+    return jsonify(pagina)
+
 @app.route('/terminal')
 @login_required
 def terminal():
@@ -442,116 +636,118 @@ def terminal_execute():
     """Executa comandos do terminal e retorna resultado em JSON"""
     from flask import jsonify
     
-    command = request.json.get('command', '').strip().lower()
-    user_role = session.get('role')
+    command = request.json.get('command', '')
+    return jsonify(comandos.executar(command, session.get('username'), session.get('role')))
+
+
+# ============================================================================
+# Terminal commands
+# ============================================================================
+# Each command is registered in modules/terminal.py (imported as comandos)
+# with the roles allowed to run it. Read-only commands list the collections
+# they read: their output is cached until one of those collections changes.
+
+def _terminal_ok(output):
+    return {'output': output, 'type': 'success'}
+
+@comandos.comando('help', 'ajuda', uso='help, ajuda', ajuda='Mostra esta ajuda')
+def cmd_help(args, ctx):
+    return _terminal_ok(comandos.texto_ajuda())
+
+@comandos.comando('clear', 'limpar', uso='clear, limpar', ajuda='Limpa a tela')
+def cmd_clear(args, ctx):
+    return {'output': '', 'type': 'clear'}
+
+@comandos.comando('status', colecoes=('producao.json', 'produtos.json', 'funcionarios.json'), por_usuario=True,
+                  uso='status', ajuda='Mostra informações do sistema')
+def cmd_status(args, ctx):
+    total_producao = operacional.total_produzido()
+    total_produtos = data_manager.count_data('produtos.json')
+    total_funcionarios = data_manager.count_data('funcionarios.json')
     
-    # Comandos disponíveis
-    if command == 'help' or command == 'ajuda':
-        return jsonify({
-            'output': '''
-<span class="text-primary">Comandos Disponíveis:</span>
-
-<span class="text-success">Geral:</span>
-  help, ajuda          - Mostra esta ajuda
-  clear, limpar        - Limpa a tela
-  status               - Mostra informações do sistema
-  whoami               - Mostra usuário atual
-
-<span class="text-success">CLI (Interface de Linha de Comando):</span>
-  main                 - Menu principal do sistema CLI
-  main [modulo]        - Menu específico (ex: main rh)
-
-<span class="text-success">Operacional:</span>
-  producao             - Mostra relatório de produção
-
-<span class="text-success">Estoque:</span>
-  estoque              - Mostra relatório de estoque
-  produtos             - Lista todos os produtos
-
-<span class="text-success">Financeiro:</span>
-  financeiro           - Mostra relatório financeiro completo
-  despesas             - Lista despesas fixas
-
-<span class="text-success">RH:</span>
-  rh                   - Mostra resumo do RH
-  funcionarios         - Lista todos os funcionários
-  folha                - Mostra folha de pagamento simulada
-''',
-            'type': 'success'
-        })
-
-    
-    elif command == 'clear' or command == 'limpar':
-        return jsonify({'output': '', 'type': 'clear'})
-    
-    elif command == 'whoami':
-        return jsonify({
-            'output': f'<span class="text-info">Usuário:</span> {session["username"]}\n<span class="text-info">Cargo:</span> {user_role}',
-            'type': 'info'
-        })
-    
-    elif command == 'status':
-        producao = data_manager.load_data('producao.json')
-        produtos = data_manager.load_data('produtos.json')
-        funcionarios = data_manager.load_data('funcionarios.json')
-        
-        total_producao = sum(row['quantidade'] for row in producao)
-        total_produtos = len(produtos)
-        total_funcionarios = len(funcionarios)
-        
-        return jsonify({
-            'output': f'''
+    return _terminal_ok(f'''
 <span class="text-primary">═══ STATUS DO SISTEMA ═══</span>
 
 <span class="text-success">Produção Total:</span> {total_producao} unidades
 <span class="text-success">Produtos Cadastrados:</span> {total_produtos}
 <span class="text-success">Funcionários:</span> {total_funcionarios}
-<span class="text-success">Usuário:</span> {session["username"]} ({user_role})
-''',
-            'type': 'success'
-        })
-    
-    elif command == 'producao':
-        if user_role not in ROLES_OPERACIONAL:
-            return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este comando.</span>', 'type': 'error'})
-        
-        dados_flat = data_manager.load_data('producao.json')
-        dias_semana = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-        dados_estruturados = []
-        
-        for dia in dias_semana:
-            turnos_dia = {"Manhã": 0, "Tarde": 0, "Noite": 0}
-            rows = [row for row in dados_flat if row['dia'] == dia]
-            for row in rows:
-                if row['turno'] in turnos_dia:
-                    turnos_dia[row['turno']] += row['quantidade']
-            dados_estruturados.append({"dia": dia, "turnos": turnos_dia})
-        
-        stats = operacional.calcular_estatisticas(dados_estruturados)
-        ideal = operacional.calcular_capacidade_ideal()
-        
-        output = f'''
+<span class="text-success">Usuário:</span> {ctx["usuario"]} ({ctx["perfil"]})
+''')
+
+@comandos.comando('whoami', uso='whoami', ajuda='Mostra usuário atual')
+def cmd_whoami(args, ctx):
+    return {
+        'output': f'<span class="text-info">Usuário:</span> {ctx["usuario"]}\n<span class="text-info">Cargo:</span> {ctx["perfil"]}',
+        'type': 'info'
+    }
+
+@comandos.comando('producao', perfis=ROLES_OPERACIONAL, grupo='Operacional',
+                  uso='producao [AAAA-MM-DD]', ajuda='Mostra o relatório de produção da semana (atual ou da data)')
+def cmd_producao(args, ctx):
+    try:
+        relatorio = operacional.relatorio_semanal(args[0] if args else None)
+    except ValueError:
+        return {'output': '<span class="text-danger">Data inválida.</span>\nUso: producao [AAAA-MM-DD]', 'type': 'error'}
+    
+    stats = operacional.calcular_estatisticas(relatorio['dados'])
+    if relatorio['datado']:
+        semana = f"{relatorio['semana']} ({relatorio['inicio']} a {relatorio['fim']})"
+    else:
+        semana = f"{relatorio['semana']} sem linhas datadas: histórico sem data por dia da semana"
+    ideal = operacional.calcular_capacidade_ideal()  # Persisted target, never prompts
+    
+    return _terminal_ok(f'''
 <span class="text-primary">═══ RELATÓRIO DE PRODUÇÃO ═══</span>
 
+<span class="text-success">Semana:</span> {semana}
 <span class="text-success">Total Semanal:</span> {stats['total_semanal']} unidades
 <span class="text-success">Média Diária:</span> {stats['media_diaria']:.1f} unidades
-<span class="text-success">Capacidade Ideal:</span> {ideal} unidades/semana
+<span class="text-success">Capacidade Ideal:</span> {ideal['semanal']:.0f} unidades/semana (meta mensal: {ideal['mensal']:.0f})
 
 <span class="text-info">Por Turno:</span>
   Manhã: {stats['total_por_turno']['Manhã']} unidades
   Tarde: {stats['total_por_turno']['Tarde']} unidades
   Noite: {stats['total_por_turno']['Noite']} unidades
-'''
-        return jsonify({'output': output, 'type': 'success'})
+
+<span class="text-info">Total Histórico:</span> {relatorio['total_historico']} unidades
+''')
+
+@comandos.comando('meta', perfis=ROLES_OPERACIONAL, grupo='Operacional',
+                  uso='meta [valor] [mês]', ajuda='Mostra ou define a meta mensal (ex: meta 900 2026-10)')
+def cmd_meta(args, ctx):
+    if args:
+        try:
+            periodo = args[1].strip() if len(args) > 1 else 'padrao'
+            meta = operacional.definir_meta(args[0], periodo=periodo)
+        except ValueError:
+            return {'output': '<span class="text-danger">Meta ou período inválido.</span>\nUso: meta [valor] [AAAA-MM]', 'type': 'error'}
+        except IOError:
+            return {'output': '<span class="text-danger">Erro ao salvar a meta de produção.</span>', 'type': 'error'}
+        # Mostra a meta que acabou de ser gravada, não a vigente no mês atual
+        ideal = operacional.calcular_capacidade_ideal(meta_mensal=meta)
+        rotulo = 'padrão' if periodo == 'padrao' else periodo[:7]
+        titulo = 'META DE PRODUÇÃO SALVA'
+    else:
+        ideal = operacional.calcular_capacidade_ideal()
+        rotulo = 'mês atual'
+        titulo = 'META DE PRODUÇÃO'
     
-    elif command == 'estoque' or command == 'produtos':
-        if user_role not in ROLES_ESTOQUE:
-            return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este comando.</span>', 'type': 'error'})
-        
-        produtos = data_manager.load_data('produtos.json')
-        custos = estoque.calcular_custos(produtos)
-        
-        output = f'''
+    return _terminal_ok(f'''
+<span class="text-primary">═══ {titulo} ═══</span>
+
+<span class="text-success">Período:</span> {rotulo}
+<span class="text-success">Mensal:</span> {ideal['mensal']:.0f} unidades
+<span class="text-success">Semanal:</span> {ideal['semanal']:.0f} unidades
+<span class="text-success">Anual:</span> {ideal['anual']:.0f} unidades
+''')
+
+@comandos.comando('estoque', 'produtos', perfis=ROLES_ESTOQUE, colecoes=('produtos.json',), grupo='Estoque',
+                  uso='estoque, produtos', ajuda='Mostra relatório de estoque e os produtos')
+def cmd_estoque(args, ctx):
+    produtos = data_manager.load_view('produtos.json')
+    custos = estoque.calcular_custos(produtos)
+    
+    linhas = [f'''
 <span class="text-primary">═══ RELATÓRIO DE ESTOQUE ═══</span>
 
 <span class="text-success">Total de Produtos:</span> {len(produtos)}
@@ -559,37 +755,41 @@ def terminal_execute():
 <span class="text-success">Custo Mensal Projetado:</span> R$ {custos['mensal_projetado']:.2f}
 <span class="text-success">Custo Anual Projetado:</span> R$ {custos['anual_projetado']:.2f}
 
-<span class="text-info">Produtos:</span>
-'''
-        for p in produtos[:10]:  # Limita a 10 produtos
-            output += f"  [{p['codigo']}] {p['nome']} - Qtd: {p['quantidade']} - R$ {p['valor_compra']:.2f}\n"
-        
-        if len(produtos) > 10:
-            output += f"\n  ... e mais {len(produtos) - 10} produtos"
-        
-        return jsonify({'output': output, 'type': 'success'})
+<span class="text-info">Produtos:</span>''']
+    for p in produtos[:10]:  # Limita a 10 produtos
+        linhas.append(f"  [{p['codigo']}] {p['nome']} - Qtd: {p['quantidade']} - R$ {p['valor_compra']:.2f}")
     
-    elif command == 'financeiro' or command == 'despesas':
-        if user_role not in ROLES_FINANCEIRO:
-            return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este comando.</span>', 'type': 'error'})
-        
-        despesas = data_manager.load_data('despesas.json')
-        total_fixo = sum(d['valor'] for d in despesas)
-        
-        produtos = data_manager.load_data('produtos.json')
-        custo_insumos = sum(p['quantidade'] * p['valor_compra'] for p in produtos)
-        
-        producao = data_manager.load_data('producao.json')
-        qtd_carros = sum(row['quantidade'] for row in producao)
-        
-        custo_total_producao = financeiro.calcular_custo_producao(total_fixo, custo_insumos)
-        custo_unitario = financeiro.calcular_custo_por_carro(custo_total_producao, qtd_carros)
-        preco_venda = financeiro.calcular_preco_venda(custo_unitario)
-        
-        relatorio_fabrica = financeiro.gerar_relatorio_fabrica()
-        indicadores = financeiro.calcular_indicadores_financeiros()
-        
-        output = f'''
+    if len(produtos) > 10:
+        linhas.append(f"\n  ... e mais {len(produtos) - 10} produtos")
+    
+    return _terminal_ok("\n".join(linhas) + "\n")
+
+@comandos.comando('financeiro', 'despesas', perfis=ROLES_FINANCEIRO,
+                  colecoes=('despesas.json', 'produtos.json', 'producao.json', 'funcionarios.json',
+                            rh.CARGOS_FILE, rh.irpf.FILE_NAME),
+                  grupo='Financeiro', uso='financeiro, despesas', ajuda='Mostra relatório financeiro e despesas fixas')
+def cmd_financeiro(args, ctx):
+    despesas = data_manager.load_view('despesas.json')
+    total_fixo = sum(d['valor'] for d in despesas)
+    
+    custo_insumos = data_manager.sum_field('produtos.json', 'quantidade', 'valor_compra')
+    qtd_carros = financeiro.obter_no('total_produzido')
+    
+    custo_total_producao = financeiro.calcular_custo_producao(total_fixo, custo_insumos)
+    custo_unitario = financeiro.calcular_custo_por_carro(custo_total_producao, qtd_carros)
+    preco_venda = financeiro.calcular_preco_venda(custo_unitario)
+    
+    relatorio_fabrica = financeiro.montar_relatorio_fabrica()
+    indicadores = financeiro.calcular_indicadores_financeiros()
+    
+    if relatorio_fabrica:
+        fabrica = f'''  Água: R$ {relatorio_fabrica['agua']['custo_total']:.2f}
+  Energia: R$ {relatorio_fabrica['energia']['custo_total']:.2f}
+  Salários (Bruto): R$ {relatorio_fabrica['salarios']['custo_total_bruto']:.2f}'''
+    else:
+        fabrica = '  Nenhum funcionário cadastrado.'
+    
+    linhas = [f'''
 <span class="text-primary">═══ RELATÓRIO FINANCEIRO ═══</span>
 
 <span class="text-success">Custos:</span>
@@ -603,111 +803,58 @@ def terminal_execute():
   Preço Venda (+50%): R$ {preco_venda:.2f}
 
 <span class="text-info">Relatório Fábrica:</span>
-  Água: R$ {relatorio_fabrica['agua']['custo_total']:.2f}
-  Energia: R$ {relatorio_fabrica['energia']['custo_total']:.2f}
-  Salários (Bruto): R$ {relatorio_fabrica['salarios']['custo_total_bruto']:.2f}
+{fabrica}
 
 <span class="text-info">Indicadores:</span>
   Lucro Bruto: R$ {indicadores['lucro_bruto']:.2f}
   CSLL (9%): - R$ {indicadores['csll']:.2f}
   Lucro Líquido: R$ {indicadores['lucro_liquido_final']:.2f}
 
-<span class="text-info">Despesas Detalhadas:</span>
-'''
-        for d in despesas:
-            output += f"  {d['tipo']}: R$ {d['valor']:.2f}\n"
-        
-        return jsonify({'output': output, 'type': 'success'})
+<span class="text-info">Despesas Detalhadas:</span>''']
+    for d in despesas:
+        linhas.append(f"  {d.get('tipo', d.get('descricao', ''))}: R$ {d['valor']:.2f}")
     
-    elif command == 'rh':
-        if user_role not in ROLES_RH:
-            return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este comando.</span>', 'type': 'error'})
-        
-        funcionarios = data_manager.load_data('funcionarios.json')
-        
-        output = f'''
+    return _terminal_ok("\n".join(linhas) + "\n")
+
+@comandos.comando('rh', perfis=ROLES_RH, colecoes=('funcionarios.json',), grupo='RH',
+                  uso='rh', ajuda='Mostra resumo do RH')
+def cmd_rh(args, ctx):
+    return _terminal_ok(f'''
 <span class="text-primary">═══ MÓDULO DE RH ═══</span>
 
-<span class="text-success">Total de Funcionários:</span> {len(funcionarios)}
+<span class="text-success">Total de Funcionários:</span> {data_manager.count_data('funcionarios.json')}
 
 <span class="text-info">Comandos Disponíveis:</span>
   funcionarios   - Listar todos os funcionários
   folha          - Ver folha de pagamento simulada
-'''
-        return jsonify({'output': output, 'type': 'success'})
+''')
 
-    elif command == 'funcionarios':
-        if user_role not in ROLES_RH:
-            return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este comando.</span>', 'type': 'error'})
-            
-        funcionarios = data_manager.load_data('funcionarios.json')
-        funcionarios.sort(key=lambda x: x['nome'])
-        
-        output = f'''
-<span class="text-primary">═══ LISTA DE FUNCIONÁRIOS ═══</span>
-'''
-        for f in funcionarios:
-            output += f"  - {f['nome']} ({f['cargo']}) - CPF: {f['cpf']}\n"
-            
-        return jsonify({'output': output, 'type': 'success'})
-
-    elif command == 'folha':
-        if user_role not in ROLES_RH:
-            return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este comando.</span>', 'type': 'error'})
-            
-        funcionarios = data_manager.load_data('funcionarios.json')
-        
-        output = f'''
-<span class="text-primary">═══ FOLHA DE PAGAMENTO (SIMULAÇÃO) ═══</span>
-'''
-        total_liquido = 0
-        for f in funcionarios:
-            # Simulação de cálculo
-            horas_trab = 160
-            horas_ext = 10
-            bruto = rh.calcular_salario_bruto(horas_trab, f['valor_hora'])
-            extra = rh.calcular_horas_extras(horas_ext, f['valor_hora'], f['cargo'])
-            total_bruto = bruto + extra
-            irpf = rh.calcular_irpf(total_bruto)
-            liquido = rh.calcular_liquido(total_bruto, irpf)
-            total_liquido += liquido
-            
-            output += f"  {f['nome']}: R$ {liquido:.2f}\n"
-        
-        output += f"\n<span class=\"text-success\">Total da Folha:</span> R$ {total_liquido:.2f}"
-        
-        return jsonify({'output': output, 'type': 'success'})
+@comandos.comando('funcionarios', perfis=ROLES_RH, colecoes=('funcionarios.json',), grupo='RH',
+                  uso='funcionarios', ajuda='Lista todos os funcionários')
+def cmd_funcionarios(args, ctx):
+    funcionarios = sorted(data_manager.load_view('funcionarios.json'), key=lambda x: x['nome'])
     
-    elif command.startswith('main'):
-        parts = command.split()
-        
-        if len(parts) == 1:
-            # Mostra menu principal do CLI
-            return jsonify({
-                'output': '''
-<span class="text-primary">═══ SISTEMA CLI - MENU PRINCIPAL ═══</span>
-
-<span class="text-success">Módulos Disponíveis:</span>
-  <span class="text-info">main operacional</span>    - Módulo Operacional
-  <span class="text-info">main estoque</span>        - Módulo de Estoque
-  <span class="text-info">main financeiro</span>     - Módulo Financeiro
-  <span class="text-info">main rh</span>             - Módulo de RH
-
-<span class="text-warning">Dica:</span> Use os comandos diretos (producao, estoque, etc.) para relatórios rápidos
-<span class="text-warning">Exemplo:</span> Digite "main operacional" para ver opções do módulo operacional
-''',
-                'type': 'success'
-            })
-        
-        elif len(parts) == 2:
-            modulo = parts[1].lower()
-            
-            if modulo == 'operacional':
-                if user_role not in ROLES_OPERACIONAL:
-                    return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este módulo.</span>', 'type': 'error'})
-                
-                return jsonify({
-                    'output': '''
+    linhas = ['', '<span class="text-primary">═══ LISTA DE FUNCIONÁRIOS ═══</span>']
+    linhas += [f"  - {f['nome']} ({f['cargo']}) - CPF: {f['cpf']}" for f in funcionarios]
+    return _terminal_ok("\n".join(linhas) + "\n")
+
+@comandos.comando('folha', perfis=ROLES_RH, colecoes=('funcionarios.json', rh.CARGOS_FILE, rh.irpf.FILE_NAME),
+                  grupo='RH', uso='folha', ajuda='Mostra folha de pagamento simulada')
+def cmd_folha(args, ctx):
+    funcionarios = data_manager.load_view('funcionarios.json')
+    
+    # Simulação de cálculo: 160h + 10h extras, todos de uma vez
+    lote = rh.calcular_folha_lote(funcionarios, horas_trabalhadas=160, horas_extras=10)
+    total_liquido = sum(lote['liquido'])
+    
+    linhas = ['', '<span class="text-primary">═══ FOLHA DE PAGAMENTO (SIMULAÇÃO) ═══</span>']
+    linhas += [f"  {f['nome']}: R$ {liquido:.2f}" for f, liquido in zip(funcionarios, lote['liquido'])]
+    linhas.append(f"\n<span class=\"text-success\">Total da Folha:</span> R$ {total_liquido:.2f}")
+    return _terminal_ok("\n".join(linhas))
+
+# Module summaries shown by "main <modulo>": (roles, text)
+TERMINAL_MODULOS = {
+    'operacional': (ROLES_OPERACIONAL, '''
 <span class="text-primary">═══ MÓDULO OPERACIONAL ═══</span>
 
 <span class="text-success">Opções Disponíveis:</span>
@@ -721,16 +868,8 @@ def terminal_execute():
   • Projeções mensais e anuais
 
 <span class="text-info">Use o comando "producao" para ver o relatório completo</span>
-''',
-                    'type': 'success'
-                })
-            
-            elif modulo == 'estoque':
-                if user_role not in ROLES_ESTOQUE:
-                    return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este módulo.</span>', 'type': 'error'})
-                
-                return jsonify({
-                    'output': '''
+'''),
+    'estoque': (ROLES_ESTOQUE, '''
 <span class="text-primary">═══ MÓDULO DE ESTOQUE ═══</span>
 
 <span class="text-success">Opções Disponíveis:</span>
@@ -744,16 +883,8 @@ def terminal_execute():
   • Controlar quantidade em estoque
 
 <span class="text-info">Use o comando "estoque" para ver o relatório completo</span>
-''',
-                    'type': 'success'
-                })
-            
-            elif modulo == 'financeiro':
-                if user_role not in ROLES_FINANCEIRO:
-                    return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este módulo.</span>', 'type': 'error'})
-                
-                return jsonify({
-                    'output': '''
+'''),
+    'financeiro': (ROLES_FINANCEIRO, '''
 <span class="text-primary">═══ MÓDULO FINANCEIRO ═══</span>
 
 <span class="text-success">Opções Disponíveis:</span>
@@ -767,16 +898,8 @@ def terminal_execute():
   • Calcular preço de venda sugerido (+50%)
 
 <span class="text-info">Use o comando "financeiro" para ver o relatório completo</span>
-''',
-                    'type': 'success'
-                })
-            
-            elif modulo == 'rh':
-                if user_role not in ROLES_RH:
-                    return jsonify({'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este módulo.</span>', 'type': 'error'})
-                
-                return jsonify({
-                    'output': '''
+'''),
+    'rh': (ROLES_RH, '''
 <span class="text-primary">═══ MÓDULO DE RH ═══</span>
 
 <span class="text-success">Opções Disponíveis:</span>
@@ -792,27 +915,46 @@ def terminal_execute():
   • Gerenciar dados de funcionários
 
 <span class="text-info">Use o comando "rh" para ver o relatório completo</span>
-''',
-                    'type': 'success'
-                })
-            
-            else:
-                return jsonify({
-                    'output': f'<span class="text-danger">Módulo "{modulo}" não reconhecido.</span>\nMódulos disponíveis: operacional, estoque, financeiro, rh',
-                    'type': 'error'
-                })
-        
-        else:
-            return jsonify({
-                'output': '<span class="text-danger">Uso incorreto do comando.</span>\nUso: main [modulo]\nExemplo: main operacional',
-                'type': 'error'
-            })
+'''),
+}
+
+TERMINAL_MENU_PRINCIPAL = '''
+<span class="text-primary">═══ SISTEMA CLI - MENU PRINCIPAL ═══</span>
+
+<span class="text-success">Módulos Disponíveis:</span>
+  <span class="text-info">main operacional</span>    - Módulo Operacional
+  <span class="text-info">main estoque</span>        - Módulo de Estoque
+  <span class="text-info">main financeiro</span>     - Módulo Financeiro
+  <span class="text-info">main rh</span>             - Módulo de RH
+
+<span class="text-warning">Dica:</span> Use os comandos diretos (producao, estoque, etc.) para relatórios rápidos
+<span class="text-warning">Exemplo:</span> Digite "main operacional" para ver opções do módulo operacional
+'''
+
+@comandos.comando('main', grupo='CLI (Interface de Linha de Comando)',
+                  uso='main [modulo]', ajuda='Menu principal do CLI ou de um módulo (ex: main rh)')
+def cmd_main(args, ctx):
+    if not args:
+        # Mostra menu principal do CLI
+        return _terminal_ok(TERMINAL_MENU_PRINCIPAL)
     
-    else:
-        return jsonify({
-            'output': f'<span class="text-danger">Comando não reconhecido: "{command}"</span>\nDigite "help" para ver os comandos disponíveis.',
+    if len(args) > 1:
+        return {
+            'output': '<span class="text-danger">Uso incorreto do comando.</span>\nUso: main [modulo]\nExemplo: main operacional',
+            'type': 'error'
+        }
+    
+    modulo = args[0]
+    if modulo not in TERMINAL_MODULOS:
+        return {
+            'output': f'<span class="text-danger">Módulo "{modulo}" não reconhecido.</span>\nMódulos disponíveis: operacional, estoque, financeiro, rh',
             'type': 'error'
-        })
+        }
+    
+    roles, texto = TERMINAL_MODULOS[modulo]
+    if ctx['perfil'] not in roles:
+        return {'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este módulo.</span>', 'type': 'error'}
+    return _terminal_ok(texto)
 
 
 
@@ -0,0 +1,62 @@
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import rh
+
+N_FUNCIONARIOS = 1_000_000
+N_ESCALAR = 100_000
+
+def _funcionarios(n, seed=42):
+    rng = random.Random(seed)
+    cargos = [(cargo, valor) for setor in rh.SETORES_DA_EMPRESA.values() for cargo, valor in setor.items()]
+    return [dict(zip(("cargo", "valor_hora"), rng.choice(cargos))) for _ in range(n)]
+
+def _escalar(funcionarios):
+    for f in funcionarios:
+        bruto = rh.calcular_salario_bruto(160, f["valor_hora"])
+        extra = rh.calcular_horas_extras(10, f["valor_hora"], f["cargo"])
+        irpf = rh.calcular_irpf(bruto + extra)
+        rh.calcular_liquido(bruto + extra, irpf)
+
+def bench_folha(n=N_FUNCIONARIOS, n_escalar=N_ESCALAR):
+    """
+    Times the batch payroll at n employees (from columns and from the
+    employee dicts) against the scalar per-employee functions.
+    Returns a dict of timings in seconds.
+    """
+    funcionarios = _funcionarios(n)
+    valor_hora = [f["valor_hora"] for f in funcionarios]
+    elegivel = [rh.recebe_hora_extra(f["cargo"]) for f in funcionarios]
+    if rh.np is not None:
+        # Columns already in memory as arrays (e.g. loaded once and reused)
+        valor_hora, elegivel = rh.np.asarray(valor_hora), rh.np.asarray(elegivel)
+
+    inicio = time.perf_counter()
+    rh.calcular_folha_colunas(valor_hora, elegivel, 160, 10)
+    colunas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    rh.calcular_folha_lote(funcionarios, 160, 10)
+    lote = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    _escalar(funcionarios[:n_escalar])
+    escalar = (time.perf_counter() - inicio) * n / n_escalar
+
+    return {
+        "funcionarios": n,
+        "numpy": rh.np is not None,
+        "colunas_s": colunas,
+        "lote_s": lote,
+        "escalar_estimado_s": escalar,
+    }
+
+if __name__ == "__main__":
+    r = bench_folha()
+    print(f"Employees: {r['funcionarios']} (numpy: {'yes' if r['numpy'] else 'no'})")
+    print(f"  batch from columns:        {r['colunas_s']:.3f} s")
+    print(f"  batch from employee dicts: {r['lote_s']:.3f} s")
+    print(f"  scalar loop (estimated):   {r['escalar_estimado_s']:.3f} s")
@@ -0,0 +1,83 @@
+import sys
+import os
+import http.client
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from modules import data_manager, instrumentation
+
+ROUTES = ['/dashboard', '/financeiro', '/estoque', '/rh', '/api/v1/produtos']
+ROUNDS = 150
+REQUESTS = 10
+
+class _SilentHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def _tempo(port, cookie, route, requests):
+    inicio = time.perf_counter()
+    for _ in range(requests):
+        conexao = http.client.HTTPConnection('127.0.0.1', port)
+        conexao.request('GET', route, headers={'Cookie': f'session={cookie}'})
+        conexao.getresponse().read()
+        conexao.close()
+    return (time.perf_counter() - inicio) / requests
+
+def bench_instrumentation(routes=ROUTES, rounds=ROUNDS, requests=REQUESTS):
+    """
+    Overhead of the request instrumentation on the hot pages, served over
+    HTTP by a local single-threaded server (as a gunicorn worker would):
+    the same requests with recording on and off, in interleaved rounds,
+    over a copy of the shipped data. The median per request is compared.
+    Returns one result dict per route.
+    """
+    from app import app
+    origem = data_manager.DATA_DIR
+    tmpdir = tempfile.mkdtemp()
+    shutil.copytree(origem, tmpdir, dirs_exist_ok=True)
+    data_manager.DATA_DIR = tmpdir
+    data_manager.invalidate_cache()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = sess['username'] = 'admin'
+        sess['role'] = 'admin'
+    cookie = client.get_cookie('session').value
+    server = make_server('127.0.0.1', 0, app, request_handler=_SilentHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    resultados = []
+    try:
+        for route in routes:
+            _tempo(server.server_port, cookie, route, 100)  # warms caches and derived data
+            ligado, desligado = [], []
+            for _ in range(rounds):
+                instrumentation.ENABLED = True
+                ligado.append(_tempo(server.server_port, cookie, route, requests))
+                instrumentation.ENABLED = False
+                desligado.append(_tempo(server.server_port, cookie, route, requests))
+            antes, depois = statistics.median(desligado), statistics.median(ligado)
+            resultados.append({
+                "rota": route,
+                "desligado_ms": antes * 1e3,
+                "ligado_ms": depois * 1e3,
+                "overhead_pct": (depois - antes) / antes * 100,
+            })
+    finally:
+        server.shutdown()
+        instrumentation.ENABLED = True
+        data_manager.DATA_DIR = origem
+        data_manager.invalidate_cache()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return resultados
+
+if __name__ == "__main__":
+    print(f"{'route':<20} {'off (ms)':>10} {'on (ms)':>10} {'overhead':>10}")
+    for r in bench_instrumentation():
+        print(f"{r['rota']:<20} {r['desligado_ms']:>10.3f} {r['ligado_ms']:>10.3f} {r['overhead_pct']:>9.2f}%")
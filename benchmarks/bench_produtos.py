@@ -0,0 +1,73 @@
+import sys
+import os
+import shutil
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data_manager
+
+SIZES = [1_000, 10_000, 100_000]
+SAMPLES = 500
+
+def _produto(i):
+    return {
+        "codigo": f"P{i:07d}",
+        "nome": f"Produto {i}",
+        "data_fabricacao": "2026-01-01",
+        "fornecedor": "Fornecedor",
+        "quantidade": 10,
+        "valor_compra": 25.0,
+    }
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+def bench_produtos(sizes=SIZES, samples=SAMPLES):
+    """
+    Measures insert_unique (duplicate check + append) and get_by_key on the
+    produto codigo index with catalogs of growing size. With the index both
+    should stay flat; compactions of the log show up only in the p99/max.
+    Returns one result dict per catalog size.
+    """
+    resultados = []
+    for size in sizes:
+        tmpdir = tempfile.mkdtemp()
+        data_manager.DATA_DIR = tmpdir
+        data_manager.invalidate_cache()
+        try:
+            data_manager.save_data('produtos.json', [_produto(i) for i in range(size)])
+            data_manager.get_by_key('produtos.json', 'codigo', 'P0000000')  # warms the parse + index
+
+            inserts = []
+            for i in range(size, size + samples):
+                inicio = time.perf_counter()
+                ok = data_manager.insert_unique('produtos.json', _produto(i))
+                inserts.append(time.perf_counter() - inicio)
+                assert ok
+
+            lookups = []
+            for i in range(0, size, max(1, size // samples)):
+                inicio = time.perf_counter()
+                assert data_manager.get_by_key('produtos.json', 'codigo', f"P{i:07d}") is not None
+                lookups.append(time.perf_counter() - inicio)
+
+            assert not data_manager.insert_unique('produtos.json', _produto(0))
+        finally:
+            data_manager.invalidate_cache()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        resultados.append({
+            "produtos": size,
+            "insert_p50_us": statistics.median(inserts) * 1e6,
+            "insert_p99_us": _percentil(inserts, 0.99) * 1e6,
+            "lookup_p50_us": statistics.median(lookups) * 1e6,
+        })
+    return resultados
+
+if __name__ == "__main__":
+    print(f"{'produtos':>10} {'insert p50 (us)':>16} {'insert p99 (us)':>16} {'lookup p50 (us)':>16}")
+    for r in bench_produtos():
+        print(f"{r['produtos']:>10} {r['insert_p50_us']:>16.1f} {r['insert_p99_us']:>16.1f} {r['lookup_p50_us']:>16.1f}")
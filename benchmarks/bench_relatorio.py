@@ -0,0 +1,74 @@
+import sys
+import os
+import io
+import shutil
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data_manager, financeiro, rh
+
+SIZES = [10, 100, 1_000]
+SAMPLES = 50
+
+def _funcionario(i, cargos):
+    cargo, valor = cargos[i % len(cargos)]
+    return {"cpf": f"{i:011d}", "nome": f"Funcionario {i}", "cargo": cargo, "valor_hora": valor}
+
+def _mediana(funcao, samples):
+    tempos = []
+    for _ in range(samples):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+def bench_relatorio(sizes=SIZES, samples=SAMPLES):
+    """
+    Times the factory report as the web handlers get it, per request:
+    - before: build the data and print the console report (stdout sent
+      to a StringIO, so terminal/log I/O is not even counted)
+    - after (cold): montar_relatorio_fabrica right after a data change
+    - after (warm): montar_relatorio_fabrica with unchanged data
+    Returns one result dict per employee count.
+    """
+    cargos = [(cargo, valor) for setor in rh.SETORES_DA_EMPRESA.values() for cargo, valor in setor.items()]
+    resultados = []
+    for size in sizes:
+        tmpdir = tempfile.mkdtemp()
+        data_manager.DATA_DIR = tmpdir
+        data_manager.invalidate_cache()
+        financeiro.invalidar_nos()
+        try:
+            data_manager.save_data('funcionarios.json', [_funcionario(i, cargos) for i in range(size)])
+            data_manager.load_data('funcionarios.json')  # warms the parse
+
+            def antes():
+                financeiro.invalidar_nos()
+                stdout, sys.stdout = sys.stdout, io.StringIO()
+                try:
+                    financeiro.gerar_relatorio_fabrica()
+                finally:
+                    sys.stdout = stdout
+
+            def depois_frio():
+                financeiro.invalidar_nos()
+                financeiro.montar_relatorio_fabrica()
+
+            resultados.append({
+                "funcionarios": size,
+                "antes_ms": _mediana(antes, samples) * 1e3,
+                "depois_frio_ms": _mediana(depois_frio, samples) * 1e3,
+                "depois_quente_ms": _mediana(financeiro.montar_relatorio_fabrica, samples) * 1e3,
+            })
+        finally:
+            data_manager.invalidate_cache()
+            financeiro.invalidar_nos()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    return resultados
+
+if __name__ == "__main__":
+    print(f"{'employees':>10} {'before (ms)':>12} {'after cold (ms)':>16} {'after warm (ms)':>16}")
+    for r in bench_relatorio():
+        print(f"{r['funcionarios']:>10} {r['antes_ms']:>12.3f} {r['depois_frio_ms']:>16.3f} {r['depois_quente_ms']:>16.3f}")
@@ -0,0 +1,158 @@
+import sys
+import os
+import contextlib
+import shutil
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data_manager, estoque, financeiro, operacional, rh, terminal
+from scripts.generate_dataset import SCALES, generate_dataset
+
+# Data scales (rows per collection) of the default run
+DEFAULT_SCALES = ['1k', '10k']
+REPEAT = 7              # samples per benchmark; the median is reported
+MIN_SAMPLE_S = 0.02     # calls per sample are raised until a sample takes this long
+MAX_NUMBER = 100_000
+SEED = 42
+
+@contextlib.contextmanager
+def _dataset(rows, seed=SEED):
+    """Generated dataset of rows per collection as DATA_DIR, removed afterwards."""
+    origem = data_manager.DATA_DIR
+    tmpdir = tempfile.mkdtemp()
+    try:
+        generate_dataset(tmpdir, rows, seed, verbose=False)
+        financeiro.invalidar_nos()
+        terminal.limpar_cache()
+        yield tmpdir
+    finally:
+        data_manager.DATA_DIR = origem
+        data_manager.invalidate_cache()
+        financeiro.invalidar_nos()
+        terminal.limpar_cache()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+def _amostra(funcao, number):
+    inicio = time.perf_counter()
+    for _ in range(number):
+        funcao()
+    return (time.perf_counter() - inicio) / number
+
+def _medir(funcao, antes=None, repeat=REPEAT):
+    """
+    Seconds per call of funcao(): median and min over repeat samples.
+    Fast functions are called in batches (number per sample, calibrated
+    so a sample lasts MIN_SAMPLE_S). With antes, every call is timed on
+    its own and antes() runs untimed before it (cold-cache measurements).
+    """
+    funcao()  # warm-up
+    number = 1
+    while antes is None and number < MAX_NUMBER and _amostra(funcao, number) * number < MIN_SAMPLE_S:
+        number *= 4
+
+    amostras = []
+    for _ in range(repeat):
+        if antes is not None:
+            antes()
+        amostras.append(_amostra(funcao, number))
+    return {"mediana_ms": statistics.median(amostras) * 1e3, "min_ms": min(amostras) * 1e3, "chamadas": number}
+
+def _folha_escalar(funcionarios):
+    for f in funcionarios:
+        bruto = rh.calcular_salario_bruto(160, f["valor_hora"])
+        extra = rh.calcular_horas_extras(10, f["valor_hora"], f["cargo"])
+        imposto = rh.calcular_irpf(bruto + extra)
+        rh.calcular_liquido(bruto + extra, imposto)
+
+def _executar(casos, nomes, repeat):
+    return {nome: _medir(funcao, antes, repeat) for nome, (funcao, antes) in casos.items()
+            if nomes is None or nome in nomes}
+
+def bench_modulos(rows, repeat=REPEAT, nomes=None):
+    """
+    Microbenchmarks of the module functions behind the pages, over the
+    dataset currently in DATA_DIR (rows per collection).
+    Returns {benchmark name: timings} (only the names in nomes, if given).
+    """
+    produtos = data_manager.load_data('produtos.json')
+    funcionarios = data_manager.load_data('funcionarios.json')
+    semana = operacional.agregar_producao()
+    setor, cargos = next(iter(rh.SETORES_DA_EMPRESA.items()))
+    cargo = next(iter(cargos))
+    termo = produtos[len(produtos) // 2]["nome"].split()[0][:4]
+
+    casos = {
+        "estoque.calcular_custos": (lambda: estoque.calcular_custos(produtos), None),
+        "estoque.pesquisar_produto": (lambda: estoque.pesquisar_produto(termo), None),
+        "operacional.calcular_estatisticas": (lambda: operacional.calcular_estatisticas(semana), None),
+        "rh.gerar_matricula": (lambda: rh.gerar_matricula(setor, cargo, sequencial=rows + 1, avisar=False), None),
+        "rh.folha_escalar": (lambda: _folha_escalar(funcionarios), None),
+        "rh.calcular_folha_lote": (lambda: rh.calcular_folha_lote(funcionarios), None),
+        "financeiro.calcular_indicadores_financeiros[frio]": (financeiro.calcular_indicadores_financeiros,
+                                                               financeiro.invalidar_nos),
+        "financeiro.calcular_indicadores_financeiros[quente]": (financeiro.calcular_indicadores_financeiros, None),
+    }
+    return _executar(casos, nomes, repeat)
+
+def bench_rotas(rows, repeat=REPEAT, nomes=None):
+    """
+    Route benchmarks through app.test_client() with an admin session, over
+    the dataset currently in DATA_DIR: the full request (routing, session,
+    handler, template, instrumentation) as a worker serves it.
+    Returns {benchmark name: timings} (only the names in nomes, if given).
+    """
+    from app import app
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = sess['username'] = 'admin'
+        sess['role'] = 'admin'
+
+    def get(rota):
+        def requisicao():
+            response = client.get(rota)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {rota}: HTTP {response.status_code}")
+        return requisicao
+
+    def terminal_execute(comando):
+        def requisicao():
+            response = client.post('/terminal/execute', json={'command': comando})
+            if response.status_code != 200 or response.get_json().get('type') == 'error':
+                raise RuntimeError(f"terminal {comando!r}: {response.get_data(as_text=True)[:200]}")
+        return requisicao
+
+    casos = {
+        "GET /dashboard": (get('/dashboard'), None),
+        "GET /financeiro": (get('/financeiro'), None),
+        "GET /rh": (get('/rh'), None),
+        "POST /terminal/execute status": (terminal_execute('status'), None),
+        "POST /terminal/execute producao": (terminal_execute('producao'), None),
+        # Read-only commands are cached per collection version: cold = first run
+        "POST /terminal/execute folha[frio]": (terminal_execute('folha'), terminal.limpar_cache),
+    }
+    return _executar(casos, nomes, repeat)
+
+def bench_suite(scales=DEFAULT_SCALES, grupos=('modulos', 'rotas'), repeat=REPEAT, nomes=None, verbose=False):
+    """
+    Runs the selected groups at every data scale, each on a freshly
+    generated dataset (scripts/generate_dataset.py, fixed seed).
+    nomes limits the run to those benchmark names.
+    Returns one result dict per benchmark and scale.
+    """
+    benches = {'modulos': bench_modulos, 'rotas': bench_rotas}
+    resultados = []
+    for escala in scales:
+        rows = SCALES[escala] if escala in SCALES else int(escala)
+        with _dataset(rows):
+            for grupo in grupos:
+                for nome, tempos in benches[grupo](rows, repeat, nomes).items():
+                    resultados.append({"grupo": grupo, "nome": nome, "escala": rows, **tempos})
+                    if verbose:
+                        print(f"  {rows:>10,} {nome:<52} {tempos['mediana_ms']:>12.4f} ms")
+    return resultados
+
+if __name__ == "__main__":
+    print(f"{'rows':>12} {'benchmark':<52} {'median':>15}")
+    bench_suite(verbose=True)
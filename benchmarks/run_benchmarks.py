@@ -0,0 +1,185 @@
+import sys
+import os
+import argparse
+import datetime
+import json
+import platform
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_suite import DEFAULT_SCALES, REPEAT, bench_suite
+from modules import rh
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# A benchmark regresses when its fastest sample grows by more than this
+# fraction over the top of the baseline's noise band. The min, not the
+# median, is compared: load from other processes only ever adds time.
+THRESHOLD = 0.25
+# Below this many ms a difference is timer noise, not a regression
+MIN_DELTA_MS = 0.005
+# Regressions are measured again this many times before failing the run:
+# on a shared machine a slow minute makes any benchmark look slower, a
+# real regression stays slow on every run. The fastest run is kept.
+CONFIRM_RUNS = 2
+# Fewer samples than this make even the min too noisy to gate on
+MIN_REPEAT = 5
+# --save-baseline runs the suite this many times and keeps, per benchmark,
+# the band of its mins: on an unchanged tree the min still moves 1.5x from
+# run to run on a shared machine, so a single run is no reference
+BASELINE_RUNS = 3
+
+def _chave(resultado):
+    return f"{resultado['nome']}@{resultado['escala']}"
+
+def _ambiente():
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": rh.np is not None,
+    }
+
+def _min_ms(resultado):
+    # Baselines saved before min_ms was recorded only have the median
+    return resultado.get("min_ms", resultado["mediana_ms"])
+
+def _teto_ms(resultado):
+    # Top of the noise band; baselines saved from a single run have none
+    return resultado.get("teto_ms", _min_ms(resultado))
+
+def medir_baseline(escalas, grupos, repeat, runs=BASELINE_RUNS):
+    """
+    Runs the suite runs times. Returns one result per benchmark and scale:
+    the run with the fastest min, plus 'teto_ms', the slowest min seen
+    (the noise band is [min_ms, teto_ms]).
+    """
+    execucoes = [bench_suite(escalas, grupos, repeat) for _ in range(runs)]
+    resultados = []
+    for amostras in zip(*execucoes):
+        melhor = min(amostras, key=_min_ms)
+        resultados.append({**melhor, "teto_ms": max(_min_ms(a) for a in amostras)})
+    return resultados
+
+def comparar(resultados, baseline, threshold=THRESHOLD):
+    """
+    Compares every result with the baseline entry of the same benchmark and
+    scale: the current min against the top of the baseline's noise band.
+    Returns one dict per result, with 'razao' (current / baseline, None
+    when the baseline has no entry) and 'regressao' (True when slower by
+    more than threshold).
+    """
+    anteriores = {_chave(r): r for r in baseline.get("resultados", [])}
+    comparacao = []
+    for r in resultados:
+        anterior = anteriores.get(_chave(r))
+        if anterior is None:
+            comparacao.append({**r, "baseline_ms": None, "razao": None, "regressao": False})
+            continue
+        atual, base = _min_ms(r), _teto_ms(anterior)
+        razao = atual / base if base else None
+        regressao = razao is not None and razao > 1 + threshold and atual - base > MIN_DELTA_MS
+        comparacao.append({**r, "baseline_ms": base, "razao": razao, "regressao": regressao})
+    return comparacao
+
+def confirmar(resultados, comparacao, baseline, grupos, repeat, threshold=THRESHOLD, runs=CONFIRM_RUNS):
+    """
+    Runs the regressed benchmarks again (up to runs times, while any still
+    regresses) and keeps the run with the faster min of each. Returns the
+    updated (resultados, comparacao).
+    """
+    for _ in range(runs):
+        suspeitos = {_chave(c) for c in comparacao if c['regressao']}
+        if not suspeitos:
+            break
+        print(f"Re-measuring {len(suspeitos)} regressed benchmark(s)...")
+        escalas = sorted({str(c['escala']) for c in comparacao if c['regressao']}, key=int)
+        nomes = {c['nome'] for c in comparacao if c['regressao']}
+        novos = {_chave(r): r for r in bench_suite(escalas, grupos, repeat, nomes) if _chave(r) in suspeitos}
+        resultados = [min(r, novos.get(_chave(r), r), key=_min_ms) for r in resultados]
+        comparacao = comparar(resultados, baseline, threshold)
+    return resultados, comparacao
+
+def _salvar(path, dados):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the benchmark suite and compares it with the stored baseline.")
+    parser.add_argument('--scales', default=','.join(DEFAULT_SCALES),
+                        help=f"comma-separated data scales (rows per collection, default {','.join(DEFAULT_SCALES)})")
+    parser.add_argument('--only', choices=('modulos', 'rotas'), help="run a single group")
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help=f"samples per benchmark (default {REPEAT}, at least {MIN_REPEAT}); "
+                             "a check must use the value the baseline was saved with")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline JSON file (default benchmarks/baseline.json)")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f"allowed slowdown before failing, as a fraction (default {THRESHOLD})")
+    parser.add_argument('--confirm', type=int, default=CONFIRM_RUNS,
+                        help=f"re-runs of regressed benchmarks before failing (default {CONFIRM_RUNS})")
+    parser.add_argument('--save-baseline', action='store_true', help=f"measure {BASELINE_RUNS} runs and store them as the new baseline")
+    args = parser.parse_args(argv)
+    if args.repeat < MIN_REPEAT:
+        parser.error(f"--repeat must be at least {MIN_REPEAT}: the min of fewer samples is noise")
+
+    scales = [s.strip() for s in args.scales.split(',') if s.strip()]
+    grupos = (args.only,) if args.only else ('modulos', 'rotas')
+    print(f"--- Benchmarks: {', '.join(grupos)} at {', '.join(scales)} rows ---")
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        # The min of n samples shrinks as n grows: only equal sample counts compare
+        if not args.save_baseline and baseline.get("repeat") != args.repeat:
+            parser.error(f"the baseline was saved with --repeat {baseline.get('repeat')}, "
+                         f"run the check with the same value (got {args.repeat})")
+    if args.save_baseline:
+        resultados = medir_baseline(scales, grupos, args.repeat)
+    else:
+        resultados = bench_suite(scales, grupos, args.repeat)
+    comparacao = comparar(resultados, baseline or {}, args.threshold)
+    if not args.save_baseline:
+        resultados, comparacao = confirmar(resultados, comparacao, baseline or {}, grupos, args.repeat,
+                                           args.threshold, args.confirm)
+    dados = {
+        "data": datetime.datetime.now().isoformat(timespec='seconds'),
+        "ambiente": _ambiente(),
+        "repeat": args.repeat,
+        "resultados": resultados,
+    }
+
+    print(f"\n{'rows':>10} {'benchmark':<52} {'min (ms)':>12} {'baseline':>12} {'ratio':>7}")
+    for c in comparacao:
+        base = f"{c['baseline_ms']:>12.4f}" if c['baseline_ms'] is not None else f"{'-':>12}"
+        razao = f"{c['razao']:>6.2f}x" if c['razao'] is not None else f"{'-':>7}"
+        marca = '  << REGRESSION' if c['regressao'] else ''
+        print(f"{c['escala']:>10,} {c['nome']:<52} {_min_ms(c):>12.4f} {base} {razao}{marca}")
+
+    if args.output:
+        _salvar(args.output, {**dados, "threshold": args.threshold, "comparacao": comparacao})
+        print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        _salvar(args.baseline, dados)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}: run with --save-baseline to store one.")
+        return 0
+    if baseline.get("ambiente") != dados["ambiente"]:
+        print("\n[!] Baseline recorded on a different environment: "
+              f"{baseline.get('ambiente')} vs {dados['ambiente']}")
+
+    regressoes = [c for c in comparacao if c['regressao']]
+    if regressoes:
+        print(f"\n[FAIL] {len(regressoes)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    print(f"\n[OK] No regression beyond {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,9 @@ import os
 import sys
 import time
 import getpass
-from werkzeug.security import check_password_hash
 
 # Import modules
-from modules import operacional, estoque, financeiro, rh, data_manager
+from modules import operacional, estoque, financeiro, rh, data_manager, auth
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -37,18 +36,17 @@ def login():
         # Usar input() ao invés de getpass() para compatibilidade com VS Code
         password = input("Senha: ").strip()
         
-        users = data_manager.load_data('users.json')
-        
         # Se não houver usuários cadastrados, permitir acesso
-        if not users:
+        if not data_manager.count_data('users.json'):
             print("\n⚠ Nenhum usuário cadastrado. Criando acesso padrão...")
             print("✓ Entrando como administrador...")
             time.sleep(1)
             return {'username': username, 'role': 'admin'}
         
-        user = next((u for u in users if u['username'] == username), None)
+        # Busca pelo índice de username; hash antigo é atualizado no login correto
+        user = auth.autenticar(username, password)
         
-        if user and check_password_hash(user['password'], password):
+        if user:
             print(f"\n✓ Bem-vindo, {username}!")
             time.sleep(1)
             return user
@@ -108,23 +106,11 @@ def menu_operacional():
             operacional.cadastrar_producao()
             pause()
         elif opcao == '2':
-            # Load data
-            dados_flat = data_manager.load_data('producao.json')
-            
-            # Reconstruct structure
-            dias_semana = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-            dados_estruturados = []
-            
-            for dia in dias_semana:
-                turnos_dia = {"Manhã": 0, "Tarde": 0, "Noite": 0}
-                rows = [row for row in dados_flat if row['dia'] == dia]
-                for row in rows:
-                    if row['turno'] in turnos_dia:
-                        turnos_dia[row['turno']] += row['quantidade']
-                dados_estruturados.append({"dia": dia, "turnos": turnos_dia})
+            # Reconstruct structure (single pass over producao.json)
+            dados_estruturados = operacional.agregar_producao()
             
             stats = operacional.calcular_estatisticas(dados_estruturados)
-            ideal = operacional.calcular_capacidade_ideal()
+            ideal = operacional.calcular_capacidade_ideal(operacional.perguntar_meta_mensal())
             operacional.gerar_relatorio(dados_estruturados, stats, ideal)
             pause()
         elif opcao == '0':
@@ -201,14 +187,9 @@ def menu_financeiro():
             pause()
         elif opcao == '2':
             # Gather data for report
-            despesas = data_manager.load_data('despesas.json')
-            total_fixo = sum(d['valor'] for d in despesas)
-            
-            produtos = data_manager.load_data('produtos.json')
-            custo_insumos = sum(p['quantidade'] * p['valor_compra'] for p in produtos)
-            
-            producao = data_manager.load_data('producao.json')
-            qtd_carros = sum(row['quantidade'] for row in producao)
+            total_fixo = data_manager.sum_field('despesas.json', 'valor')
+            custo_insumos = data_manager.sum_field('produtos.json', 'quantidade', 'valor_compra')
+            qtd_carros = operacional.total_produzido()
             
             custo_total = financeiro.calcular_custo_producao(total_fixo, custo_insumos)
             custo_unitario = financeiro.calcular_custo_por_carro(custo_total, qtd_carros)
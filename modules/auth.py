@@ -0,0 +1,127 @@
+# Módulo: Autenticação
+# Descrição: Busca de usuários pelo índice de username e verificação de
+# senhas num pool limitado de threads (o hash é caro e não deve ocupar as
+# threads que atendem as requisições), com métricas da fila e atualização
+# transparente dos hashes antigos para os parâmetros atuais.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    from modules import data_manager
+except ImportError:
+    import data_manager
+
+USERS_FILE = 'users.json'
+
+# Parâmetros atuais dos hashes novos (werkzeug: 'scrypt' = scrypt:32768:8:1).
+# Hashes gravados com outros parâmetros são refeitos no próximo login correto.
+METODO_HASH = 'scrypt'
+
+# Verificações executando ao mesmo tempo e quantas podem esperar na fila;
+# com a fila cheia a tentativa é recusada na hora (FilaCheia)
+VERIFICACOES_SIMULTANEAS = int(os.getenv('AUTH_WORKERS', '2'))
+FILA_MAXIMA = int(os.getenv('AUTH_QUEUE', '16'))
+
+
+class FilaCheia(RuntimeError):
+    """Há verificações demais em andamento; tente de novo em instantes."""
+
+
+_pool = ThreadPoolExecutor(max_workers=VERIFICACOES_SIMULTANEAS, thread_name_prefix='auth')
+_vagas = threading.BoundedSemaphore(VERIFICACOES_SIMULTANEAS + FILA_MAXIMA)
+_metricas_lock = threading.Lock()
+_metricas = {
+    'na_fila': 0,
+    'em_execucao': 0,
+    'maior_fila': 0,
+    'verificacoes': 0,
+    'recusadas': 0,
+    'rehashes': 0,
+    'espera_total_s': 0.0,
+    'verificacao_total_s': 0.0,
+}
+_prefixo_atual = None
+
+
+def gerar_hash(senha):
+    """Hash de uma senha com os parâmetros atuais (METODO_HASH)."""
+    return generate_password_hash(senha, METODO_HASH)
+
+
+def precisa_rehash(hash_senha):
+    """True se o hash foi gerado com método ou parâmetros diferentes dos atuais."""
+    global _prefixo_atual
+    if _prefixo_atual is None:
+        _prefixo_atual = gerar_hash('').split('$', 1)[0]
+    return hash_senha.split('$', 1)[0] != _prefixo_atual
+
+
+def buscar_usuario(username):
+    """Registro do usuário (cópia) pelo índice de username, ou None."""
+    if not username:
+        return None
+    return data_manager.get_by_key(USERS_FILE, 'username', username)
+
+
+def autenticar(username, senha):
+    """
+    Confere usuário e senha e devolve o registro do usuário, ou None se não
+    conferem. A verificação roda no pool de autenticação; se a senha está
+    correta mas o hash é antigo, ele é refeito e gravado com os parâmetros atuais.
+
+    Raises:
+        FilaCheia: Se o pool e a fila estão lotados
+    """
+    usuario = buscar_usuario(username)
+    if usuario is None or not usuario.get('password'):
+        return None
+
+    if not _vagas.acquire(blocking=False):
+        with _metricas_lock:
+            _metricas['recusadas'] += 1
+        raise FilaCheia("Muitas tentativas de login simultâneas")
+    with _metricas_lock:
+        _metricas['na_fila'] += 1
+        _metricas['maior_fila'] = max(_metricas['maior_fila'], _metricas['na_fila'])
+    try:
+        tarefa = _pool.submit(_verificar, usuario, senha, time.perf_counter())
+    except BaseException:
+        with _metricas_lock:
+            _metricas['na_fila'] -= 1
+        _vagas.release()
+        raise
+    return usuario if tarefa.result() else None
+
+
+def _verificar(usuario, senha, enfileirado_em):
+    inicio = time.perf_counter()
+    with _metricas_lock:
+        _metricas['na_fila'] -= 1
+        _metricas['em_execucao'] += 1
+        _metricas['espera_total_s'] += inicio - enfileirado_em
+    try:
+        correta = check_password_hash(usuario['password'], senha)
+        if correta and precisa_rehash(usuario['password']):
+            novo = gerar_hash(senha)
+            if data_manager.update_by_key(USERS_FILE, usuario['username'], {'password': novo}) is not None:
+                usuario['password'] = novo
+                with _metricas_lock:
+                    _metricas['rehashes'] += 1
+        return correta
+    finally:
+        with _metricas_lock:
+            _metricas['em_execucao'] -= 1
+            _metricas['verificacoes'] += 1
+            _metricas['verificacao_total_s'] += time.perf_counter() - inicio
+        _vagas.release()
+
+
+def estatisticas():
+    """Métricas do pool: fila e execução atuais, maior fila, totais e tempos acumulados."""
+    with _metricas_lock:
+        return dict(_metricas)
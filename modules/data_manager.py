@@ -1,5 +1,24 @@
+import base64
+import bisect
 import json
 import os
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Sequence
+from contextlib import contextmanager
+from types import MappingProxyType
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no advisory locks, only the in-process locks apply
+    fcntl = None
+
+try:
+    from modules import sqlite_backend
+except ImportError:
+    import sqlite_backend
 
 # Allow custom data directory via environment variable (useful for cloud deployments)
 DATA_DIR = os.getenv('DATA_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
@@ -7,30 +26,1191 @@ DATA_DIR = os.getenv('DATA_DIR', os.path.join(os.path.dirname(os.path.dirname(os
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
-def load_data(filename):
+# Storage backend: 'json' (default, one file per collection in DATA_DIR) or
+# 'sqlite' (stdlib sqlite3, one database file; see modules/sqlite_backend.py)
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'json').lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH')
+
+# Collections stored as a JSON snapshot plus an append-only JSON-Lines log
+# (<name>.log.jsonl). Inserts only append one line to the log; the log is
+# folded back into the snapshot once it grows past COMPACT_THRESHOLD bytes.
+LOG_BACKED_FILES = {'producao.json', 'produtos.json', 'funcionarios.json'}
+COMPACT_THRESHOLD = 256 * 1024
+
+# Primary keys: filename -> field. Lookups on that field and insert_unique()
+# use a hash index on the normalized key (see _key), built once per parsed
+# snapshot and per parsed log, so they cost O(1) whatever the collection size.
+# On log-backed collections update_by_key()/delete_by_key() append one change
+# entry to the log instead of rewriting the snapshot.
+PRIMARY_KEYS = {'produtos.json': 'codigo', 'funcionarios.json': 'cpf', 'users.json': 'username'}
+
+# Other unique fields: indexed like the primary key and checked by insert_unique()
+UNIQUE_KEYS = {'funcionarios.json': ('matricula',)}
+
+# Per-field key normalization on top of _key (e.g. '123.456.789-00' == '12345678900').
+# sqlite_backend.KEY_NORMALIZERS must stay the same.
+KEY_NORMALIZERS = {'cpf': lambda v: ''.join(c for c in v if c.isdigit())}
+
+# Marker of change entries in a log: {"$op": "set", "key": k, "record": {...}}
+# replaces the record with primary key k, {"$op": "del", "key": k} removes it
+_OP = '$op'
+
+# Persisted counters (name -> last value handed out), see next_sequence()
+SEQUENCES_FILE = 'sequencias.json'
+
+# Collections split into monthly segments by an ISO date field ('AAAA-MM-DD').
+# Each segment '<name>/<AAAA-MM>.json' is a log-backed collection of its own;
+# records without the field stay in the base file. Reading the collection
+# returns the base records followed by the segments in chronological order,
+# and load_range() only opens the segments that overlap the requested dates.
+PARTITIONED_FILES = {'producao.json': 'data'}
+
+# In-process read cache: filepath -> (signature, parsed data).
+# The signature is (mtime_ns, size, inode), so any rewrite of the file -
+# by this process, another gunicorn worker or a manual edit - forces a re-parse.
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0}
+
+# Per-thread count of bytes read from / written to disk (see io_counters)
+class _IOCounters(threading.local):
+    read = 0
+    written = 0
+
+_io = _IOCounters()
+
+# Shared (never mutated) result for missing files
+_MISSING = []
+
+# Write locking: a per-file RLock serializes threads of this process and an
+# advisory fcntl lock on <file>.lock serializes gunicorn workers.
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_held = threading.local()
+
+# Group-commit queue for appends: filename -> [_PendingAppend]
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+class ReadOnlyCollection(Sequence):
     """
-    Loads data from a JSON file.
-    Returns an empty list if file doesn't exist or is invalid.
+    Read-only view over a cached collection.
+    Records are exposed as read-only mappings, so callers can iterate and
+    sum without copying and without being able to corrupt the shared cache.
     """
-    filepath = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(filepath):
+
+    def __init__(self, data):
+        self._data = data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyCollection(self._data[index])
+        return _freeze(self._data[index])
+
+    def __iter__(self):
+        for item in self._data:
+            yield _freeze(item)
+
+
+def _freeze(item):
+    return MappingProxyType(item) if isinstance(item, dict) else item
+
+
+def _signature(filepath):
+    st = os.stat(filepath)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _resolve(filename):
+    """
+    Absolute path of a collection (absolute paths are kept as they are).
+    """
+    return filename if os.path.isabs(filename) else os.path.join(DATA_DIR, filename)
+
+
+def _thread_lock(path):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.RLock()
+        return lock
+
+
+def _held_locks():
+    held = getattr(_held, 'paths', None)
+    if held is None:
+        held = _held.paths = {}
+    return held
+
+
+@contextmanager
+def _flock(path, mode):
+    """
+    Takes the advisory lock file of path. Re-entrant per thread: a thread that
+    already holds the lock (e.g. reading inside update_data) does not lock again,
+    which would otherwise deadlock against its own descriptor.
+    """
+    held = _held_locks()
+    if fcntl is None or held.get(path) or not os.path.isdir(os.path.dirname(path)):
+        held[path] = held.get(path, 0) + 1
+        try:
+            yield
+        finally:
+            held[path] -= 1
+        return
+
+    with open(path + '.lock', 'a') as lockfile:
+        fcntl.flock(lockfile.fileno(), mode)
+        held[path] = 1
+        try:
+            yield
+        finally:
+            held[path] = 0
+            fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(filename):
+    """
+    Exclusive lock for read-modify-write on a collection, across threads and
+    gunicorn worker processes. filename may also be an absolute path.
+    """
+    path = _resolve(filename)
+    with _thread_lock(path):
+        with _flock(path, fcntl.LOCK_EX if fcntl else None):
+            yield
+
+
+def _use_sqlite():
+    return DATA_BACKEND == 'sqlite'
+
+
+def _db_path():
+    return SQLITE_PATH or os.path.join(DATA_DIR, 'carangos.db')
+
+
+def _key(value, field=None):
+    """
+    Normalizes a key for comparisons (codes may be stored as int or str,
+    typed with stray spaces). Fields in KEY_NORMALIZERS get extra normalization.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    normalize = KEY_NORMALIZERS.get(field)
+    return normalize(value) if normalize else value
+
+
+def _is_log_backed(filename):
+    return filename in LOG_BACKED_FILES or _segment_parent(filename) is not None
+
+
+def _segment_parent(filename):
+    parent = os.path.dirname(filename)
+    if parent and parent + '.json' in PARTITIONED_FILES:
+        return parent + '.json'
+    return None
+
+
+def _partition_key(filename, record):
+    """
+    Month ('AAAA-MM') of a record, or None when it has no usable date.
+    """
+    value = record.get(PARTITIONED_FILES[filename]) if isinstance(record, dict) else None
+    if isinstance(value, str) and len(value) >= 7:
+        return value[:7]
+    return None
+
+
+def _segment_name(filename, key):
+    return os.path.splitext(filename)[0] + '/' + key + '.json'
+
+
+def _segment_keys(filename):
+    """
+    Months with a segment on disk (snapshot or log), in chronological order.
+    """
+    dirpath = os.path.join(DATA_DIR, os.path.splitext(filename)[0])
+    if not os.path.isdir(dirpath):
         return []
-    
+    keys = set()
+    for name in os.listdir(dirpath):
+        if name.endswith('.log.jsonl'):
+            keys.add(name[:-len('.log.jsonl')])
+        elif name.endswith('.json') and not name.startswith('.'):
+            keys.add(name[:-len('.json')])
+    return sorted(keys)
+
+
+def _split_partitions(filename, records):
+    """
+    Groups records by target collection: the base file or a month segment.
+    """
+    groups = {}
+    for record in records:
+        key = _partition_key(filename, record)
+        target = filename if key is None else _segment_name(filename, key)
+        groups.setdefault(target, []).append(record)
+    return groups
+
+
+def _log_path(filename):
+    base, _ = os.path.splitext(filename)
+    return os.path.join(DATA_DIR, base + '.log.jsonl')
+
+
+def _parse_json(f):
+    return json.load(f)
+
+
+def _parse_log(f):
+    """
+    Parses a JSON-Lines log. A truncated last line (crash in the middle of
+    an append) is ignored instead of discarding the whole log.
+    """
+    rows = []
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return rows
+
+
+def _copy(data):
+    """
+    Copies a cached collection before handing it to a caller.
+    Records are flat dicts, so copying each one a level deep is enough.
+    """
+    if isinstance(data, list):
+        return [dict(item) if isinstance(item, dict) else item for item in data]
+    if isinstance(data, dict):
+        return json.loads(json.dumps(data))
+    return data
+
+
+def _load_cached(filename):
+    """
+    Returns the shared parsed collection for filename.
+    The result is owned by the cache and must never be mutated.
+    """
+    if filename in PARTITIONED_FILES:
+        return _load_partitioned(filename)
+    if _is_log_backed(filename):
+        return _load_log_backed(filename)
+    return _read_file(os.path.join(DATA_DIR, filename), _parse_json)
+
+
+def _load_partitioned(filename):
+    """
+    Returns base + segments. Like snapshot + log, the concatenation is cached
+    and only rebuilt when one of the parts was re-parsed.
+    """
+    parts = [_load_log_backed(filename)]
+    parts += [_load_log_backed(_segment_name(filename, key)) for key in _segment_keys(filename)]
+    parts = tuple(p for p in parts if p)
+    if len(parts) <= 1:
+        return parts[0] if parts else _MISSING
+
+    key = ('partitioned', filename)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and len(entry[0]) == len(parts) and all(a is b for a, b in zip(entry[0], parts)):
+            return entry[1]
+    combined = [row for part in parts for row in part]
+    with _cache_lock:
+        _cache[key] = (parts, combined)
+    return combined
+
+
+def _load_log_backed(filename):
+    """
+    Returns snapshot + log rows. The concatenation is cached too and only
+    rebuilt when the snapshot or the log was re-parsed.
+    """
+    snapshot, log = _read_parts(filename)
+    if not log:
+        return snapshot
+
+    key = ('combined', filename)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0][0] is snapshot and entry[0][1] is log:
+            return entry[1]
+    combined = _apply_log(filename, snapshot, log)
+    with _cache_lock:
+        _cache[key] = ((snapshot, log), combined)
+    return combined
+
+
+def _has_changes(log):
+    return any(isinstance(row, dict) and _OP in row for row in log)
+
+
+def _apply_log(filename, snapshot, log):
+    """
+    snapshot + log, with the change entries of the log applied in order.
+    """
+    field = PRIMARY_KEYS.get(_segment_parent(filename) or filename)
+    if field is None or not _has_changes(log):
+        return snapshot + log
+
+    rows = list(snapshot)
+    positions = {}
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            positions.setdefault(_key(row.get(field), field), i)
+    for entry in log:
+        if not (isinstance(entry, dict) and _OP in entry):
+            positions.setdefault(_key(entry.get(field), field) if isinstance(entry, dict) else None, len(rows))
+            rows.append(entry)
+            continue
+        i = positions.get(entry.get('key'))
+        if i is None:
+            continue
+        if entry[_OP] == 'del':
+            rows[i] = None
+            del positions[entry['key']]
+        else:
+            rows[i] = entry['record']
+    return [row for row in rows if row is not None]
+
+
+def _read_parts(filename):
+    """
+    Parsed (snapshot, log) of a log-backed collection.
+    """
+    # Shared lock so a compaction (new snapshot + log removal) is never seen half-done.
+    # Segments are written under the lock of their partitioned collection.
+    with _flock(_resolve(_segment_parent(filename) or filename), fcntl.LOCK_SH if fcntl else None):
+        snapshot = _read_file(os.path.join(DATA_DIR, filename), _parse_json)
+        log = _read_file(_log_path(filename), _parse_log)
+    if not isinstance(snapshot, list):
+        snapshot = _MISSING
+    return snapshot, log
+
+
+def _key_index(source, rows, field, primary=None):
+    """
+    Hash index over one parsed file, cached next to the parse and rebuilt only
+    when the file is re-parsed (new rows object). Returns (plain, changes):
+    plain is {normalized key: first row}; for a log with change entries of the
+    primary key, changes is {normalized primary key: final row, or None when
+    deleted} and the rows they set are indexed in plain as well.
+    """
+    cache_key = ('index', source, field)
+    with _cache_lock:
+        entry = _cache.get(cache_key)
+        if entry is not None and entry[0] is rows:
+            return entry[1]
+    plain, changes = {}, {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        if _OP not in row:
+            if primary is not None and changes.get(_key(row.get(primary), primary), 0) is None:
+                # Record inserted again after a delete
+                changes[_key(row.get(primary), primary)] = row
+            plain.setdefault(_key(row.get(field), field), row)
+        elif row[_OP] == 'del':
+            changes[row['key']] = None
+        else:
+            changes[row['key']] = row['record']
+            plain[_key(row['record'].get(field), field)] = row['record']
+    index = (plain, changes)
+    with _cache_lock:
+        _cache[cache_key] = (rows, index)
+    return index
+
+
+def _indexed_lookup(filename, field, value):
+    """
+    Lookup on the primary key or a unique field without scanning: snapshot
+    index, then log index. Change entries of the log win over both, and a hit
+    on a unique field is checked against the current state of its record.
+    """
+    wanted = _key(value, field)
+    primary = PRIMARY_KEYS.get(filename)
+    if not _is_log_backed(filename):
+        return _key_index(os.path.join(DATA_DIR, filename), _load_cached(filename), field)[0].get(wanted)
+
+    snapshot, log = _read_parts(filename)
+    snap_index, _ = _key_index(os.path.join(DATA_DIR, filename), snapshot, field)
+    log_index, changes = _key_index(_log_path(filename), log, field, primary)
+    if not changes:
+        row = snap_index.get(wanted)
+        return row if row is not None else log_index.get(wanted)
+
+    if field == primary:
+        if wanted in changes:
+            return changes[wanted]
+        row = snap_index.get(wanted)
+        return row if row is not None else log_index.get(wanted)
+
+    for row in (log_index.get(wanted), snap_index.get(wanted)):
+        if row is None:
+            continue
+        current = _indexed_lookup(filename, primary, row.get(primary))
+        if current is not None and _key(current.get(field), field) == wanted:
+            return current
+    return None
+
+
+def _read_file(filepath, parser):
+    if not os.path.exists(filepath):
+        return _MISSING
+
+    try:
+        signature = _signature(filepath)
+    except OSError:
+        signature = None
+
+    if signature is not None:
+        with _cache_lock:
+            entry = _cache.get(filepath)
+            if entry is not None and entry[0] == signature:
+                _cache_stats['hits'] += 1
+                return entry[1]
+
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            _count_io(read=os.fstat(f.fileno()).st_size)
+            data = parser(f)
     except (json.JSONDecodeError, IOError):
         return []
 
+    with _cache_lock:
+        _cache_stats['misses'] += 1
+        if signature is not None:
+            _cache[filepath] = (signature, data)
+    return data
+
+
+def load_data(filename):
+    """
+    Loads data from a JSON file.
+    Returns an empty list if file doesn't exist or is invalid.
+    The result is a private copy: callers may modify it and pass it to save_data.
+    """
+    if _use_sqlite():
+        return sqlite_backend.load(_db_path(), filename)
+    return _copy(_load_cached(filename))
+
+
+def load_view(filename):
+    """
+    Loads a read-only view of a JSON collection without copying it.
+    Use it on hot read paths (sums, counts, listings) that never modify the data.
+    """
+    data = sqlite_backend.load(_db_path(), filename) if _use_sqlite() else _load_cached(filename)
+    if isinstance(data, list):
+        return ReadOnlyCollection(data)
+    return _copy(data)
+
+
+def iter_data(filename):
+    """
+    Streams the records of a collection one by one.
+    For log-backed collections the log is read line by line from disk.
+    """
+    if _use_sqlite():
+        yield from sqlite_backend.iterate(_db_path(), filename)
+        return
+
+    yield from _iter_file(filename)
+    if filename in PARTITIONED_FILES:
+        for key in _segment_keys(filename):
+            yield from _iter_file(_segment_name(filename, key))
+
+
+def load_range(filename, start, end):
+    """
+    Returns copies of the records of a partitioned collection whose date field
+    is within [start, end] (ISO dates, both inclusive), in storage order.
+    Only the monthly segments overlapping the range are read.
+    """
+    field = PARTITIONED_FILES[filename]
+    if _use_sqlite():
+        return sqlite_backend.load_range(_db_path(), filename, field, start, end)
+
+    rows = []
+    for key in _segment_keys(filename):
+        if start[:7] <= key <= end[:7]:
+            rows.extend(dict(r) for r in _load_log_backed(_segment_name(filename, key))
+                        if start <= str(r.get(field, '')) <= end)
+    return rows
+
+
+def _iter_file(filename):
+    if filename in PRIMARY_KEYS and _is_log_backed(filename) and _has_changes(_read_parts(filename)[1]):
+        # Change entries need the whole collection; the log is small (see COMPACT_THRESHOLD)
+        for item in _load_log_backed(filename):
+            yield dict(item)
+        return
+
+    snapshot = _read_file(os.path.join(DATA_DIR, filename), _parse_json)
+    if isinstance(snapshot, list):
+        for item in snapshot:
+            yield dict(item) if isinstance(item, dict) else item
+    if not _is_log_backed(filename):
+        return
+
+    logpath = _log_path(filename)
+    if not os.path.exists(logpath):
+        return
+    with open(logpath, 'r', encoding='utf-8') as f:
+        _count_io(read=os.fstat(f.fileno()).st_size)
+        for row in _parse_log(f):
+            yield row
+
+
+def get_by_key(filename, field, value):
+    """
+    Returns a copy of the first record whose field matches value, or None.
+    """
+    if _use_sqlite():
+        return sqlite_backend.get_by_key(_db_path(), filename, field, value)
+
+    if PRIMARY_KEYS.get(filename) == field or field in UNIQUE_KEYS.get(filename, ()):
+        row = _indexed_lookup(filename, field, value)
+        return dict(row) if row is not None else None
+
+    wanted = _key(value, field)
+    for item in _load_cached(filename):
+        if isinstance(item, dict) and _key(item.get(field), field) == wanted:
+            return dict(item)
+    return None
+
+
+def filter_data(filename, **criteria):
+    """
+    Returns copies of the records matching every field=value criterion.
+    Values are compared as text, the same way on both backends.
+    """
+    if _use_sqlite():
+        return sqlite_backend.filter_data(_db_path(), filename, criteria)
+
+    wanted = {f: _key(v, f) for f, v in criteria.items()}
+    return [dict(item) for item in _load_cached(filename)
+            if all(_key(item.get(f), f) == v for f, v in wanted.items())]
+
+
+def sum_field(filename, *fields, **criteria):
+    """
+    Sums a numeric field over a collection, without handing the records to the caller.
+    With several fields, sums their product per record:
+        sum_field('produtos.json', 'quantidade', 'valor_compra')
+    """
+    if _use_sqlite():
+        return sqlite_backend.sum_field(_db_path(), filename, fields, criteria)
+
+    wanted = {f: _key(v, f) for f, v in criteria.items()}
+    total = 0
+    for item in _load_cached(filename):
+        if wanted and not all(_key(item.get(f), f) == v for f, v in wanted.items()):
+            continue
+        value = 1
+        for f in fields:
+            value *= item.get(f, 0)
+        total += value
+    return total
+
+
+def count_data(filename):
+    """
+    Returns the number of records in a collection.
+    """
+    if _use_sqlite():
+        return sqlite_backend.count(_db_path(), filename)
+    return len(_load_cached(filename))
+
+
+def _sort_key(value):
+    # Total order over mixed JSON values: missing < numbers < text (case-insensitive) < others
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value.casefold())
+    return (3, str(value))
+
+
+def _sorted_order(filename, rows, sort):
+    """
+    Ascending (sort key, position) pairs of rows, cached next to the parsed
+    collection and rebuilt only when it is re-parsed (new rows object).
+    Without sort the storage order is kept.
+    """
+    cache_key = ('order', filename, sort)
+    with _cache_lock:
+        entry = _cache.get(cache_key)
+        if entry is not None and entry[0] is rows:
+            return entry[1]
+    if sort is None:
+        order = [((0, 0), i) for i in range(len(rows))]
+    else:
+        order = sorted((_sort_key(row.get(sort) if isinstance(row, dict) else None), i)
+                       for i, row in enumerate(rows))
+    with _cache_lock:
+        _cache[cache_key] = (rows, order)
+    return order
+
+
+def _matches(row, needle, search):
+    values = (row.get(f) for f in search) if search else row.values()
+    return any(needle in str(v).casefold() for v in values if v is not None)
+
+
+def encode_cursor(position):
+    """Opaque, URL-safe token for a keyset position (see query_page)."""
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(token, filename=None):
+    """
+    Inverse of encode_cursor; ValueError on a malformed token or on one that
+    is not a keyset position of the backend serving filename (either backend
+    when filename is None).
+    """
+    def as_tuple(value):
+        return tuple(as_tuple(v) for v in value) if isinstance(value, list) else value
+    try:
+        position = as_tuple(json.loads(base64.urlsafe_b64decode(token.encode('ascii'))))
+    except (ValueError, TypeError, UnicodeError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    return _check_cursor(position, filename)
+
+
+def _check_cursor(position, filename=None):
+    """
+    position when it has the shape query_page hands out for filename:
+    ((type tag, sort value), row position) for in-memory rows (see
+    _sort_key), (sort value, id) for sqlite tables. ValueError otherwise.
+    """
+    def is_int(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def json_shape(position):
+        key, index = position
+        if not (isinstance(key, tuple) and len(key) == 2 and is_int(index) and index >= 0):
+            return False
+        tag, value = key
+        return ((tag == 0 and value == 0) or (tag == 1 and isinstance(value, (int, float)))
+                or (tag in (2, 3) and isinstance(value, str)))
+
+    def sqlite_shape(position):
+        value, row_id = position
+        return is_int(row_id) and (value is None or isinstance(value, (int, float, str)))
+
+    if isinstance(position, tuple) and len(position) == 2:
+        if filename is None:
+            valid = json_shape(position) or sqlite_shape(position)
+        elif _use_sqlite() and filename in sqlite_backend.TABLES:
+            valid = sqlite_shape(position)
+        else:
+            valid = json_shape(position)
+        if valid:
+            return position
+    raise ValueError(f"Invalid cursor position: {position!r}")
+
+
+def query_page(filename, sort=None, descending=False, q=None, search=(), page=1, per_page=50, after=None):
+    """
+    One page of a collection, sorted and filtered, without handing the whole
+    collection to the caller.
+
+    sort: field to order by (ties in storage order); descending reverses it.
+    q: case-insensitive substring searched in the search fields (all fields
+    when search is empty).
+    after: cursor of the previous page's last row (result['next']). Keyset
+    pagination: the page starts right after that row with a binary search, so
+    deep pages cost the same as the first. Without after, page selects the
+    page by offset (free without q; with q the skipped matches are scanned).
+
+    Returns {'items': [copies], 'page', 'per_page', 'total' (None when q is
+    set, to avoid a full scan), 'next' (cursor or None)}.
+    Field names must come from code (the sqlite backend interpolates them).
+    """
+    page, per_page = max(1, int(page)), max(1, int(per_page))
+    if after is not None:
+        after = _check_cursor(after, filename) if isinstance(after, tuple) else decode_cursor(after, filename)
+    if _use_sqlite() and filename in sqlite_backend.TABLES:
+        result = sqlite_backend.query_page(_db_path(), filename, sort, descending, q, search,
+                                           (page - 1) * per_page, per_page, after)
+    elif _use_sqlite():
+        result = _query_rows(filename, sqlite_backend.load(_db_path(), filename), sort, descending, q, search,
+                             (page - 1) * per_page, per_page, after)
+    else:
+        result = _query_rows(filename, _load_cached(filename), sort, descending, q, search,
+                             (page - 1) * per_page, per_page, after)
+    items, total, last = result
+    return {
+        'items': items,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'next': encode_cursor(last) if last is not None else None,
+    }
+
+
+def _query_rows(filename, rows, sort, descending, q, search, offset, limit, after):
+    """
+    Page over in-memory rows. Returns (items, total or None, cursor of the last
+    item when there is a next page, else None).
+    """
+    order = _sorted_order(filename, rows, sort)
+    if after is not None:
+        if descending:
+            start, step, stop = bisect.bisect_left(order, after) - 1, -1, -1
+        else:
+            start, step, stop = bisect.bisect_right(order, after), 1, len(order)
+        offset = 0
+    else:
+        start, step, stop = (len(order) - 1, -1, -1) if descending else (0, 1, len(order))
+
+    needle = q.strip().casefold() if q and q.strip() else None
+    if needle is None:
+        # Offset over the sorted order: a slice, no scan
+        start += offset * step
+        offset = 0
+
+    items, previous, last = [], None, None
+    for position in range(start, stop, step):
+        row = rows[order[position][1]]
+        if needle is not None and not (isinstance(row, dict) and _matches(row, needle, search)):
+            continue
+        if offset:
+            offset -= 1
+            continue
+        if len(items) == limit:
+            # There is a next page: it starts after the last row handed out
+            last = previous
+            break
+        items.append(dict(row) if isinstance(row, dict) else row)
+        previous = order[position]
+    return items, (len(rows) if needle is None else None), last
+
+
+def data_version(filename):
+    """
+    Opaque token that changes whenever the collection changes (any writer,
+    any process). Lets callers keep derived data (indexes, reports) and
+    rebuild it only when the token differs. Costs a few stat() calls.
+    """
+    if _use_sqlite():
+        return sqlite_backend.version(_db_path(), filename)
+
+    names = [filename]
+    if filename in PARTITIONED_FILES:
+        names += [_segment_name(filename, key) for key in _segment_keys(filename)]
+    version = []
+    for name in names:
+        for path in (os.path.join(DATA_DIR, name), _log_path(name)):
+            try:
+                version.append((path, _signature(path)))
+            except OSError:
+                pass
+    return tuple(version)
+
+
+def invalidate_cache(filename=None):
+    """
+    Drops the cached copy of filename (or of every file when None).
+    """
+    with _cache_lock:
+        if filename is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.join(DATA_DIR, filename), None)
+            _cache.pop(_log_path(filename), None)
+            _cache.pop(('combined', filename), None)
+            _cache.pop(('partitioned', filename), None)
+            sources = (os.path.join(DATA_DIR, filename), _log_path(filename))
+            for key in [k for k in _cache if isinstance(k, tuple) and k[0] == 'index' and k[1] in sources]:
+                del _cache[key]
+
+
+def cache_stats():
+    """
+    Returns the read cache counters: hits, misses and cached files.
+    """
+    with _cache_lock:
+        return {
+            'hits': _cache_stats['hits'],
+            'misses': _cache_stats['misses'],
+            'entries': len(_cache)
+        }
+
+
+def reset_cache_stats():
+    """
+    Zeroes the hit/miss counters (the cached data is kept).
+    """
+    with _cache_lock:
+        _cache_stats['hits'] = 0
+        _cache_stats['misses'] = 0
+
+
+def _count_io(read=0, written=0):
+    _io.read += read
+    _io.written += written
+
+
+def io_counters():
+    """
+    Bytes the calling thread has read from and written to collection files
+    so far, as (read, written). Cache hits read nothing. Take the difference
+    of two calls to measure a piece of work (the sqlite backend is not counted).
+    """
+    return _io.read, _io.written
+
+
 def save_data(filename, data):
     """
     Saves data to a JSON file.
+    The file is replaced atomically (temp file + rename), so readers never see
+    a half-written collection. For log-backed collections this writes a new
+    snapshot and empties the log.
+    """
+    if _use_sqlite():
+        return _sqlite_write(sqlite_backend.save, filename, data)
+
+    try:
+        with file_lock(filename):
+            _save_locked(filename, data)
+        return True
+    except (IOError, OSError) as e:
+        print(f"Erro ao salvar {filename}: {e}")
+        return False
+
+
+def _save_locked(filename, data):
+    if filename in PARTITIONED_FILES and isinstance(data, list):
+        _save_partitioned(filename, data)
+    else:
+        _save_locked_file(filename, data)
+
+
+def _save_partitioned(filename, data):
     """
-    filepath = os.path.join(DATA_DIR, filename)
+    Rewrites the base file and every segment; segments left without records are removed.
+    """
+    groups = _split_partitions(filename, data)
+    stale = {_segment_name(filename, key) for key in _segment_keys(filename)} - set(groups)
+    _save_locked_file(filename, groups.pop(filename, []))
+    for segment, rows in groups.items():
+        _save_locked_file(segment, rows)
+    for segment in stale:
+        for path in (_resolve(segment), _log_path(segment)):
+            if os.path.exists(path):
+                os.remove(path)
+        invalidate_cache(segment)
+
+
+def _save_locked_file(filename, data):
+    """
+    Replaces one file; for log-backed collections this also empties the log.
+    """
+    try:
+        atomic_write_json(_resolve(filename), data)
+        if os.path.exists(_log_path(filename)):
+            os.remove(_log_path(filename))
+    finally:
+        invalidate_cache(filename)
+
+
+def _umask():
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+# Read once: os.umask() can only be read by setting it, which is not thread safe
+_UMASK = _umask()
+
+
+def set_file_mode(fd, filepath):
+    """
+    Gives the open temp file fd the mode filepath has (or, for a new file,
+    the mode open() would create it with), so replacing filepath with it
+    keeps its permissions. mkstemp() alone creates temp files as 0600.
+    """
+    if not hasattr(os, 'fchmod'):
+        return
+    try:
+        mode = os.stat(filepath).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.fchmod(fd, mode)
+
+
+def atomic_write_json(filepath, data, indent=4):
+    """
+    Writes data as JSON to filepath through a temp file in the same directory,
+    fsync and os.replace. Either the old or the new content is visible, never a mix.
+    """
+    dirpath = os.path.dirname(filepath) or '.'
+    os.makedirs(dirpath, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirpath, prefix='.' + os.path.basename(filepath) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+            _count_io(written=os.fstat(f.fileno()).st_size)
+            set_file_mode(f.fileno(), filepath)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def insert_unique(filename, record):
+    """
+    Appends record unless the collection already has its primary key
+    (PRIMARY_KEYS) or one of its unique fields (UNIQUE_KEYS). Check and append
+    happen under the file lock, so two workers can never insert the same key.
+    Returns False on duplicates.
+    """
+    fields = (PRIMARY_KEYS[filename],) + UNIQUE_KEYS.get(filename, ())
+    with file_lock(filename):
+        for field in fields:
+            if record.get(field) is not None and get_by_key(filename, field, record.get(field)) is not None:
+                return False
+        return append_data(filename, record)
+
+
+def extend_unique(filename, records):
+    """
+    Batch insert_unique: under one file lock, appends in a single write the
+    records whose primary key and unique fields are neither in the
+    collection nor in an earlier record of the batch.
+    Returns (ok, rejected): ok is False when the write failed, rejected
+    lists (record, field that clashed) for the records left out.
+    """
+    fields = (PRIMARY_KEYS[filename],) + UNIQUE_KEYS.get(filename, ())
+    with file_lock(filename):
+        seen = {field: set() for field in fields}
+        accepted, rejected = [], []
+        for record in records:
+            keys = {field: _key(record.get(field), field) for field in fields if record.get(field) is not None}
+            clash = next((field for field, key in keys.items()
+                          if key in seen[field] or get_by_key(filename, field, record.get(field)) is not None), None)
+            if clash is not None:
+                rejected.append((record, clash))
+                continue
+            for field, key in keys.items():
+                seen[field].add(key)
+            accepted.append(record)
+        ok = extend_data(filename, accepted) if accepted else True
+    return ok, rejected
+
+
+def update_by_key(filename, value, changes):
+    """
+    Applies the field changes to the record whose primary key is value and
+    returns a copy of the updated record, or None when there is no such record.
+    Log-backed collections only append one change entry to the log.
+    Raises ValueError if the primary key would change or a unique field would clash.
+    """
+    field = PRIMARY_KEYS[filename]
+    if _use_sqlite():
+        return sqlite_backend.update_by_key(_db_path(), filename, field, value, changes, UNIQUE_KEYS.get(filename, ()))
+
+    with file_lock(filename):
+        current = get_by_key(filename, field, value)
+        if current is None:
+            return None
+        record = dict(current, **changes)
+        if _key(record.get(field), field) != _key(current.get(field), field):
+            raise ValueError(f"{field} cannot be changed")
+        for unique in UNIQUE_KEYS.get(filename, ()):
+            if unique in changes and _key(changes[unique], unique) != _key(current.get(unique), unique):
+                if get_by_key(filename, unique, changes[unique]) is not None:
+                    raise ValueError(f"Duplicate {unique}: {changes[unique]}")
+        _write_change(filename, field, {_OP: 'set', 'key': _key(value, field), 'record': record})
+    return dict(record)
+
+
+def delete_by_key(filename, value):
+    """
+    Removes the record whose primary key is value. Returns False when there is
+    no such record. Log-backed collections only append one change entry to the log.
+    """
+    field = PRIMARY_KEYS[filename]
+    if _use_sqlite():
+        return sqlite_backend.delete_by_key(_db_path(), filename, field, value)
+
+    with file_lock(filename):
+        if get_by_key(filename, field, value) is None:
+            return False
+        _write_change(filename, field, {_OP: 'del', 'key': _key(value, field)})
+    return True
+
+
+def _write_change(filename, field, entry):
+    if _is_log_backed(filename):
+        _append_locked(filename, [entry])
+        return
+
+    data = load_data(filename)
+    wanted = entry['key']
+    for i, row in enumerate(data):
+        if isinstance(row, dict) and _key(row.get(field), field) == wanted:
+            if entry[_OP] == 'del':
+                del data[i]
+            else:
+                data[i] = entry['record']
+            break
+    _save_locked(filename, data)
+
+
+def next_sequence(name, count=1, recover=None):
+    """
+    Reserves count consecutive values of the persisted counter name and
+    returns the first one. The read-increment-write runs under the lock of
+    SEQUENCES_FILE, so two workers never get the same value, and it costs the
+    same whatever the size of the collection the counter numbers.
+
+    When the counter does not exist yet, recover() gives the last value already
+    in use (e.g. by scanning the collection once). It runs before the lock is
+    taken, so it may read other collections without lock-order deadlocks.
+    """
+    counters = load_data(SEQUENCES_FILE)
+    recovered = None
+    if recover is not None and not (isinstance(counters, dict) and name in counters):
+        recovered = recover()
+
+    with file_lock(SEQUENCES_FILE):
+        counters = load_data(SEQUENCES_FILE)
+        if not isinstance(counters, dict):
+            counters = {}
+        last = counters.get(name)
+        if last is None:
+            last = recovered or 0
+        counters[name] = last + count
+        if not save_data(SEQUENCES_FILE, counters):
+            raise IOError(f"Could not persist sequence {name!r}")
+    return last + 1
+
+
+def append_data(filename, record):
+    """
+    Adds one record to a collection.
+    Log-backed collections only append a line to the log (O(1) I/O);
+    other collections fall back to load + append + save under the lock.
+    """
+    return extend_data(filename, [record])
+
+
+class _PendingAppend:
+    """
+    One caller's records waiting in the group-commit queue.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.done = False
+        self.ok = False
+
+
+def extend_data(filename, records):
+    """
+    Adds several records to a collection.
+
+    Appends are group-committed: concurrent callers in this process queue
+    their records, and whichever thread takes the file lock first writes the
+    whole queue with a single write + fsync for everybody.
+    """
+    records = list(records)
+    if _use_sqlite():
+        return _sqlite_write(sqlite_backend.extend, filename, records)
+
+    pending = _PendingAppend(records)
+    with _pending_lock:
+        _pending.setdefault(filename, []).append(pending)
+
+    with _thread_lock(_resolve(filename)):
+        if not pending.done:
+            with _pending_lock:
+                batch = _pending.pop(filename, [])
+            ok = _commit_batch(filename, [r for p in batch for r in p.records])
+            for p in batch:
+                p.ok = ok
+                p.done = True
+    return pending.ok
+
+
+def _commit_batch(filename, records):
+    try:
+        with file_lock(filename):
+            if filename not in PARTITIONED_FILES:
+                _append_locked(filename, records)
+            else:
+                for target, rows in _split_partitions(filename, records).items():
+                    _append_locked(target, rows)
+        return True
+    except (IOError, OSError) as e:
+        print(f"Erro ao salvar {filename}: {e}")
+        return False
+
+
+def _append_locked(filename, records):
+    if not _is_log_backed(filename):
+        data = load_data(filename)
+        data.extend(records)
+        _save_locked(filename, data)
+        return
+
+    os.makedirs(os.path.dirname(_log_path(filename)), exist_ok=True)
+    lines = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+    with open(_log_path(filename), 'a+b') as f:
+        # Starts on a fresh line if a previous append was cut short
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                lines = b'\n' + lines
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+    _count_io(written=len(lines))
+    if os.path.getsize(_log_path(filename)) >= COMPACT_THRESHOLD:
+        _compact(filename)
+
+
+def compact(filename):
+    """
+    Folds the append-only log of a collection into its snapshot
+    (for partitioned collections, the log of every segment).
+    """
+    if _use_sqlite() or not _is_log_backed(filename):
+        return False
+    with file_lock(filename):
+        _compact(filename)
+        if filename in PARTITIONED_FILES:
+            for key in _segment_keys(filename):
+                _compact(_segment_name(filename, key))
+    return True
+
+
+def _compact(filename):
+    data = _load_log_backed(filename)
+    _save_locked_file(filename, list(data))
+    return True
+
+
+def _sqlite_write(operation, filename, data):
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        operation(_db_path(), filename, data)
         return True
-    except IOError as e:
+    except sqlite3.Error as e:
         print(f"Erro ao salvar {filename}: {e}")
         return False
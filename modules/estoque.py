@@ -7,6 +7,10 @@
 
 import json
 import os
+import re
+import bisect
+import threading
+import unicodedata
 
 try:
     from modules import data_manager
@@ -15,20 +19,23 @@ except ImportError:
 
 FILE_NAME = 'produtos.json'
 
+# Pesos da busca: em qual campo o termo apareceu
+PESOS_CAMPOS = {"codigo": 5, "nome": 3, "fornecedor": 1}
+# Termo igual ao token vale mais que termo como prefixo do token
+PESO_EXATO = 3
+PESO_PREFIXO = 1
+
+# Índice invertido da busca (token -> {código: peso}), montado na primeira
+# pesquisa e refeito só quando produtos.json muda por fora de cadastrar_produto
+_indice = {"versao": None, "postings": {}, "tokens": [], "produtos": {}}
+_indice_lock = threading.Lock()
+
 def cadastrar_produto(codigo, nome, data_fab, fornecedor, quantidade, valor_compra):
     """
     Cadastra um novo produto no sistema.
     Argumentos recebidos do main.py.
     """
     print(f"\n--- Processando Cadastro: {nome} ---")
-    
-    produtos = data_manager.load_data(FILE_NAME)
-    
-    # Verifica duplicidade por código
-    for p in produtos:
-        if str(p['codigo']) == str(codigo):
-            print(f"Erro: Produto com código {codigo} já existe!")
-            return False
 
     novo_produto = {
         "codigo": codigo,
@@ -41,30 +48,117 @@ def cadastrar_produto(codigo, nome, data_fab, fornecedor, quantidade, valor_comp
         "valor_total": quantidade * valor_compra
     }
     
-    produtos.append(novo_produto)
-    
-    if data_manager.save_data(FILE_NAME, produtos):
-        print("Produto cadastrado com sucesso!")
-        return True
-    else:
-        print("Erro ao salvar produto.")
+    # Verifica duplicidade pelo índice de código (O(1)) e grava na mesma operação
+    if data_manager.get_by_key(FILE_NAME, 'codigo', codigo) is not None:
+        print(f"Erro: Produto com código {codigo} já existe!")
         return False
+    
+    with data_manager.file_lock(FILE_NAME):
+        versao_anterior = data_manager.data_version(FILE_NAME)
+        if not data_manager.insert_unique(FILE_NAME, novo_produto):
+            print("Erro ao salvar produto.")
+            return False
+        # Atualiza o índice de busca só com o produto novo
+        _indexar_novo(novo_produto, versao_anterior)
+    
+    print("Produto cadastrado com sucesso!")
+    return True
 
-def pesquisar_produto(termo):
+def _normalizar(texto):
     """
-    Pesquisa produtos por nome ou código.
-    Retorna uma lista de dicionários encontrados.
+    Minúsculas e sem acentos: "Câmbio" -> "cambio".
     """
-    produtos = data_manager.load_data(FILE_NAME)
-    resultados = []
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+def _tokens(texto):
+    return re.findall(r"\w+", _normalizar(texto))
+
+def _adicionar_ao_indice(indice, produto):
+    chave = str(produto.get("codigo", "")).strip()
+    if chave in indice["produtos"]:
+        return
+    indice["produtos"][chave] = produto
     
-    termo = str(termo).lower()
+    for campo, peso in PESOS_CAMPOS.items():
+        for token in _tokens(produto.get(campo, "")):
+            postings = indice["postings"].get(token)
+            if postings is None:
+                postings = indice["postings"][token] = {}
+                bisect.insort(indice["tokens"], token)
+            postings[chave] = max(postings.get(chave, 0), peso)
+
+def _obter_indice():
+    """
+    Retorna o índice de busca, reconstruindo-o se produtos.json mudou.
+    """
+    versao = data_manager.data_version(FILE_NAME)
+    with _indice_lock:
+        if _indice["versao"] == versao:
+            return _indice
+    
+    # Monta fora da trava: a leitura do arquivo pode esperar um cadastro em andamento
+    novo = {"versao": versao, "postings": {}, "tokens": [], "produtos": {}}
+    for produto in data_manager.load_view(FILE_NAME):
+        _adicionar_ao_indice(novo, dict(produto))
+    
+    with _indice_lock:
+        _indice.update(novo)
+    return _indice
+
+def _indexar_novo(produto, versao_anterior):
+    """
+    Inclusão incremental: se o índice refletia o arquivo antes do cadastro,
+    basta indexar o produto novo. Caso contrário fica para a reconstrução.
+    """
+    with _indice_lock:
+        if _indice["versao"] is not None and _indice["versao"] == versao_anterior:
+            _adicionar_ao_indice(_indice, dict(produto))
+            _indice["versao"] = data_manager.data_version(FILE_NAME)
+
+def pesquisar_produto(termo, limite=20):
+    """
+    Pesquisa produtos por código, nome ou fornecedor no índice invertido.
+    Cada palavra do termo casa com palavras inteiras ou com o início delas
+    ("cam" encontra "Câmbio"), sem diferenciar acentos e maiúsculas.
+    Todas as palavras do termo precisam aparecer no produto.
+    
+    Args:
+        termo (str): Texto pesquisado
+        limite (int): Máximo de resultados (None para todos)
+        
+    Returns:
+        list: Produtos encontrados, do mais relevante para o menos relevante
+    """
+    palavras = _tokens(termo)
+    if not palavras:
+        return []
     
-    for p in produtos:
-        if termo in str(p['codigo']).lower() or termo in p['nome'].lower():
-            resultados.append(p)
+    indice = _obter_indice()
+    with _indice_lock:
+        pontuacao = None
+        for palavra in palavras:
+            encontrados = {}
+            # Tokens com este prefixo ficam contíguos na lista ordenada
+            tokens = indice["tokens"]
+            i = bisect.bisect_left(tokens, palavra)
+            while i < len(tokens) and tokens[i].startswith(palavra):
+                bonus = PESO_EXATO if tokens[i] == palavra else PESO_PREFIXO
+                for chave, peso in indice["postings"][tokens[i]].items():
+                    encontrados[chave] = max(encontrados.get(chave, 0), peso * bonus)
+                i += 1
             
-    return resultados
+            if pontuacao is None:
+                pontuacao = encontrados
+            else:
+                pontuacao = {c: p + encontrados[c] for c, p in pontuacao.items() if c in encontrados}
+            if not pontuacao:
+                return []
+        
+        ranking = sorted(pontuacao.items(), key=lambda item: (-item[1], _normalizar(indice["produtos"][item[0]].get("nome", ""))))
+        if limite is not None:
+            ranking = ranking[:limite]
+        return [dict(indice["produtos"][chave]) for chave, _ in ranking]
 
 def calcular_custos(produtos=None):
     """
@@ -2,6 +2,12 @@
 # Módulo: Financeiro
 # Descrição: 
 
+import csv
+import html
+import io
+import json
+import threading
+
 # Importa o módulo de gerenciamento de dados (para salvar/carregar arquivos JSON)
 try:
     from modules import data_manager  # Tenta importar quando executado como módulo
@@ -20,6 +26,12 @@ try:
 except ImportError:
     import estoque
 
+# Importa módulo Operacional para o total produzido (rollup de produção)
+try:
+    from modules import operacional
+except ImportError:
+    import operacional
+
 # ============================================================================
 # FUNÇÕES PARA CÁLCULO DE UTILIDADES DA FÁBRICA (24/7, 30 DIAS)
 # ============================================================================
@@ -140,52 +152,31 @@ def calcular_salarios_fabrica(horas_normais=176, horas_extras=10):
             'detalhes': []
         }
     
+    # USA A FOLHA EM LOTE DO RH.PY (mesmos valores das funções individuais):
+    # salário bruto, horas extras (gerentes/diretores não recebem), IRPF e líquido
+    # calculados para todos os funcionários em uma única passada
+    lote = rh.calcular_folha_lote(funcionarios, horas_trabalhadas=horas_normais, horas_extras=horas_extras)
+    
     # Lista para armazenar detalhes de cada funcionário
     detalhes_funcionarios = []
-    custo_total_bruto = 0
-    custo_total_liquido = 0
-    total_irpf = 0
-    
-    # Calcula o salário de cada funcionário usando funções do RH
-    for func in funcionarios:
-        nome = func.get('nome', 'Sem nome')
-        valor_hora = func.get('valor_hora', 0)
-        cargo = func.get('cargo', 'Sem cargo')
-        
-        # USA AS FUNÇÕES DO RH.PY para calcular salários
-        # 1. Calcula salário bruto (horas normais × valor/hora)
-        salario_bruto = rh.calcular_salario_bruto(horas_normais, valor_hora)
-        
-        # 2. Calcula valor das horas extras (gerentes/diretores não recebem)
-        valor_horas_extras = rh.calcular_horas_extras(horas_extras, valor_hora, cargo)
-        
-        # 3. Salário total bruto (normal + extras)
-        salario_total_bruto = salario_bruto + valor_horas_extras
-        
-        # 4. Calcula IRPF sobre o salário bruto total
-        irpf = rh.calcular_irpf(salario_total_bruto)
-        
-        # 5. Calcula salário líquido (bruto - IRPF)
-        salario_liquido = rh.calcular_liquido(salario_total_bruto, irpf)
-        
-        # Adiciona aos detalhes
+    for i, func in enumerate(funcionarios):
         detalhes_funcionarios.append({
-            'nome': nome,
-            'cargo': cargo,
-            'valor_hora': valor_hora,
+            'nome': func.get('nome', 'Sem nome'),
+            'cargo': func.get('cargo', 'Sem cargo'),
+            'valor_hora': func.get('valor_hora', 0),
             'horas_normais': horas_normais,
             'horas_extras': horas_extras,
-            'salario_bruto': salario_bruto,
-            'valor_horas_extras': valor_horas_extras,
-            'salario_total_bruto': salario_total_bruto,
-            'irpf': irpf,
-            'salario_liquido': salario_liquido
+            'salario_bruto': lote['bruto'][i],
+            'valor_horas_extras': lote['extra'][i],
+            'salario_total_bruto': lote['total_bruto'][i],
+            'irpf': lote['irpf'][i],
+            'salario_liquido': lote['liquido'][i]
         })
-        
-        # Soma aos totais
-        custo_total_bruto += salario_total_bruto
-        custo_total_liquido += salario_liquido
-        total_irpf += irpf
+    
+    # Soma aos totais
+    custo_total_bruto = sum(lote['total_bruto'])
+    custo_total_liquido = sum(lote['liquido'])
+    total_irpf = sum(lote['irpf'])
     
     return {
         'tipo': 'Salários',
@@ -199,130 +190,299 @@ def calcular_salarios_fabrica(horas_normais=176, horas_extras=10):
     }
 
 
-def gerar_relatorio_fabrica(dias_trabalhados=30):
+# ============================================================================
+# GRAFO DE CÁLCULO (CACHE POR VERSÃO DOS DADOS)
+# ============================================================================
+# Cada nó guarda o último resultado junto com a versão das coleções de que
+# depende (data_manager.data_version). Enquanto nenhuma delas mudar, o nó
+# devolve o valor guardado; quando uma muda, só os nós que dependem dela
+# são recalculados. Os valores são compartilhados: use apenas para leitura.
+
+def _no_custo_estoque():
+    # Mesmo comportamento de antes: se o cálculo do estoque falhar, custo zero
+    try:
+        return estoque.calcular_custos()['total_atual']
+    except Exception:
+        return 0.0
+
+
+def _no_indicadores():
+    return _calcular_indicadores(
+        obter_no('agua'), obter_no('energia'), obter_no('salarios'),
+        obter_no('custo_estoque'), obter_no('total_produzido')
+    )
+
+
+def _no_relatorio_fabrica():
+    return _montar_relatorio(30)
+
+
+# nó -> (coleções de que depende, função que calcula o nó)
+NOS_FINANCEIROS = {
+    'agua': (('funcionarios.json',), calcular_custo_agua_fabrica),
+    'energia': (('funcionarios.json',), calcular_custo_luz_fabrica),
+    'salarios': (('funcionarios.json', rh.CARGOS_FILE, rh.irpf.FILE_NAME), calcular_salarios_fabrica),
+    'custo_estoque': (('produtos.json',), _no_custo_estoque),
+    'total_produzido': (('producao.json',), operacional.total_produzido),
+    'relatorio_fabrica': (('funcionarios.json', rh.CARGOS_FILE, rh.irpf.FILE_NAME), _no_relatorio_fabrica),
+    'indicadores': (('funcionarios.json', rh.CARGOS_FILE, rh.irpf.FILE_NAME, 'produtos.json', 'producao.json'),
+                    _no_indicadores),
+}
+
+_nos = {}  # nó -> (versão das dependências, valor)
+_nos_lock = threading.Lock()
+_nos_stats = {'calculos': 0, 'acertos': 0}
+
+
+def obter_no(nome):
     """
-    Gera um relatório completo e formatado dos custos de água e energia.
-    
-    Mostra:
-    - Informações gerais (funcionários, dias, horas)
-    - Detalhamento do custo de água
-    - Detalhamento do custo de energia (gerador + rede)
-    - Resumo total mensal
+    Valor de um nó do grafo financeiro, recalculado só quando alguma das
+    coleções de que ele depende mudou desde o último cálculo.
     """
-    # Imprime o cabeçalho do relatório
-    print("\n" + "="*80)
-    print("RELATÓRIO DE CUSTOS DE UTILIDADES - FÁBRICA 24/7".center(80))
-    print("="*80)
-    
-    # Carrega os funcionários cadastrados
-    funcionarios = data_manager.load_data('funcionarios.json')
+    colecoes, calcular = NOS_FINANCEIROS[nome]
+    # A versão é lida antes do cálculo: se os dados mudarem no meio, a
+    # próxima chamada vê uma versão diferente e recalcula
+    versao = tuple(data_manager.data_version(c) for c in colecoes)
+    with _nos_lock:
+        entrada = _nos.get(nome)
+        if entrada is not None and entrada[0] == versao:
+            _nos_stats['acertos'] += 1
+            return entrada[1]
+
+    valor = calcular()
+    with _nos_lock:
+        _nos[nome] = (versao, valor)
+        _nos_stats['calculos'] += 1
+    return valor
+
+
+def invalidar_nos(nome=None):
+    """Descarta o valor guardado de um nó (ou de todos)."""
+    with _nos_lock:
+        if nome is None:
+            _nos.clear()
+        else:
+            _nos.pop(nome, None)
+
+
+def estatisticas_nos():
+    """Quantos nós foram calculados e quantos vieram do cache."""
+    with _nos_lock:
+        return dict(_nos_stats)
+
+
+# ============================================================================
+# RELATÓRIO DA FÁBRICA: DADOS + RENDERIZADORES
+# ============================================================================
+# montar_relatorio_fabrica() só calcula (nada de print): é o que as telas web
+# usam. O texto do console, o fragmento HTML, o JSON e o CSV são gerados a
+# partir desse dicionário pelos renderizadores em RENDERIZADORES.
+
+def montar_relatorio_fabrica(dias_trabalhados=30):
+    """
+    Monta os dados do relatório de custos da fábrica, sem imprimir nada.
     
-    # Se não há funcionários, exibe aviso e sai
-    if not funcionarios:
-        print("\n⚠ ATENÇÃO: Nenhum funcionário cadastrado!")
-        print("Cadastre funcionários no módulo RH primeiro.")
-        print("="*80)
+    Retorna None se não há funcionários cadastrados; senão um dicionário com
+    'agua', 'energia', 'salarios', 'total', 'dias_trabalhados',
+    'distribuicao' (percentual de cada custo), 'maior_despesa' e
+    'custo_medio_funcionario'. No mês padrão (30 dias) vem do grafo de cálculo.
+    """
+    if dias_trabalhados == 30:
+        return obter_no('relatorio_fabrica')
+    return _montar_relatorio(dias_trabalhados)
+
+
+def _montar_relatorio(dias_trabalhados=30):
+    # Calcula os custos de água, energia e salários (do grafo no mês padrão)
+    if dias_trabalhados == 30:
+        agua = obter_no('agua')
+        energia = obter_no('energia')
+    else:
+        agua = calcular_custo_agua_fabrica(dias_trabalhados)
+        energia = calcular_custo_luz_fabrica(dias_trabalhados)
+
+    # Sem funcionários não há relatório
+    if agua['qtd_funcionarios'] == 0:
         return None
-    
-    # Calcula os custos de água, energia e salários
-    agua = calcular_custo_agua_fabrica(dias_trabalhados)
-    energia = calcular_custo_luz_fabrica(dias_trabalhados)
-    salarios = calcular_salarios_fabrica()
+
+    salarios = obter_no('salarios')
+
+    # Soma água + energia + salários brutos (custo empresa)
+    total = agua['custo_total'] + energia['custo_total'] + salarios['custo_total_bruto']
+
+    custos = {
+        "Salários": salarios['custo_total_bruto'],
+        "Energia": energia['custo_total'],
+        "Água": agua['custo_total']
+    }
+    distribuicao = {}
+    maior_despesa = None
+    if total > 0:
+        distribuicao = {nome: (valor / total) * 100 for nome, valor in custos.items()}
+        nome = max(custos, key=custos.get)
+        maior_despesa = {'nome': nome, 'valor': custos[nome]}
+
+    return {
+        'dias_trabalhados': dias_trabalhados,
+        'agua': agua,
+        'energia': energia,
+        'salarios': salarios,
+        'total': total,
+        'distribuicao': distribuicao,
+        'maior_despesa': maior_despesa,
+        'custo_medio_funcionario': total / agua['qtd_funcionarios'],
+    }
+
+
+def renderizar_console(relatorio):
+    """Texto do relatório para o terminal (o mesmo layout de sempre)."""
+    linhas = ["", "="*80, "RELATÓRIO DE CUSTOS DE UTILIDADES - FÁBRICA 24/7".center(80), "="*80]
+
+    if relatorio is None:
+        linhas += ["", "⚠ ATENÇÃO: Nenhum funcionário cadastrado!",
+                   "Cadastre funcionários no módulo RH primeiro.", "="*80]
+        return "\n".join(linhas)
+
+    agua = relatorio['agua']
+    energia = relatorio['energia']
+    salarios = relatorio['salarios']
+    dias = relatorio['dias_trabalhados']
+    total = relatorio['total']
 
     # ========== SEÇÃO 1: INFORMAÇÕES GERAIS ==========
-    print(f"\n📊 INFORMAÇÕES GERAIS")
-    print("-"*80)
-    print(f"Funcionários: {agua['qtd_funcionarios']}")  # Quantidade de funcionários
-    print(f"Dias/mês: {dias_trabalhados}")              # Dias trabalhados no mês
-    print(f"Operação: 24h/dia")                         # Fábrica funciona 24h
-    print(f"Total horas/mês: {agua['total_horas']}h")   # Total de horas (24 × 30 = 720)
-    
+    linhas += ["", "📊 INFORMAÇÕES GERAIS", "-"*80,
+               f"Funcionários: {agua['qtd_funcionarios']}",
+               f"Dias/mês: {dias}",
+               "Operação: 24h/dia",
+               f"Total horas/mês: {agua['total_horas']}h"]
+
     # ========== SEÇÃO 2: CUSTO DE ÁGUA ==========
-    print(f"\n💧 ÁGUA")
-    print("-"*80)
-    # Mostra a fórmula do cálculo
-    print(f"R$ {agua['custo_por_hora']:.2f}/h × {agua['total_horas']}h × {agua['qtd_funcionarios']} funcionários")
-    # Mostra o resultado
-    print(f"💰 Total: R$ {agua['custo_total']:.2f}")
-    
+    linhas += ["", "💧 ÁGUA", "-"*80,
+               f"R$ {agua['custo_por_hora']:.2f}/h × {agua['total_horas']}h × {agua['qtd_funcionarios']} funcionários",
+               f"💰 Total: R$ {agua['custo_total']:.2f}"]
+
     # ========== SEÇÃO 3: CUSTO DE ENERGIA ==========
-    print(f"\n⚡ ENERGIA")
-    print("-"*80)
-    
-    # Custo do gerador (8 horas por dia)
-    print(f"🔋 Gerador (8h/dia): {8 * dias_trabalhados}h × {agua['qtd_funcionarios']} × R$ 1.60 = R$ {energia['custo_gerador']:.2f}")
-    
-    # Custo da rede elétrica (16 horas por dia)
-    print(f"🔌 Rede (16h/dia): {16 * dias_trabalhados}h × {agua['qtd_funcionarios']} × R$ 2.40 = R$ {energia['custo_rede']:.2f}")
-    
-    # Total de energia (gerador + rede)
-    print(f"💰 Total: R$ {energia['custo_total']:.2f}")
+    linhas += ["", "⚡ ENERGIA", "-"*80,
+               f"🔋 Gerador (8h/dia): {8 * dias}h × {agua['qtd_funcionarios']} × R$ 1.60 = R$ {energia['custo_gerador']:.2f}",
+               f"🔌 Rede (16h/dia): {16 * dias}h × {agua['qtd_funcionarios']} × R$ 2.40 = R$ {energia['custo_rede']:.2f}",
+               f"💰 Total: R$ {energia['custo_total']:.2f}"]
 
     # ========== SEÇÃO 4: SALÁRIOS ==========
-    print(f"\n💵 SALÁRIOS")
-    print("-"*80)
-    print(f"Horas normais: {salarios['horas_normais']}h/mês")
-    print(f"Horas extras: {salarios['horas_extras']}h/mês")
-    print()
-    
-    if salarios['qtd_funcionarios'] > 0:
-        for detalhe in salarios['detalhes']:
-            print(f"👤 {detalhe['nome']} - {detalhe['cargo']}")
-            print(f"   Salário Base: R$ {detalhe['salario_bruto']:.2f}")
-            print(f"   Extras: R$ {detalhe['valor_horas_extras']:.2f}")
-            print(f"   IRPF: -R$ {detalhe['irpf']:.2f}")
-            print(f"   💰 Líquido: R$ {detalhe['salario_liquido']:.2f}")
-            print()
-
-    print(f"💰 Total Salários (Bruto): R$ {salarios['custo_total_bruto']:.2f}")
-    print(f"💰 Total Salários (Líquido): R$ {salarios['custo_total_liquido']:.2f}")
-    
+    linhas += ["", "💵 SALÁRIOS", "-"*80,
+               f"Horas normais: {salarios['horas_normais']}h/mês",
+               f"Horas extras: {salarios['horas_extras']}h/mês",
+               ""]
+    for detalhe in salarios['detalhes']:
+        linhas += [f"👤 {detalhe['nome']} - {detalhe['cargo']}",
+                   f"   Salário Base: R$ {detalhe['salario_bruto']:.2f}",
+                   f"   Extras: R$ {detalhe['valor_horas_extras']:.2f}",
+                   f"   IRPF: -R$ {detalhe['irpf']:.2f}",
+                   f"   💰 Líquido: R$ {detalhe['salario_liquido']:.2f}",
+                   ""]
+    linhas += [f"💰 Total Salários (Bruto): R$ {salarios['custo_total_bruto']:.2f}",
+               f"💰 Total Salários (Líquido): R$ {salarios['custo_total_liquido']:.2f}"]
+
     # ========== SEÇÃO 5: RESUMO TOTAL ==========
-    total = agua['custo_total'] + energia['custo_total'] + salarios['custo_total_bruto']  # Soma água + energia + salários brutos (custo empresa)
-    print("\n" + "="*80)
-    print("📊 RESUMO MENSAL")
-    print("="*80)
-    print(f"Água:             R$ {agua['custo_total']:>12.2f}")      # Custo de água
-    print(f"Energia:          R$ {energia['custo_total']:>12.2f}")   # Custo de energia
-    print(f"Salários (Bruto): R$ {salarios['custo_total_bruto']:>12.2f}") # Custo salários
-    print("-"*80)
-    print(f"TOTAL:            R$ {total:>12.2f}")                    # Custo total
-    print("="*80)
+    linhas += ["", "="*80, "📊 RESUMO MENSAL", "="*80,
+               f"Água:             R$ {agua['custo_total']:>12.2f}",
+               f"Energia:          R$ {energia['custo_total']:>12.2f}",
+               f"Salários (Bruto): R$ {salarios['custo_total_bruto']:>12.2f}",
+               "-"*80,
+               f"TOTAL:            R$ {total:>12.2f}",
+               "="*80]
 
     # ========== SEÇÃO 6: INSIGHTS E ANÁLISES ==========
-    print(f"\n📈 INSIGHTS E ANÁLISES")
-    print("-"*80)
+    linhas += ["", "📈 INSIGHTS E ANÁLISES", "-"*80]
+    if relatorio['distribuicao']:
+        pct = relatorio['distribuicao']
+        linhas += ["Distribuição de Custos:",
+                   f"  - Salários: {pct['Salários']:>6.1f}%",
+                   f"  - Energia:  {pct['Energia']:>6.1f}%",
+                   f"  - Água:     {pct['Água']:>6.1f}%",
+                   "",
+                   f"Maior Despesa: {relatorio['maior_despesa']['nome']} (R$ {relatorio['maior_despesa']['valor']:.2f})"]
+    linhas += [f"Custo Médio por Funcionário: R$ {relatorio['custo_medio_funcionario']:.2f}", "="*80]
+    return "\n".join(linhas)
+
+
+def renderizar_html(relatorio):
+    """Fragmento HTML (resumo mensal em tabela) para embutir em uma página."""
+    if relatorio is None:
+        return '<p class="text-warning">Nenhum funcionário cadastrado.</p>'
+
+    linhas = ['<table class="table relatorio-fabrica">',
+              '<thead><tr><th>Custo</th><th>Valor (R$)</th><th>%</th></tr></thead>',
+              '<tbody>']
+    custos = (("Água", relatorio['agua']['custo_total']),
+              ("Energia", relatorio['energia']['custo_total']),
+              ("Salários", relatorio['salarios']['custo_total_bruto']))
+    for nome, valor in custos:
+        pct = relatorio['distribuicao'].get(nome, 0.0)
+        linhas.append(f'<tr><td>{html.escape(nome)}</td><td>{valor:.2f}</td><td>{pct:.1f}</td></tr>')
+    linhas += ['</tbody>',
+               f'<tfoot><tr><th>Total</th><th>{relatorio["total"]:.2f}</th><th></th></tr></tfoot>',
+               '</table>']
+    return "\n".join(linhas)
+
+
+def renderizar_json(relatorio):
+    """O relatório inteiro em JSON."""
+    return json.dumps(relatorio, ensure_ascii=False)
+
+
+def renderizar_csv(relatorio):
+    """Uma linha por valor: secao, item, valor (salários detalhados por funcionário)."""
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(["secao", "item", "valor"])
+    if relatorio is not None:
+        escritor.writerow(["agua", "custo_total", f"{relatorio['agua']['custo_total']:.2f}"])
+        escritor.writerow(["energia", "custo_gerador", f"{relatorio['energia']['custo_gerador']:.2f}"])
+        escritor.writerow(["energia", "custo_rede", f"{relatorio['energia']['custo_rede']:.2f}"])
+        escritor.writerow(["energia", "custo_total", f"{relatorio['energia']['custo_total']:.2f}"])
+        for detalhe in relatorio['salarios']['detalhes']:
+            escritor.writerow(["salario_liquido", detalhe['nome'], f"{detalhe['salario_liquido']:.2f}"])
+        escritor.writerow(["salarios", "custo_total_bruto", f"{relatorio['salarios']['custo_total_bruto']:.2f}"])
+        escritor.writerow(["salarios", "custo_total_liquido", f"{relatorio['salarios']['custo_total_liquido']:.2f}"])
+        escritor.writerow(["resumo", "total", f"{relatorio['total']:.2f}"])
+    return saida.getvalue()
+
+
+# formato -> função que transforma o dicionário do relatório em texto
+RENDERIZADORES = {
+    'console': renderizar_console,
+    'html': renderizar_html,
+    'json': renderizar_json,
+    'csv': renderizar_csv,
+}
+
+
+def renderizar_relatorio(relatorio, formato='console'):
+    """Renderiza o relatório no formato pedido (ValueError se desconhecido)."""
+    try:
+        renderizar = RENDERIZADORES[formato]
+    except KeyError:
+        raise ValueError(f"Formato de relatório desconhecido: {formato}") from None
+    return renderizar(relatorio)
+
+
+def gerar_relatorio_fabrica(dias_trabalhados=30):
+    """
+    Gera um relatório completo e formatado dos custos de água e energia
+    e o imprime no terminal (uso do CLI; as telas web usam
+    montar_relatorio_fabrica, que não imprime).
     
-    # 1. Distribuição de Custos
-    if total > 0:
-        pct_agua = (agua['custo_total'] / total) * 100
-        pct_energia = (energia['custo_total'] / total) * 100
-        pct_salarios = (salarios['custo_total_bruto'] / total) * 100
-        
-        print("Distribuição de Custos:")
-        print(f"  - Salários: {pct_salarios:>6.1f}%")
-        print(f"  - Energia:  {pct_energia:>6.1f}%")
-        print(f"  - Água:     {pct_agua:>6.1f}%")
-        
-        # 2. Maior Despesa
-        custos = {
-            "Salários": salarios['custo_total_bruto'],
-            "Energia": energia['custo_total'],
-            "Água": agua['custo_total']
-        }
-        maior_despesa = max(custos, key=custos.get)
-        valor_maior = custos[maior_despesa]
-        print(f"\nMaior Despesa: {maior_despesa} (R$ {valor_maior:.2f})")
-    
-    # 3. Custo Médio por Funcionário
-    if agua['qtd_funcionarios'] > 0:
-        custo_medio = total / agua['qtd_funcionarios']
-        print(f"Custo Médio por Funcionário: R$ {custo_medio:.2f}")
-        
-    print("="*80)
+    Mostra:
+    - Informações gerais (funcionários, dias, horas)
+    - Detalhamento do custo de água
+    - Detalhamento do custo de energia (gerador + rede)
+    - Resumo total mensal
     
-    # Retorna os dados calculados para uso posterior se necessário
-    return {'agua': agua, 'energia': energia, 'salarios': salarios, 'total': total}
+    Retorna os mesmos dados de montar_relatorio_fabrica (None sem funcionários).
+    """
+    relatorio = montar_relatorio_fabrica(dias_trabalhados)
+    print(renderizar_console(relatorio))
+    return relatorio
 
 
 def calcular_indicadores_financeiros():
@@ -335,26 +495,16 @@ def calcular_indicadores_financeiros():
     3. Produção Total: Soma de todos os veículos produzidos (data/producao.json)
     4. Custo Unitário: (Custo Fixo + Custo Estoque) / Total Produzido
     5. Preço de Venda: Custo Unitário + 50% de margem
-    """
-    # 1. Calcular Custo Fixo Total (Fábrica)
-    # Chamamos as funções diretamente para obter os valores sem imprimir o relatório completo
-    agua = calcular_custo_agua_fabrica()
-    energia = calcular_custo_luz_fabrica()
-    salarios = calcular_salarios_fabrica()
     
-    custo_fixo_total = agua['custo_total'] + energia['custo_total'] + salarios['custo_total_bruto']
-    
-    # 2. Calcular Custo de Estoque
-    # Tenta usar a função do módulo estoque
-    try:
-        dados_estoque = estoque.calcular_custos()
-        custo_estoque_total = dados_estoque['total_atual']
-    except Exception:
-        custo_estoque_total = 0.0
+    Vem do grafo de cálculo: só é refeito quando funcionários, cargos,
+    tabelas de IRPF, produtos ou produção mudam.
+    """
+    return obter_no('indicadores')
+
 
-    # 3. Calcular Produção Total
-    producao = data_manager.load_data('producao.json')
-    total_produzido = sum(item['quantidade'] for item in producao) if producao else 0
+def _calcular_indicadores(agua, energia, salarios, custo_estoque_total, total_produzido):
+    # 1. Custo Fixo Total (Fábrica)
+    custo_fixo_total = agua['custo_total'] + energia['custo_total'] + salarios['custo_total_bruto']
     
     # 4. Calcular Custo Unitário
     if total_produzido > 0:
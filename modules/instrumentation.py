@@ -0,0 +1,326 @@
+# Request instrumentation for the Flask app.
+# install(app) records, per endpoint: wall time (latency histogram), the
+# data_manager calls the request made and the time spent in them, and the
+# bytes read from / written to collection files. Module functions passed as
+# timed=[(module, 'name'), ...] get a latency histogram of their own.
+# render_prometheus() writes everything in the Prometheus text format.
+# The cost per request is a few perf_counter() calls and one deque append;
+# set ENABLED = False (or METRICS_ENABLED=0) to turn recording off.
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from flask import request
+
+try:
+    from modules import data_manager
+except ImportError:
+    import data_manager
+
+ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+
+# data_manager entry points counted per request. Only the outermost call is
+# counted (insert_unique -> get_by_key is one insert_unique).
+DATA_FUNCTIONS = (
+    'load_data', 'load_view', 'iter_data', 'load_range', 'get_by_key', 'filter_data',
+    'sum_field', 'count_data', 'query_page',
+    'save_data', 'append_data', 'extend_data', 'insert_unique', 'extend_unique', 'update_by_key', 'delete_by_key',
+)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """
+    Log-linear latency histogram (HDR-style): the range from MIN_SECONDS up
+    is split in powers of two and each power of two in SUB_BUCKETS equal
+    buckets, so a bucket bound is never more than 1/SUB_BUCKETS away from
+    the values it holds, at any magnitude. Fixed size, O(1) record.
+    """
+    MIN_SECONDS = 1e-5
+    OCTAVES = 24            # 10 us .. ~168 s
+    SUB_BUCKETS = 8
+
+    def __init__(self):
+        self.counts = [0] * (1 + self.OCTAVES * self.SUB_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def upper_bound(cls, index):
+        if index == 0:
+            return cls.MIN_SECONDS
+        octave, sub = divmod(index - 1, cls.SUB_BUCKETS)
+        return cls.MIN_SECONDS * 2 ** octave * (1 + (sub + 1) / cls.SUB_BUCKETS)
+
+    def record(self, seconds):
+        if seconds <= self.MIN_SECONDS:
+            index = 0
+        else:
+            mantissa, exponent = math.frexp(seconds / self.MIN_SECONDS)
+            index = 1 + (exponent - 1) * self.SUB_BUCKETS + int((2 * mantissa - 1) * self.SUB_BUCKETS)
+            index = min(index, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-quantile (0 < q <= 1), capped at the max seen."""
+        if not self.count:
+            return 0.0
+        wanted = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= wanted:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self):
+        """(le, cumulative count) at every power-of-two bound, for export."""
+        result, seen = [], 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if index % self.SUB_BUCKETS == 0:
+                result.append((self.upper_bound(index), seen))
+        return result
+
+
+# Requests and function calls only append a tuple to _pending (deque.append
+# is atomic, no lock); the tables below are updated in batches by _drain(),
+# at export time or every DRAIN_EVERY entries, with the code and tables warm.
+DRAIN_EVERY = 1024
+_pending = deque()
+
+# Aggregated metrics, all guarded by _lock
+_lock = threading.Lock()
+_requests = {}      # (endpoint, method) -> Histogram
+_responses = {}     # (endpoint, method, status) -> count
+_data_calls = {}    # (endpoint, function) -> [calls, seconds]
+_io_bytes = {}      # endpoint -> [read, written]
+_functions = {}     # function -> Histogram
+_gauges = []        # (name, help, callable)
+
+class _RequestState(threading.local):
+    # Per-thread state of the request being served (no flask.g: its proxy
+    # lookups cost more than the whole recording)
+    start = None
+    io = (0, 0)
+    data = None     # function -> [calls, seconds] while a request is recorded
+
+
+_local = _RequestState()
+
+
+def _count_data_call(name, function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        calls = _local.data
+        if calls is None:
+            return function(*args, **kwargs)
+        # Nested data_manager calls see no recording and pass straight through
+        _local.data = None
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _local.data = calls
+            entry = calls.get(name)
+            if entry is None:
+                calls[name] = [1, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _time_function(name, function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _pending.append((name, time.perf_counter() - start))
+    wrapper._instrumented = True
+    return wrapper
+
+
+def install(app, timed=()):
+    """
+    Hooks the recording into app and wraps the data_manager entry points
+    and the timed (module, function name) pairs. Safe to call once per app.
+    """
+    for name in DATA_FUNCTIONS:
+        function = getattr(data_manager, name)
+        if not getattr(function, '_instrumented', False):
+            setattr(data_manager, name, _count_data_call(name, function))
+    for module, name in timed:
+        function = getattr(module, name)
+        if not getattr(function, '_instrumented', False):
+            label = f"{module.__name__.rsplit('.', 1)[-1]}.{name}"
+            setattr(module, name, _time_function(label, function))
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+def _before_request():
+    if not ENABLED:
+        return
+    _local.data = {}
+    _local.io = data_manager.io_counters()
+    _local.start = time.perf_counter()
+
+
+def _after_request(response):
+    start = _local.start
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    read, written = data_manager.io_counters()
+    read0, written0 = _local.io
+    calls, _local.data, _local.start = _local.data, None, None
+
+    current = request._get_current_object()
+    _pending.append((current.endpoint or 'unmatched', current.method, response.status_code,
+                     elapsed, calls, read - read0, written - written0))
+    if len(_pending) >= DRAIN_EVERY:
+        _drain()
+    return response
+
+
+def _drain():
+    """Folds the pending entries into the aggregated tables."""
+    with _lock:
+        while _pending:
+            try:
+                entry = _pending.popleft()
+            except IndexError:
+                break
+            if len(entry) == 2:
+                name, elapsed = entry
+                histogram = _functions.get(name)
+                if histogram is None:
+                    histogram = _functions[name] = Histogram()
+                histogram.record(elapsed)
+                continue
+
+            endpoint, method, status, elapsed, calls, read, written = entry
+            histogram = _requests.get((endpoint, method))
+            if histogram is None:
+                histogram = _requests[(endpoint, method)] = Histogram()
+            histogram.record(elapsed)
+            key = (endpoint, method, status)
+            _responses[key] = _responses.get(key, 0) + 1
+            for name, (n, seconds) in calls.items():
+                totals = _data_calls.setdefault((endpoint, name), [0, 0.0])
+                totals[0] += n
+                totals[1] += seconds
+            io = _io_bytes.setdefault(endpoint, [0, 0])
+            io[0] += read
+            io[1] += written
+
+
+def gauge(name, help_text, function):
+    """Registers a gauge read at export time: function() returns a number."""
+    _gauges.append((name, help_text, function))
+
+
+def reset():
+    """Drops everything recorded so far (registered gauges are kept)."""
+    _drain()
+    with _lock:
+        for table in (_requests, _responses, _data_calls, _io_bytes, _functions):
+            table.clear()
+
+
+def snapshot():
+    """Copy of the recorded metrics as plain dicts (tests, debugging)."""
+    _drain()
+    with _lock:
+        return {
+            'requests': {k: (h.count, h.sum, h.percentile(0.99)) for k, h in _requests.items()},
+            'responses': dict(_responses),
+            'data_calls': {k: tuple(v) for k, v in _data_calls.items()},
+            'io_bytes': {k: tuple(v) for k, v in _io_bytes.items()},
+            'functions': {k: (h.count, h.sum, h.percentile(0.99)) for k, h in _functions.items()},
+        }
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _histogram_lines(name, histograms, label_names):
+    lines = []
+    for key, h in sorted(histograms.items()):
+        labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+        for le, n in h.cumulative():
+            lines.append(f'{name}_bucket{_labels(**labels, le=f"{le:.6g}")} {n}')
+        lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {h.count}')
+        lines.append(f'{name}_sum{_labels(**labels)} {h.sum:.9g}')
+        lines.append(f'{name}_count{_labels(**labels)} {h.count}')
+    return lines
+
+
+def _quantile_lines(name, histograms, label_names):
+    lines = []
+    for key, h in sorted(histograms.items()):
+        labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+        for q in (0.5, 0.9, 0.99):
+            lines.append(f'{name}{_labels(**labels, quantile=q)} {h.percentile(q):.9g}')
+    return lines
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    out = []
+
+    def family(name, kind, help_text, lines):
+        out.append(f'# HELP {name} {help_text}')
+        out.append(f'# TYPE {name} {kind}')
+        out.extend(lines)
+
+    _drain()
+    with _lock:
+        family('carangos_http_request_duration_seconds', 'histogram',
+               'Wall time of the request handler.',
+               _histogram_lines('carangos_http_request_duration_seconds', _requests, ('endpoint', 'method')))
+        family('carangos_http_request_duration_quantile_seconds', 'gauge',
+               'Latency quantiles from the HDR histogram (bucket upper bound).',
+               _quantile_lines('carangos_http_request_duration_quantile_seconds', _requests, ('endpoint', 'method')))
+        family('carangos_http_responses_total', 'counter', 'Responses by status code.',
+               [f'carangos_http_responses_total{_labels(endpoint=e, method=m, status=s)} {n}'
+                for (e, m, s), n in sorted(_responses.items())])
+        family('carangos_data_calls_total', 'counter', 'data_manager calls made by requests.',
+               [f'carangos_data_calls_total{_labels(endpoint=e, function=f)} {v[0]}'
+                for (e, f), v in sorted(_data_calls.items())])
+        family('carangos_data_seconds_total', 'counter', 'Time spent in data_manager calls.',
+               [f'carangos_data_seconds_total{_labels(endpoint=e, function=f)} {v[1]:.9g}'
+                for (e, f), v in sorted(_data_calls.items())])
+        family('carangos_data_read_bytes_total', 'counter', 'Bytes read from collection files.',
+               [f'carangos_data_read_bytes_total{_labels(endpoint=e)} {v[0]}' for e, v in sorted(_io_bytes.items())])
+        family('carangos_data_written_bytes_total', 'counter', 'Bytes written to collection files.',
+               [f'carangos_data_written_bytes_total{_labels(endpoint=e)} {v[1]}' for e, v in sorted(_io_bytes.items())])
+        family('carangos_function_duration_seconds', 'histogram', 'Wall time of instrumented module functions.',
+               _histogram_lines('carangos_function_duration_seconds', _functions, ('function',)))
+        family('carangos_function_duration_quantile_seconds', 'gauge',
+               'Function latency quantiles from the HDR histogram (bucket upper bound).',
+               _quantile_lines('carangos_function_duration_quantile_seconds', _functions, ('function',)))
+
+    for name, help_text, function in _gauges:
+        family(name, 'gauge', help_text, [f'{name} {function()}'])
+    return '\n'.join(out) + '\n'
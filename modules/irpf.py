@@ -0,0 +1,147 @@
+# Módulo: IRPF
+# Descrição: Tabelas progressivas do IRPF por ano-calendário e cálculo do imposto
+# (um salário ou um lote inteiro) com busca binária da faixa.
+
+import bisect
+import os
+import threading
+import time
+
+# numpy é opcional: sem ele o lote é calculado com bisect item a item
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from modules import data_manager
+except ImportError:
+    import data_manager
+
+# Tabelas extras ou corrigidas ficam em data/irpf.json, no formato:
+# {"2025": [{"ate": 2428.80, "aliquota": 0.0, "deducao": 0.0}, ...,
+#           {"ate": null, "aliquota": 0.275, "deducao": 908.73}]}
+# A última faixa não tem limite ("ate": null).
+FILE_NAME = "irpf.json"
+
+# Tabela simplificada usada quando o arquivo não existe (valores aproximados, exemplo 2024)
+TABELAS_PADRAO = {
+    2024: [
+        {"ate": 2259.20, "aliquota": 0.0, "deducao": 0.0},
+        {"ate": 2826.65, "aliquota": 0.075, "deducao": 169.44},
+        {"ate": 3751.05, "aliquota": 0.15, "deducao": 381.44},
+        {"ate": 4664.68, "aliquota": 0.225, "deducao": 662.77},
+        {"ate": None, "aliquota": 0.275, "deducao": 896.00},
+    ],
+}
+
+# Ano usado quando o chamador não informa um (IRPF_ANO no ambiente troca o padrão)
+ANO_PADRAO = int(os.getenv("IRPF_ANO", "2024"))
+
+# Tabelas compiladas: refeitas só quando irpf.json muda. A versão do arquivo
+# é conferida no máximo uma vez por VERIFICAR_A_CADA segundos, para o cálculo
+# de um salário não custar um stat() (recarregar() força a leitura)
+VERIFICAR_A_CADA = 1.0
+_tabelas = {"versao": None, "verificado_em": None, "anos": [], "compiladas": {}}
+_tabelas_lock = threading.Lock()
+
+
+def compilar_tabela(faixas):
+    """
+    Converte a lista de faixas em três tuplas alinhadas (limites, alíquotas,
+    deduções), ordenadas pelo limite, prontas para a busca com bisect.
+    A faixa sem limite vira float("inf").
+    """
+    faixas = sorted(faixas, key=lambda f: float("inf") if f.get("ate") is None else float(f["ate"]))
+    limites = tuple(float("inf") if f.get("ate") is None else float(f["ate"]) for f in faixas)
+
+    if not limites or limites[-1] != float("inf"):
+        raise ValueError("Tabela de IRPF precisa de uma última faixa sem limite ('ate': null)")
+    if any(a >= b for a, b in zip(limites, limites[1:])):
+        raise ValueError("Tabela de IRPF com limites de faixa repetidos")
+
+    aliquotas = tuple(float(f.get("aliquota", 0.0)) for f in faixas)
+    deducoes = tuple(float(f.get("deducao", 0.0)) for f in faixas)
+    return limites, aliquotas, deducoes
+
+
+def _carregar_tabelas():
+    """
+    Tabelas padrão + as do arquivo (o arquivo prevalece no mesmo ano),
+    compiladas uma vez por versão de irpf.json.
+    """
+    agora = time.monotonic()
+    with _tabelas_lock:
+        verificado_em = _tabelas["verificado_em"]
+        if verificado_em is not None and agora - verificado_em < VERIFICAR_A_CADA:
+            return _tabelas["anos"], _tabelas["compiladas"]
+
+    versao = data_manager.data_version(FILE_NAME)
+    with _tabelas_lock:
+        if _tabelas["versao"] == versao and _tabelas["anos"]:
+            _tabelas["verificado_em"] = agora
+            return _tabelas["anos"], _tabelas["compiladas"]
+
+    tabelas = dict(TABELAS_PADRAO)
+    dados = data_manager.load_data(FILE_NAME)
+    if isinstance(dados, dict):
+        for ano, faixas in dados.items():
+            tabelas[int(ano)] = faixas
+
+    compiladas = {ano: compilar_tabela(faixas) for ano, faixas in tabelas.items()}
+    anos = sorted(compiladas)
+    with _tabelas_lock:
+        _tabelas.update(versao=versao, verificado_em=agora, anos=anos, compiladas=compiladas)
+    return anos, compiladas
+
+
+def recarregar():
+    """Descarta as tabelas compiladas; a próxima consulta relê irpf.json."""
+    with _tabelas_lock:
+        _tabelas.update(versao=None, verificado_em=None, anos=[], compiladas={})
+
+
+def anos_disponiveis():
+    """Lista os anos que têm tabela própria."""
+    return list(_carregar_tabelas()[0])
+
+
+def obter_tabela(ano=None):
+    """
+    Tabela compilada vigente no ano: a do próprio ano ou, se não houver,
+    a do ano anterior mais recente (a tabela vale até ser substituída).
+    """
+    ano = ANO_PADRAO if ano is None else int(ano)
+    anos, compiladas = _carregar_tabelas()
+    posicao = bisect.bisect_right(anos, ano)
+    if posicao == 0:
+        raise ValueError(f"Sem tabela de IRPF para {ano} (primeira: {anos[0]})")
+    return compiladas[anos[posicao - 1]]
+
+
+def calcular(salario_base, ano=None):
+    """
+    IRPF de um salário: localiza a faixa (primeiro limite >= salário) com bisect
+    e aplica salário * alíquota - dedução.
+    """
+    limites, aliquotas, deducoes = obter_tabela(ano)
+    faixa = bisect.bisect_left(limites, salario_base)
+    return (salario_base * aliquotas[faixa]) - deducoes[faixa]
+
+
+def calcular_lote(salarios, ano=None):
+    """
+    IRPF de vários salários com a mesma tabela, sem desvio por faixa.
+    Com numpy: searchsorted (bisect vetorizado) e retorno em array.
+    Sem numpy: bisect por salário e retorno em lista.
+    Os valores são iguais aos de calcular().
+    """
+    limites, aliquotas, deducoes = obter_tabela(ano)
+
+    if np is None:
+        return [(s * aliquotas[f]) - deducoes[f]
+                for s, f in ((s, bisect.bisect_left(limites, s)) for s in salarios)]
+
+    salarios = np.asarray(salarios, dtype=np.float64)
+    faixas = np.searchsorted(np.asarray(limites), salarios, side="left")
+    return (salarios * np.asarray(aliquotas)[faixas]) - np.asarray(deducoes)[faixas]
@@ -3,16 +3,28 @@
 # Módulo: Operacional
 # Descrição: Gerencia cadastro de produção e estatísticas operacionais.
 
-import json
-import os
+import datetime
 
-# Configuração do diretório de dados
-# O módulo utiliza uma variável de ambiente ou default para flexibilidade em diferentes ambientes (dev/prod)
-DATA_DIR = os.getenv("DATA_DIR", "data")
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+# Persistência via DataManager (producao.json usa o log append-only do data_manager)
+try:
+    from modules import data_manager
+except ImportError:
+    import data_manager
 
-DATA_FILE = os.path.join(DATA_DIR, "producao.json")
+FILE_NAME = "producao.json"
+
+# Agregados mantidos a cada inserção (ver registrar_producao / obter_rollup)
+ROLLUP_FILE = "producao_rollup.json"
+
+# Metas de produção mensais por planta e período, no formato:
+# {"principal": {"padrao": 750, "2026-10": 900}}
+# "padrao" vale para os meses sem meta própria (ver definir_meta / obter_meta_mensal)
+METAS_FILE = "metas_producao.json"
+PLANTA_PADRAO = "principal"
+META_MENSAL_PADRAO = 750
+
+DIAS_SEMANA = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+TURNOS = ["Manhã", "Tarde", "Noite"]
 
 def cadastrar_producao():
     """
@@ -30,11 +42,11 @@ def cadastrar_producao():
         - Solicita input do usuário para cada turno
         - Valida entrada numérica
         - Converte dados para formato flat
-        - Salva em 'producao.json'
-        - Append aos dados existentes
+        - Salva em 'producao.json' (cada linha com a data do dia na semana atual)
+        - Append aos dados existentes (somente as novas linhas são gravadas)
     """
-    dias_semana = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-    turnos = ["Manhã", "Tarde", "Noite"]
+    dias_semana = DIAS_SEMANA
+    turnos = TURNOS
     
     producao_semanal = []
     dados_flat = []
@@ -64,7 +76,8 @@ def cadastrar_producao():
                     dados_flat.append({
                         "dia": dia,
                         "turno": turno,
-                        "quantidade": qtd
+                        "quantidade": qtd,
+                        "data": data_do_dia(dia)
                     })
                     break
                 except ValueError:
@@ -74,33 +87,309 @@ def cadastrar_producao():
     
     # Persistência dos dados
     try:
-        # Tenta carregar dados antigos para não sobrescrever histórico
-        dados_existentes = []
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                dados_existentes = json.load(f)
-        
-        # Concatena novos dados
-        dados_existentes.extend(dados_flat)
-        
-        # Salva o arquivo atualizado com indentação para legibilidade humana
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(dados_existentes, f, indent=4, ensure_ascii=False)
-            
-        print(f"\n✅ Dados de produção salvos em {DATA_FILE}")
+        # Anexa apenas a semana nova ao log e atualiza os agregados
+        if registrar_producao(dados_flat):
+            print(f"\n✅ Dados de produção salvos em {FILE_NAME}")
+        else:
+            print("\n❌ Erro ao salvar dados de produção.")
         
     except Exception as e:
         print(f"\n❌ Erro ao salvar dados: {e}")
         
     return producao_semanal
 
+def _rollup_vazio():
+    return {
+        "registros": 0,
+        "total": 0,
+        "por_dia": {dia: dict.fromkeys(TURNOS, 0) for dia in DIAS_SEMANA},
+        "por_turno": dict.fromkeys(TURNOS, 0),
+        "por_semana": {},
+        "versao": None,
+    }
+
+def _rollup_valido(rollup):
+    return isinstance(rollup, dict) and all(k in rollup for k in _rollup_vazio())
+
+def _acumular(rollup, registros):
+    """
+    Soma as linhas no rollup em uma única passada (dois lookups O(1) por linha).
+    Linhas com dia ou turno desconhecido contam só no total geral;
+    linhas sem data não entram no total por semana ISO.
+    """
+    por_dia = rollup["por_dia"]
+    por_turno = rollup["por_turno"]
+    por_semana = rollup["por_semana"]
+    
+    for row in registros:
+        qtd = row.get("quantidade", 0)
+        rollup["registros"] += 1
+        rollup["total"] += qtd
+        
+        turnos_dia = por_dia.get(row.get("dia"))
+        if turnos_dia is not None and row.get("turno") in turnos_dia:
+            turnos_dia[row["turno"]] += qtd
+            por_turno[row["turno"]] += qtd
+        
+        semana = _semana_iso(row.get("data"))
+        if semana is not None:
+            por_semana[semana] = por_semana.get(semana, 0) + qtd
+    
+    return rollup
+
+def versao_producao():
+    """
+    Versão atual de 'producao.json' (base, segmentos mensais e logs), no
+    formato guardado em rollup['versao']. Muda a cada gravação, em qualquer
+    segmento e por qualquer processo.
+    """
+    return str(data_manager.data_version(FILE_NAME))
+
+def obter_rollup():
+    """
+    Retorna os agregados de produção (total, dia × turno, por turno) sem
+    recalcular o histórico: o rollup salvo vale enquanto a versão de
+    'producao.json' for a mesma gravada nele. Qualquer outra gravação
+    (append direto, linha retroativa em um segmento antigo, correção) muda
+    a versão, e o rollup é recalculado do zero e salvo.
+    
+    Returns:
+        dict: {
+            'registros': int,   # linhas já somadas
+            'total': int,
+            'por_dia': dict,    # {dia: {turno: total}}
+            'por_turno': dict,  # {turno: total}
+            'por_semana': dict  # {'AAAA-Www': total}
+        }
+    """
+    rollup = data_manager.load_data(ROLLUP_FILE)
+    versao = versao_producao()
+    if _rollup_valido(rollup) and rollup["versao"] == versao:
+        return rollup
+    
+    # Versão lida antes das linhas: uma gravação durante a leitura deixa o
+    # rollup salvo com a versão antiga, e a próxima leitura recalcula
+    rollup = calcular_rollup(data_manager.iter_data(FILE_NAME))
+    rollup["versao"] = versao
+    data_manager.save_data(ROLLUP_FILE, rollup)
+    return rollup
+
+def registrar_producao(registros):
+    """
+    Grava novas linhas de produção e atualiza o rollup persistido.
+    
+    Args:
+        registros (list): Linhas {'dia', 'turno', 'quantidade'}
+        
+    Returns:
+        bool: True se as linhas foram gravadas
+    """
+    # A trava cobre linhas + rollup: outro processo nunca vê um sem o outro.
+    # As somas não dependem da ordem, então as linhas gravadas aqui entram
+    # no rollup em qualquer segmento (inclusive datas retroativas)
+    with data_manager.file_lock(FILE_NAME):
+        rollup = obter_rollup()
+        if not data_manager.extend_data(FILE_NAME, registros):
+            return False
+        _acumular(rollup, registros)
+        rollup["versao"] = versao_producao()
+        data_manager.save_data(ROLLUP_FILE, rollup)
+    return True
+
+def corrigir_producao(registros):
+    """
+    Substitui todo o histórico de produção (correções) e recalcula o rollup.
+    
+    Returns:
+        bool: True se os dados foram gravados
+    """
+    with data_manager.file_lock(FILE_NAME):
+        if not data_manager.save_data(FILE_NAME, registros):
+            return False
+        rollup = calcular_rollup(registros)
+        rollup["versao"] = versao_producao()
+        data_manager.save_data(ROLLUP_FILE, rollup)
+    return True
+
+def calcular_rollup(registros):
+    """
+    Rollup completo de um iterável de linhas de produção, em uma única
+    passada e sem guardar as linhas (serve para gerar o rollup enquanto as
+    linhas são gravadas em streaming).
+    """
+    return _acumular(_rollup_vazio(), registros)
+
+def reconstruir_rollup():
+    """
+    Recalcula o rollup a partir das linhas brutas, compara com o mantido
+    incrementalmente e grava o recalculado.
+    
+    Returns:
+        list: Campos divergentes (vazia se o rollup incremental estava correto)
+    """
+    with data_manager.file_lock(FILE_NAME):
+        incremental = data_manager.load_data(ROLLUP_FILE)
+        incremental = incremental if _rollup_valido(incremental) else {}
+        versao = versao_producao()
+        novo = calcular_rollup(data_manager.iter_data(FILE_NAME))
+        novo["versao"] = versao
+        divergencias = [campo for campo in novo if novo[campo] != incremental.get(campo)]
+        data_manager.save_data(ROLLUP_FILE, novo)
+    return divergencias
+
+def total_produzido():
+    """
+    Total de unidades produzidas, lido do rollup (O(1) após a primeira leitura).
+    """
+    return obter_rollup()["total"]
+
+def agregar_producao(registros=None):
+    """
+    Monta a matriz dia × turno no formato esperado por calcular_estatisticas.
+    
+    Args:
+        registros (iterable, optional): Linhas {'dia', 'turno', 'quantidade'},
+            somadas em uma única passada. Se None, usa o rollup de 'producao.json'
+            (sem percorrer o histórico).
+        
+    Returns:
+        list: [{'dia': str, 'turnos': {turno: total}}, ...] nos 7 dias da semana.
+        Linhas com dia ou turno desconhecido são ignoradas.
+    """
+    if registros is None:
+        matriz = obter_rollup()["por_dia"]
+    else:
+        matriz = _acumular(_rollup_vazio(), registros)["por_dia"]
+    
+    return [{"dia": dia, "turnos": dict(matriz[dia])} for dia in DIAS_SEMANA]
+
+def _data(valor):
+    return valor if isinstance(valor, datetime.date) else datetime.date.fromisoformat(valor)
+
+def _semana_iso(data):
+    """
+    Chave 'AAAA-Www' da semana ISO de uma data, ou None se não houver data válida.
+    """
+    try:
+        ano, semana, _ = _data(data).isocalendar()
+    except (TypeError, ValueError):
+        return None
+    return f"{ano}-W{semana:02d}"
+
+def data_do_dia(dia, referencia=None):
+    """
+    Data ('AAAA-MM-DD') do dia da semana informado, dentro da semana ISO
+    da data de referência (hoje por padrão).
+    """
+    referencia = _data(referencia) if referencia else datetime.date.today()
+    segunda = referencia - datetime.timedelta(days=referencia.weekday())
+    return (segunda + datetime.timedelta(days=DIAS_SEMANA.index(dia))).isoformat()
+
+def dia_da_data(data):
+    """
+    Nome do dia da semana ('Segunda'...'Domingo') de uma data.
+    """
+    return DIAS_SEMANA[_data(data).weekday()]
+
+def consultar_producao(inicio, fim):
+    """
+    Retorna as linhas de produção com data entre inicio e fim (inclusive),
+    lendo apenas os segmentos mensais que cobrem o período.
+    
+    Args:
+        inicio, fim (date | str): Datas limite ('AAAA-MM-DD')
+        
+    Returns:
+        list: Linhas {'dia', 'turno', 'quantidade', 'data'}
+    """
+    return data_manager.load_range(FILE_NAME, _data(inicio).isoformat(), _data(fim).isoformat())
+
+def agregar_periodo(inicio, fim):
+    """
+    Monta a produção por data no período, um item por dia (inclusive dias sem
+    produção), no formato esperado por calcular_estatisticas.
+    
+    Returns:
+        list: [{'dia': str, 'data': 'AAAA-MM-DD', 'turnos': {turno: total}}, ...]
+    """
+    inicio, fim = _data(inicio), _data(fim)
+    por_data = {}
+    atual = inicio
+    while atual <= fim:
+        por_data[atual.isoformat()] = {
+            "dia": DIAS_SEMANA[atual.weekday()],
+            "data": atual.isoformat(),
+            "turnos": dict.fromkeys(TURNOS, 0)
+        }
+        atual += datetime.timedelta(days=1)
+    
+    for row in consultar_producao(inicio, fim):
+        item = por_data.get(row.get("data"))
+        if item is not None and row.get("turno") in item["turnos"]:
+            item["turnos"][row["turno"]] += row.get("quantidade", 0)
+    
+    return list(por_data.values())
+
+def agregar_semana(referencia=None):
+    """
+    Produção dia × turno de uma semana ISO (a da data de referência, hoje por padrão).
+    """
+    segunda = _data(data_do_dia("Segunda", referencia))
+    return agregar_periodo(segunda, segunda + datetime.timedelta(days=6))
+
+def relatorio_semanal(referencia=None):
+    """
+    Produção de uma semana ISO (a da data de referência, hoje por padrão)
+    para os relatórios semanais. Usa as linhas datadas da semana; só quando
+    a semana não tem nenhuma, cai na matriz sem data do rollup (todo o
+    histórico somado nos 7 dias da semana).
+    
+    Args:
+        referencia (date | str, optional): Qualquer dia da semana ('AAAA-MM-DD')
+        
+    Returns:
+        dict: {
+            'semana': str,           # 'AAAA-Www'
+            'inicio': str,           # segunda-feira 'AAAA-MM-DD'
+            'fim': str,              # domingo 'AAAA-MM-DD'
+            'datado': bool,          # False quando 'dados' é o histórico sem data
+            'dados': list,           # formato esperado por calcular_estatisticas
+            'total_historico': int   # total de todo o histórico (rollup)
+        }
+        
+    Raises:
+        ValueError: data de referência inválida
+    """
+    referencia = _data(referencia) if referencia else datetime.date.today()
+    inicio = _data(data_do_dia("Segunda", referencia))
+    fim = inicio + datetime.timedelta(days=6)
+    semana = _semana_iso(referencia)
+    
+    # O rollup já sabe quais semanas têm linhas datadas: nada de ler segmentos à toa
+    rollup = obter_rollup()
+    datado = semana in rollup["por_semana"]
+    if datado:
+        dados = agregar_periodo(inicio, fim)
+    else:
+        dados = [{"dia": dia, "turnos": dict(rollup["por_dia"][dia])} for dia in DIAS_SEMANA]
+    
+    return {
+        "semana": semana,
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "datado": datado,
+        "dados": dados,
+        "total_historico": rollup["total"],
+    }
+
 def calcular_estatisticas(dados):
     """
-    Calcula produção total semanal, média por dia e por turno.
+    Calcula produção total do período, média por dia e por turno.
     Retorna um dicionário com as estatísticas.
     
     Args:
         dados (list): Lista de dicionários com produção por dia/turno
+            (um item por dia; as médias dividem pelo número de dias recebidos)
         
     Returns:
         dict: {
@@ -119,12 +408,13 @@ def calcular_estatisticas(dados):
             total_semanal += qtd
             total_por_turno[turno] += qtd
             
-    # Cálculo de médias simples (considerando 7 dias fixos)
-    media_diaria = total_semanal / 7
+    # Cálculo de médias simples pelo número de dias do período (7 na semana)
+    num_dias = len(dados) or 1
+    media_diaria = total_semanal / num_dias
     
     # Dictionary comprehension para calcular média de cada turno
     media_por_turno = {
-        turno: total / 7 
+        turno: total / num_dias 
         for turno, total in total_por_turno.items()
     }
     
@@ -148,13 +438,86 @@ def simular_producao(total_semanal):
     anual = total_semanal * 52
     return mensal, anual
 
-def calcular_capacidade_ideal(meta_mensal=None):
+def _periodo(periodo=None):
+    """
+    Normaliza o período para 'AAAA-MM' (mês atual por padrão).
+    Aceita date/datetime, 'AAAA-MM' ou 'AAAA-MM-DD'; ValueError se inválido.
+    """
+    if periodo is None:
+        periodo = datetime.date.today()
+    if isinstance(periodo, datetime.date):
+        return periodo.strftime("%Y-%m")
+    periodo = str(periodo).strip()
+    datetime.datetime.strptime(periodo[:7], "%Y-%m")
+    if len(periodo) not in (7, 10):
+        raise ValueError(f"Período inválido: {periodo}")
+    return periodo[:7]
+
+def listar_metas():
+    """
+    Retorna as metas gravadas: {planta: {'padrao' | 'AAAA-MM': meta mensal}}.
+    """
+    metas = data_manager.load_data(METAS_FILE)
+    return metas if isinstance(metas, dict) else {}
+
+def obter_meta_mensal(planta=None, periodo=None):
+    """
+    Meta mensal vigente: a do período na planta, senão a padrão da planta,
+    senão META_MENSAL_PADRAO. Nunca pede nada ao usuário.
+    """
+    metas_planta = listar_metas().get(planta or PLANTA_PADRAO, {})
+    meta = metas_planta.get(_periodo(periodo), metas_planta.get("padrao"))
+    return float(meta) if meta is not None else float(META_MENSAL_PADRAO)
+
+def definir_meta(meta_mensal, planta=None, periodo="padrao"):
+    """
+    Grava a meta mensal de uma planta, para um mês ('AAAA-MM') ou como
+    padrão da planta (periodo="padrao").
+    
+    Raises:
+        ValueError: meta não positiva ou período inválido
+        IOError: falha ao gravar o arquivo de metas
+    """
+    meta_mensal = float(meta_mensal)
+    if meta_mensal <= 0:
+        raise ValueError("A meta mensal deve ser maior que zero.")
+    chave = "padrao" if periodo == "padrao" else _periodo(periodo)
+    planta = planta or PLANTA_PADRAO
+    
+    with data_manager.file_lock(METAS_FILE):
+        metas = listar_metas()
+        metas.setdefault(planta, {})[chave] = meta_mensal
+        if not data_manager.save_data(METAS_FILE, metas):
+            raise IOError(f"Não foi possível gravar {METAS_FILE}")
+    return meta_mensal
+
+def perguntar_meta_mensal(planta=None):
+    """
+    Pergunta a meta mensal no terminal (uso exclusivo do CLI). Enter mantém
+    a meta gravada; um valor válido passa a ser a meta padrão da planta.
+    """
+    atual = obter_meta_mensal(planta)
+    print("\n=== Configuração de Metas ===")
+    entrada = input(f"Digite a meta de produção MENSAL desejada (Enter mantém {atual:.0f}): ").strip()
+    if not entrada:
+        return atual
+    try:
+        return definir_meta(entrada, planta)
+    except ValueError:
+        print(f"⚠️ Valor inválido. Mantendo a meta de {atual:.0f} un.")
+        return atual
+
+def calcular_capacidade_ideal(meta_mensal=None, planta=None, periodo=None):
     """
-    Calcula a produção ideal com base em uma meta definida pelo usuário.
-    Se nenhuma meta for passada, solicita input interativo.
+    Calcula a produção ideal com base na meta mensal.
+    Sem meta informada, usa a meta gravada da planta/período
+    (ver obter_meta_mensal): a função nunca lê da entrada padrão,
+    então é segura nas rotas web.
     
     Args:
-        meta_mensal (float, optional): Meta mensal pré-definida. Se None, pede ao usuário.
+        meta_mensal (float, optional): Meta mensal. Se None, usa a meta gravada.
+        planta (str, optional): Planta (PLANTA_PADRAO por padrão)
+        periodo (str | date, optional): Mês 'AAAA-MM' (mês atual por padrão)
         
     Returns:
         dict: {
@@ -163,18 +526,8 @@ def calcular_capacidade_ideal(meta_mensal=None):
             'anual': float
         }
     """
-    # Permite que o usuário defina sua própria meta (requisito: "quero eu mesmo setar")
     if meta_mensal is None:
-        try:
-            print("\n=== Configuração de Metas ===")
-            entrada = input("Digite a meta de produção MENSAL desejada (Ex: 750): ")
-            meta_mensal = float(entrada)
-            if meta_mensal <= 0:
-                print("⚠️ Meta inválida ou zero. Usando padrão de 750 un.")
-                meta_mensal = 750
-        except ValueError:
-            print("⚠️ Valor inválido. Usando padrão de 750 un.")
-            meta_mensal = 750
+        meta_mensal = obter_meta_mensal(planta, periodo)
             
     # Deriva as outras metas a partir da mensal
     meta_semanal = meta_mensal / 4
@@ -250,6 +603,6 @@ if __name__ == "__main__":
     print("Iniciando módulo operacional (Modo Teste)...")
     dados = cadastrar_producao()
     stats = calcular_estatisticas(dados)
-    # Agora a capacidade pede input se não passar argumento
-    ideal = calcular_capacidade_ideal() 
+    # A meta é perguntada aqui (CLI) e fica gravada para as próximas consultas
+    ideal = calcular_capacidade_ideal(perguntar_meta_mensal())
     gerar_relatorio(dados, stats, ideal)
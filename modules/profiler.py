@@ -0,0 +1,98 @@
+# On-demand sampling profiler for a live worker.
+# install(app) keeps a map of thread -> endpoint being served (one dict
+# write per request). sample() then walks sys._current_frames() every
+# interval for a few seconds, from the calling thread, and counts the stacks
+# of the threads serving requests, grouped by endpoint. Nothing runs between
+# profiles, so each gunicorn worker can be profiled without a restart:
+# the worker that answers the profiling request is the one sampled.
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import request
+
+MAX_SECONDS = 30.0
+DEFAULT_INTERVAL = 0.005
+MAX_DEPTH = 128
+
+# Group of the threads that are not serving a request (include_idle=True)
+NO_REQUEST = '(no request)'
+
+_routes = {}    # thread id -> endpoint of the request it is serving
+_running = threading.Lock()
+
+
+def install(app):
+    """Tracks which endpoint each thread of app is serving."""
+    app.before_request(_enter)
+    app.teardown_request(_leave)
+
+
+def _enter():
+    _routes[threading.get_ident()] = request.endpoint or 'unmatched'
+
+
+def _leave(exc=None):
+    _routes.pop(threading.get_ident(), None)
+
+
+def _stack(frame):
+    """Root-to-leaf 'file.py:function' names of a frame's stack."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+def sample(seconds, interval=DEFAULT_INTERVAL, include_idle=False):
+    """
+    Samples the stacks of the other threads for seconds (capped at
+    MAX_SECONDS), one snapshot every interval seconds. Blocks the caller.
+
+    Returns (Counter {(endpoint, stack): samples}, number of snapshots).
+    Raises RuntimeError if another profile is already running in this process.
+    """
+    if not _running.acquire(blocking=False):
+        raise RuntimeError("A profile is already running in this worker")
+    try:
+        me = threading.get_ident()
+        counts = Counter()
+        snapshots = 0
+        deadline = time.monotonic() + min(max(seconds, 0.0), MAX_SECONDS)
+        while True:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                route = _routes.get(ident)
+                if route is None:
+                    if not include_idle:
+                        continue
+                    route = NO_REQUEST
+                counts[(route, _stack(frame))] += 1
+            snapshots += 1
+            if time.monotonic() + interval > deadline:
+                break
+            time.sleep(interval)
+        return counts, snapshots
+    finally:
+        _running.release()
+
+
+def collapsed(counts, route=None):
+    """
+    Collapsed-stack text ('endpoint;frame;frame count' per line, most
+    sampled first), ready for flamegraph.pl or speedscope. The endpoint is
+    the root frame; route keeps only that endpoint.
+    """
+    lines = [
+        f"{endpoint};{';'.join(stack)} {n}"
+        for (endpoint, stack), n in counts.most_common()
+        if route is None or endpoint == route
+    ]
+    return '\n'.join(lines) + '\n' if lines else ''
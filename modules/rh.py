@@ -6,6 +6,30 @@ import json
 import datetime
 import os
 import random
+import threading
+import time
+from functools import lru_cache
+
+# numpy é opcional: sem ele a folha em lote usa o laço em Python puro
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from modules import data_manager, irpf
+except ImportError:
+    import data_manager
+    import irpf
+
+FILE_NAME = "funcionarios.json"
+
+# Contador persistido do sequencial de matrícula (data_manager.next_sequence)
+SEQUENCIA_MATRICULA = "matricula"
+
+# Novas matrículas tentadas quando a gerada colide com uma já gravada
+# (acima de 999 o sequencial é escrito em hexadecimal: 0x400 vira "400")
+TENTATIVAS_MATRICULA = 5
 
 SETOR_DIGITO = {
     "OPERACIONAL": "1",
@@ -59,6 +83,99 @@ SETORES_DA_EMPRESA = {
 
 }
 
+# Cargos extras ou ajustados, sem mexer no código (data/cargos.json):
+# {"Supervisor de Produção": {"setor": "OPERACIONAL", "nivel": "4", "valor_hora": 16.00, "hora_extra": true}}
+# Campos omitidos mantêm o valor do cargo já existente (ou o padrão: sem setor,
+# nível "0", R$ 0,00 e hora extra pela regra de nomes abaixo).
+CARGOS_FILE = "cargos.json"
+
+# Gerentes e Diretores não recebem hora extra (regra pelo nome do cargo)
+CARGOS_SEM_EXTRA = ["gerente", "diretor"]
+
+
+@lru_cache(maxsize=None)
+def _regra_hora_extra(cargo):
+    cargo_lower = cargo.lower()
+    # Verifica se algum dos cargos sem extra está CONTIDO no cargo
+    return not any(restricao in cargo_lower for restricao in CARGOS_SEM_EXTRA)
+
+
+def _montar_cargos():
+    """
+    Registro cargo -> {'setor', 'nivel', 'valor_hora', 'hora_extra'} a partir
+    de SETORES_DA_EMPRESA e CARGO_NIVEL.
+    """
+    cargos = {}
+    for setor, cargos_setor in SETORES_DA_EMPRESA.items():
+        for cargo, valor_hora in cargos_setor.items():
+            cargos[cargo] = {
+                "setor": setor,
+                "nivel": CARGO_NIVEL.get(cargo, "0"),
+                "valor_hora": valor_hora,
+                "hora_extra": _regra_hora_extra(cargo),
+            }
+    return cargos
+
+
+# Registro montado uma vez na importação
+CARGOS = _montar_cargos()
+
+# Registro em uso (CARGOS + cargos.json), refeito só quando o arquivo muda.
+# O arquivo é conferido no máximo uma vez por VERIFICAR_CARGOS_A_CADA segundos.
+VERIFICAR_CARGOS_A_CADA = 1.0
+_registro = {"versao": None, "verificado_em": None, "cargos": CARGOS}
+_registro_lock = threading.Lock()
+
+
+def obter_cargos() -> dict:
+    """
+    Registro de cargos em uso: cargo -> {'setor', 'nivel', 'valor_hora', 'hora_extra'}.
+    O dicionário é compartilhado: use só para leitura.
+    """
+    agora = time.monotonic()
+    with _registro_lock:
+        verificado_em = _registro["verificado_em"]
+        if verificado_em is not None and agora - verificado_em < VERIFICAR_CARGOS_A_CADA:
+            return _registro["cargos"]
+
+    versao = data_manager.data_version(CARGOS_FILE)
+    with _registro_lock:
+        if _registro["versao"] == versao and verificado_em is not None:
+            _registro["verificado_em"] = agora
+            return _registro["cargos"]
+
+    cargos = CARGOS
+    extras = data_manager.load_data(CARGOS_FILE)
+    if isinstance(extras, dict) and extras:
+        cargos = dict(CARGOS)
+        for cargo, dados in extras.items():
+            atual = cargos.get(cargo, {})
+            cargos[cargo] = {
+                "setor": dados.get("setor", atual.get("setor")),
+                "nivel": str(dados.get("nivel", atual.get("nivel", "0"))),
+                "valor_hora": float(dados.get("valor_hora", atual.get("valor_hora", 0.0))),
+                "hora_extra": bool(dados.get("hora_extra", atual.get("hora_extra", _regra_hora_extra(cargo)))),
+            }
+    with _registro_lock:
+        _registro.update(versao=versao, verificado_em=agora, cargos=cargos)
+    return cargos
+
+
+def recarregar_cargos():
+    """Descarta o registro em uso; a próxima consulta relê cargos.json."""
+    with _registro_lock:
+        _registro.update(versao=None, verificado_em=None, cargos=CARGOS)
+
+
+def obter_cargo(cargo: str):
+    """Dados do cargo no registro, ou None se o cargo não existir."""
+    return obter_cargos().get(cargo)
+
+
+def cargos_do_setor(setor: str) -> dict:
+    """Cargos do setor com o valor hora base: {cargo: valor_hora}."""
+    return {cargo: dados["valor_hora"] for cargo, dados in obter_cargos().items() if dados["setor"] == setor}
+
 
 def obter_proximo_sequencial(funcionarios: list) -> int:
     """
@@ -70,11 +187,12 @@ def obter_proximo_sequencial(funcionarios: list) -> int:
     max_sequencial = 0
     for f in funcionarios:
         matricula = f.get("matricula", "")
-        # A matrícula tem 6 dígitos, o sequencial são os dígitos 3, 4 e 5 (índices 2, 3, 4)
-        if len(matricula) == 6:
+        # A matrícula tem 6 dígitos, o sequencial são os dígitos 3, 4 e 5 (índices 2, 3, 4).
+        # Acima de FFF o sequencial hexadecimal passa de 3 dígitos e a matrícula cresce.
+        if len(matricula) >= 6:
             try:
-                # Extrai o sequencial (dígitos 3, 4, 5)
-                sequencial_str = matricula[2:5]
+                # Extrai o sequencial (do 3º ao penúltimo dígito)
+                sequencial_str = matricula[2:-1]
                 
                 # Tenta converter como decimal primeiro
                 try:
@@ -93,10 +211,27 @@ def obter_proximo_sequencial(funcionarios: list) -> int:
                 
     return max_sequencial + 1
 
-def gerar_matricula(setor: str, cargo: str, funcionarios_atuais: list) -> str:
+
+def reservar_sequencial(quantidade: int = 1) -> int:
+    """
+    Reserva `quantidade` sequenciais de matrícula consecutivos e retorna o primeiro.
+    Usa o contador persistido (custo constante, sem ler os funcionários) e
+    protegido por lock entre processos; só na primeira vez, sem contador
+    gravado, varre o cadastro com obter_proximo_sequencial.
+    """
+    def recuperar():
+        return obter_proximo_sequencial(data_manager.load_view(FILE_NAME)) - 1
+
+    return data_manager.next_sequence(SEQUENCIA_MATRICULA, quantidade, recover=recuperar)
+
+
+def gerar_matricula(setor: str, cargo: str, funcionarios_atuais: list = None, sequencial: int = None, avisar: bool = True,
+                    rng: random.Random = None) -> str:
     """
     a função gera uma matrícula única de 6 digitos para o funcionario, dando significado do primeiro ao quinto número.
     1º: Setor (1-4) | 2º: Nível do Cargo (1-4) | 3º-5º: Sequencial (001+ ou Hex) | 6º: Aleatório (0-9)
+    rng: gerador do 6º dígito (random.Random próprio para resultados reproduzíveis;
+    None usa o módulo random)
     """
     #--------------------------------------------------------------------------------
     """
@@ -110,21 +245,27 @@ def gerar_matricula(setor: str, cargo: str, funcionarios_atuais: list) -> str:
     digito_setor = SETOR_DIGITO.get(setor, "0")
     
     # 2º Dígito: Nível do Cargo (Ex: Auxiliar de Estoque -> 1)
-    digito_nivel = CARGO_NIVEL.get(cargo, "0")
+    digito_nivel = (obter_cargo(cargo) or {}).get("nivel", "0")
     
     # 3º-5º Dígito: Sequencial (Ex: 001, 010, 100)
-    sequencial = obter_proximo_sequencial(funcionarios_atuais)
+    # Vem do contador persistido; passando funcionarios_atuais, da varredura da lista
+    if sequencial is None:
+        if funcionarios_atuais is not None:
+            sequencial = obter_proximo_sequencial(funcionarios_atuais)
+        else:
+            sequencial = reservar_sequencial()
     
     # Se o sequencial for maior que 999, converte para hexadecimal
     if sequencial > 999:
         # Converte para hexadecimal (maiúsculo) e garante 3 caracteres com zeros à esquerda
         digito_sequencial = format(sequencial, 'X').zfill(3)
-        print(f"\n[INFO] Sequencial {sequencial} convertido para HEX (padded): {digito_sequencial}")
+        if avisar:
+            print(f"\n[INFO] Sequencial {sequencial} convertido para HEX (padded): {digito_sequencial}")
     else:
         digito_sequencial = f"{sequencial:03d}"  # Garante 3 dígitos com preenchimento de zero
 
     # 6º Dígito: Aleatório (0-9)
-    digito_aleatorio = str(random.randint(0, 9))
+    digito_aleatorio = str((rng or random).randint(0, 9))
     
     # Constrói a matrícula de 6 dígitos
     matricula = f"{digito_setor}{digito_nivel}{digito_sequencial}{digito_aleatorio}"
@@ -132,23 +273,26 @@ def gerar_matricula(setor: str, cargo: str, funcionarios_atuais: list) -> str:
     return matricula
 
 
-def salvar_funcionario(dados_a_salvar: list, filepath: str = "data/funcionarios.json"):
+def salvar_funcionario(dados_a_salvar: list, filepath: str = None):
     """
     Salva (anexa) um funcionário no arquivo JSON especificado.
     Se o arquivo não existir, cria uma lista nova.
+    Sem filepath, grava a coleção funcionarios.json do data_manager.
     """
-    # garante que a pasta exista
-    dirpath = os.path.dirname(filepath) or "."
-    if dirpath and not os.path.exists(dirpath):
-        os.makedirs(dirpath, exist_ok=True)
-
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(dados_a_salvar, f, ensure_ascii=False, indent=2)
+    if filepath is None:
+        if not data_manager.save_data(FILE_NAME, dados_a_salvar):
+            raise IOError(f"Não foi possível gravar {FILE_NAME}")
+        return
+    # Escrita atômica (arquivo temporário + rename): nunca deixa o JSON pela metade
+    data_manager.atomic_write_json(os.path.abspath(filepath), dados_a_salvar, indent=2)
         
-def carregar_todos_funcionarios(filepath: str = "data/funcionarios.json") -> list:
+def carregar_todos_funcionarios(filepath: str = None) -> list:
     """
     Carrega todos os registros do arquivo JSON. Retorna uma lista vazia se não encontrar ou houver erro.
+    Sem filepath, lê a coleção funcionarios.json do data_manager (snapshot + log).
     """
+    if filepath is None:
+        return data_manager.load_data(FILE_NAME)
     if not os.path.exists(filepath):
         return []
     try:
@@ -183,19 +327,19 @@ def selecionar_setor():
                 case '1':
                     nome_setor = "OPERACIONAL"
                     # Acessamos o dicionário interno do setor escolhido:
-                    cargos_setor = SETORES_DA_EMPRESA[nome_setor]
+                    cargos_setor = cargos_do_setor(nome_setor)
                     break  # Sai do loop externo
                 case '2':
                     nome_setor = "ESTOQUE"
-                    cargos_setor = SETORES_DA_EMPRESA[nome_setor]
+                    cargos_setor = cargos_do_setor(nome_setor)
                     break
                 case '3':
                     nome_setor = "FINANCEIRO"
-                    cargos_setor = SETORES_DA_EMPRESA[nome_setor]
+                    cargos_setor = cargos_do_setor(nome_setor)
                     break
                 case '4':
                     nome_setor = "RH"
-                    cargos_setor = SETORES_DA_EMPRESA[nome_setor]
+                    cargos_setor = cargos_do_setor(nome_setor)
                     break
                 case _:
                     print("Opção de setor inválida. Tente novamente.")
@@ -255,7 +399,7 @@ def validar_entrada(prompt: str, tipo: str):
             print("Deve conter apenas números. Tente novamente.")
 
 
-def cadastrar_funcionario(filepath: str = "data/funcionarios.json"):
+def cadastrar_funcionario(filepath: str = None):
     """
     Cadastra um funcionário interativamente e retorna um dicionário com os dados.
     """
@@ -288,10 +432,6 @@ def cadastrar_funcionario(filepath: str = "data/funcionarios.json"):
         # fallback: se por algum motivo não for possível converter, usa 0.0
         valor_hora = 0.0
         
-    # Gera a matricula unica para cada funcionario cadastrado
-    cadastro_completo = carregar_todos_funcionarios(filepath) # Carrega antes para obter o sequencial
-    matricula = gerar_matricula(nome_setor, cargo, cadastro_completo)
-
     novo_funcionario = {
 
         "nome": nome,
@@ -303,22 +443,104 @@ def cadastrar_funcionario(filepath: str = "data/funcionarios.json"):
         "qtd_filhos": qtd_filhos,
         "cargo": cargo,
         "valor_hora": valor_hora,
-        "matricula": matricula,
+        "matricula": None,
         "data_cadastro": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
     }
 
-    cadastro_completo = carregar_todos_funcionarios(filepath)
-    cadastro_completo.append(novo_funcionario)
-
     try:
-        salvar_funcionario(cadastro_completo, filepath)
-        print(f"\nFuncionário '{nome}' cadastrado com sucesso! Matrícula: {matricula}")
+        if filepath is None:
+            # Coleção do data_manager: matrícula do contador persistido (sem
+            # ler o cadastro); CPF e matrícula checados sob a trava
+            novo_funcionario["matricula"] = gerar_matricula(nome_setor, cargo)
+            if not inserir_funcionario(novo_funcionario, nome_setor):
+                print(f"\nFuncionário com CPF {cpf} já cadastrado.")
+                return None
+        else:
+            # Trava o arquivo da leitura até a gravação: dois cadastros
+            # simultâneos não sobrescrevem um ao outro
+            with data_manager.file_lock(os.path.abspath(filepath)):
+                cadastro_completo = carregar_todos_funcionarios(filepath)
+                normalizar = data_manager.KEY_NORMALIZERS["cpf"]
+                if any(normalizar(str(f.get("cpf", ""))) == normalizar(cpf) for f in cadastro_completo):
+                    print(f"\nFuncionário com CPF {cpf} já cadastrado.")
+                    return None
+                # Sequencial do próprio arquivo, não do contador da pasta de dados
+                novo_funcionario["matricula"] = gerar_matricula(nome_setor, cargo, cadastro_completo)
+                cadastro_completo.append(novo_funcionario)
+                salvar_funcionario(cadastro_completo, filepath)
+        print(f"\nFuncionário '{nome}' cadastrado com sucesso! Matrícula: {novo_funcionario['matricula']}")
     except Exception as e:
         print(f"Erro ao salvar o cadastro: {e}")
         pass 
 
     return novo_funcionario
 
+
+def inserir_funcionario(funcionario: dict, setor: str) -> bool:
+    """
+    Grava um funcionário novo com data_manager.insert_unique (CPF e matrícula
+    checados sob a trava do arquivo). Se só a matrícula colidir com uma já
+    gravada, gera outra com um novo sequencial e tenta de novo; a matrícula
+    gravada fica em funcionario['matricula'].
+    
+    Returns:
+        bool: True se gravou, False se o CPF já está cadastrado
+    
+    Raises:
+        IOError: se a gravação falhar
+    """
+    for _ in range(TENTATIVAS_MATRICULA):
+        if data_manager.insert_unique(FILE_NAME, funcionario):
+            return True
+        if data_manager.get_by_key(FILE_NAME, "cpf", funcionario.get("cpf")) is not None:
+            return False
+        if data_manager.get_by_key(FILE_NAME, "matricula", funcionario.get("matricula")) is None:
+            raise IOError(f"Não foi possível gravar {FILE_NAME}")
+        funcionario["matricula"] = gerar_matricula(setor, funcionario.get("cargo", ""), avisar=False)
+    raise IOError(f"Nenhuma matrícula livre após {TENTATIVAS_MATRICULA} tentativas")
+
+
+def admitir_funcionarios(novos: list) -> list:
+    """
+    Cadastra vários funcionários de uma vez (importação, carga em massa).
+    Cada dicionário precisa de 'cargo'; o setor vem de obter_setor_funcionario.
+    Reserva um bloco de sequenciais e grava tudo numa única escrita no log
+    (data_manager.extend_unique), então o custo cresce de forma linear com a
+    quantidade admitida. CPF já cadastrado (ou repetido no lote) recusa a
+    linha; matrícula que colide com uma gravada é gerada de novo.
+    
+    Returns:
+        tuple: (admitidos, recusados) - os funcionários gravados, com
+            'matricula' preenchida, e os recusados por CPF duplicado
+    """
+    if not novos:
+        return [], []
+    primeiro = reservar_sequencial(len(novos))
+    pendentes = []
+    for sequencial, f in enumerate(novos, start=primeiro):
+        f = dict(f)
+        setor = obter_setor_funcionario(f.get("cargo", "")) or "RH"
+        f["matricula"] = gerar_matricula(setor, f.get("cargo", ""), sequencial=sequencial, avisar=False)
+        f.setdefault("data_cadastro", datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"))
+        pendentes.append((f, setor))
+    
+    admitidos, recusados = [], []
+    for _ in range(TENTATIVAS_MATRICULA):
+        ok, rejeitados = data_manager.extend_unique(FILE_NAME, [f for f, _ in pendentes])
+        if not ok:
+            raise IOError(f"Não foi possível gravar {FILE_NAME}")
+        campo = {id(f): c for f, c in rejeitados}
+        admitidos += [f for f, _ in pendentes if id(f) not in campo]
+        recusados += [f for f, _ in pendentes if campo.get(id(f), "matricula") != "matricula"]
+        pendentes = [(f, setor) for f, setor in pendentes if campo.get(id(f)) == "matricula"]
+        if not pendentes:
+            return admitidos, recusados
+        # Só a matrícula colidiu: novos sequenciais e nova tentativa
+        primeiro = reservar_sequencial(len(pendentes))
+        for sequencial, (f, setor) in enumerate(pendentes, start=primeiro):
+            f["matricula"] = gerar_matricula(setor, f.get("cargo", ""), sequencial=sequencial, avisar=False)
+    raise IOError(f"Nenhuma matrícula livre após {TENTATIVAS_MATRICULA} tentativas")
+
 def listar_funcionarios():
     """
     Lista todos os funcionários cadastrados no sistema.
@@ -345,7 +567,7 @@ def listar_funcionarios():
         print(f"\nCargo: {cargo}")
 
 
-def editar_funcionarios(filepath: str = "data/funcionarios.json"):
+def editar_funcionarios(filepath: str = None):
     """
     Permite ao usuário selecionar um funcionário da lista e editar seus dados.
     """
@@ -395,14 +617,20 @@ def editar_funcionarios(filepath: str = "data/funcionarios.json"):
     print("\nPara alterar o cargo ou setor, é necessário apagar o cadastro atual e refazer o cadastro com as novas informações.")
 
     try:
-        salvar_funcionario(cadastro, filepath)
+        if filepath is None:
+            # Alteração pontual pelo CPF: só o registro editado é gravado
+            data_manager.update_by_key(FILE_NAME, editar.get('cpf'), {
+                'nome': editar['nome'], 'endereco': editar['endereco'], 'telefone': editar['telefone']
+            })
+        else:
+            salvar_funcionario(cadastro, filepath)
         print(f"\nDados de '{editar['nome']}' atualizados com sucesso!")
     except Exception as e:
         print(f"Erro ao salvar as alterações: {e}")
         
         
               
-def deletar_funcionarios(filepath: str = "data/funcionarios.json"):
+def deletar_funcionarios(filepath: str = None):
     """
     Permite ao usuário selecionar um funcionário da lista (pelo índice) e removê-lo permanentemente do cadastro.
     """
@@ -440,7 +668,11 @@ def deletar_funcionarios(filepath: str = "data/funcionarios.json"):
         
         print(f"Funcionário **{nome}** removido do cadastro.")
         
-        salvar_funcionario(cadastro, filepath) 
+        if filepath is None:
+            # Remoção pontual pelo CPF: o restante do cadastro não é regravado
+            data_manager.delete_by_key(FILE_NAME, remover.get('cpf'))
+        else:
+            salvar_funcionario(cadastro, filepath) 
     else:
         print("Operação cancelada. O cadastro não foi deletado.")
         
@@ -454,18 +686,22 @@ def calcular_salario_bruto(horas_trabalhadas, valor_hora):
 
 
 
+def recebe_hora_extra(cargo, cargos=None):
+    """
+    Gerentes e Diretores não recebem hora extra.
+    Vem do registro de cargos; cargos fora do registro seguem a regra pelo nome.
+    cargos permite reaproveitar o registro já obtido (laços da folha).
+    """
+    dados = (cargos if cargos is not None else obter_cargos()).get(cargo)
+    return dados["hora_extra"] if dados is not None else _regra_hora_extra(cargo)
+
+
 def calcular_horas_extras(horas_extras, valor_hora, cargo):
     """
     Calcula valor das horas extras.
     Gerentes e Diretores não recebem hora extra.
     """
-    cargo_lower = cargo.lower()
-    cargos_sem_extra = ["gerente", "diretor"]
-    
-    # Verifica se algum dos cargos sem extra está CONTIDO no cargo
-    tem_restricao = any(restricao in cargo_lower for restricao in cargos_sem_extra)
-    
-    if tem_restricao:
+    if not recebe_hora_extra(cargo):
         return 0.0
     
     # Adicional de 50% na hora extra (padrão CLT simples para o exercício)
@@ -474,21 +710,12 @@ def calcular_horas_extras(horas_extras, valor_hora, cargo):
 
 
 
-def calcular_irpf(salario_base):
+def calcular_irpf(salario_base, ano=None):
     """
-    Calcula o IRPF com base em tabela simplificada (exemplo 2024).
+    Calcula o IRPF pela tabela progressiva do ano (padrão: irpf.ANO_PADRAO).
+    As tabelas ficam no módulo irpf (data/irpf.json).
     """
-    # Tabela progressiva simplificada (valores aproximados para exercício)
-    if salario_base <= 2259.20:
-        return 0.0
-    elif salario_base <= 2826.65:
-        return (salario_base * 0.075) - 169.44
-    elif salario_base <= 3751.05:
-        return (salario_base * 0.15) - 381.44
-    elif salario_base <= 4664.68:
-        return (salario_base * 0.225) - 662.77
-    else:
-        return (salario_base * 0.275) - 896.00
+    return irpf.calcular(salario_base, ano)
 
 
 
@@ -501,15 +728,89 @@ def calcular_liquido(salario_bruto, irpf):
 
 
 
+def calcular_folha_lote(funcionarios, horas_trabalhadas=160, horas_extras=10, ano=None):
+    """
+    Calcula a folha de todos os funcionários de uma vez.
+    
+    horas_trabalhadas e horas_extras podem ser um número (igual para todos)
+    ou uma lista com um valor por funcionário; ano escolhe a tabela de IRPF. Com numpy instalado o cálculo
+    é feito em colunas (uma operação vetorizada por etapa); sem ele, em um
+    laço simples. Os valores são idênticos aos das funções escalares
+    (calcular_salario_bruto, calcular_horas_extras, calcular_irpf, calcular_liquido).
+    
+    Returns:
+        dict: colunas alinhadas com a lista de funcionários:
+            {'bruto', 'extra', 'total_bruto', 'irpf', 'liquido'} (listas de float)
+    """
+    valor_hora = [f.get("valor_hora", 0) for f in funcionarios]
+    # Elegibilidade à hora extra pelo registro de cargos (consultado uma vez)
+    cargos = obter_cargos()
+    elegivel = [recebe_hora_extra(f.get("cargo", ""), cargos) for f in funcionarios]
+    colunas = calcular_folha_colunas(valor_hora, elegivel, horas_trabalhadas, horas_extras, ano)
+    if np is not None:
+        colunas = {campo: valores.tolist() for campo, valores in colunas.items()}
+    return colunas
+
+
+def calcular_folha_colunas(valor_hora, elegivel, horas_trabalhadas=160, horas_extras=10, ano=None):
+    """
+    Núcleo da folha em lote sobre colunas já extraídas:
+    valor_hora (float) e elegivel (bool, recebe hora extra), um item por funcionário.
+    Mesmas chaves de calcular_folha_lote; com numpy as colunas são arrays
+    (sem conversão para listas), sem numpy são listas.
+    """
+    if np is None:
+        return _folha_colunas_python(valor_hora, elegivel, horas_trabalhadas, horas_extras, ano)
+    
+    valor_hora = np.asarray(valor_hora, dtype=np.float64)
+    elegivel = np.asarray(elegivel, dtype=bool)
+    horas_trabalhadas = np.asarray(horas_trabalhadas, dtype=np.float64)
+    horas_extras = np.asarray(horas_extras, dtype=np.float64)
+    
+    # Mesmas operações, na mesma ordem, das funções escalares
+    bruto = horas_trabalhadas * valor_hora
+    extra = np.where(elegivel, horas_extras * (valor_hora * 1.5), 0.0)
+    total_bruto = bruto + extra
+    imposto = irpf.calcular_lote(total_bruto, ano)
+    liquido = total_bruto - imposto
+    
+    forma = valor_hora.shape
+    return {
+        "bruto": np.broadcast_to(bruto, forma),
+        "extra": np.broadcast_to(extra, forma),
+        "total_bruto": np.broadcast_to(total_bruto, forma),
+        "irpf": np.broadcast_to(imposto, forma),
+        "liquido": np.broadcast_to(liquido, forma),
+    }
+
+
+def _folha_colunas_python(valor_hora, elegivel, horas_trabalhadas, horas_extras, ano):
+    n = len(valor_hora)
+    horas_trabalhadas = horas_trabalhadas if isinstance(horas_trabalhadas, (list, tuple)) else [horas_trabalhadas] * n
+    horas_extras = horas_extras if isinstance(horas_extras, (list, tuple)) else [horas_extras] * n
+    
+    brutos, extras = [], []
+    for vh, pode, ht, he in zip(valor_hora, elegivel, horas_trabalhadas, horas_extras):
+        brutos.append(float(ht * vh))
+        extras.append(float(he * (vh * 1.5)) if pode else 0.0)
+    totais = [b + e for b, e in zip(brutos, extras)]
+    impostos = [float(v) for v in irpf.calcular_lote(totais, ano)]
+    return {
+        "bruto": brutos,
+        "extra": extras,
+        "total_bruto": totais,
+        "irpf": impostos,
+        "liquido": [t - i for t, i in zip(totais, impostos)],
+    }
+
+
 def obter_setor_funcionario(cargo: str) -> str:
     """
-    Identifica o setor do funcionário baseado no cargo.
+    Identifica o setor do funcionário baseado no cargo (registro de cargos).
     Retorna o setor ou None se não encontrado.
     """
-    for setor, cargos_dict in SETORES_DA_EMPRESA.items():
-        if cargo in cargos_dict:
-            return setor
-    return None
+    dados = obter_cargo(cargo)
+    return dados["setor"] if dados is not None else None
 
 
 def gerar_folha_pagamento():
@@ -524,10 +825,11 @@ def gerar_folha_pagamento():
         print("Nenhum funcionário cadastrado para gerar folha.")
         return
     
-    # Organizar funcionários por setor
+    # Organizar funcionários por setor (registro de cargos consultado uma vez)
+    cargos = obter_cargos()
     funcionarios_por_setor = {}
     for f in funcionarios:
-        setor = obter_setor_funcionario(f["cargo"])
+        setor = (cargos.get(f["cargo"]) or {}).get("setor")
         if setor:
             if setor not in funcionarios_por_setor:
                 funcionarios_por_setor[setor] = []
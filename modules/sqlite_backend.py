@@ -0,0 +1,369 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Tables used for the main collections: filename -> (table, indexed key columns).
+# Each row keeps the full record as JSON in `dados`; the key columns are copies
+# of the record fields (as text) so lookups and filters can use an index.
+TABLES = {
+    'produtos.json': ('produtos', ('codigo',)),
+    'funcionarios.json': ('funcionarios', ('cpf', 'matricula')),
+    'producao.json': ('producao', ('dia', 'turno', 'data')),
+    'despesas.json': ('despesas', ('tipo',)),
+    'users.json': ('users', ('username',)),
+}
+
+# Composite indexes beyond the one-column ones
+COMPOSITE_INDEXES = {
+    'producao': [('dia', 'turno')],
+}
+
+# Any other file (test fixtures, small config documents) is stored whole
+GENERIC_TABLE = 'colecoes'
+
+# Write counter per table, so version() also changes on in-place updates
+VERSIONS_TABLE = 'versoes'
+
+# Per-field key normalization, same as data_manager.KEY_NORMALIZERS
+KEY_NORMALIZERS = {'cpf': lambda v: ''.join(c for c in v if c.isdigit())}
+
+# PRAGMA user_version of the current schema: 1 = key columns normalized with KEY_NORMALIZERS
+SCHEMA_VERSION = 1
+
+# One connection per thread and database path (gunicorn threads never share one)
+_local = threading.local()
+
+
+def get_connection(db_path):
+    """
+    Returns the calling thread's connection to db_path, creating it on first use.
+    """
+    conns = getattr(_local, 'conns', None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _create_schema(conn)
+        conns[db_path] = conn
+    return conn
+
+
+def close_connections():
+    """
+    Closes the calling thread's connections (used by tests and scripts).
+    """
+    for conn in getattr(_local, 'conns', {}).values():
+        conn.close()
+    _local.conns = {}
+
+
+def _create_schema(conn):
+    for table, keys in TABLES.values():
+        columns = ''.join(f', {k} TEXT' for k in keys)
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} '
+            f'(id INTEGER PRIMARY KEY AUTOINCREMENT, dados TEXT NOT NULL{columns})'
+        )
+        # Databases created before a key column existed get it added and filled in
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        for k in keys:
+            if k not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {k} TEXT')
+                conn.execute(f"UPDATE {table} SET {k} = CAST(json_extract(dados, '$.{k}') AS TEXT)")
+        for k in keys:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{k} ON {table}({k})')
+        for cols in COMPOSITE_INDEXES.get(table, []):
+            name = '_'.join(cols)
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{name} ON {table}({", ".join(cols)})')
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {GENERIC_TABLE} (nome TEXT PRIMARY KEY, dados TEXT NOT NULL)')
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (tabela TEXT PRIMARY KEY, revisao INTEGER NOT NULL)')
+
+    if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+        # Key columns written before KEY_NORMALIZERS existed are normalized once
+        conn.create_function('normalize_key', 2, lambda field, value: _key_value(value, field))
+        with _transaction(conn):
+            for table, keys in TABLES.values():
+                for k in keys:
+                    if k in KEY_NORMALIZERS:
+                        conn.execute(f"UPDATE {table} SET {k} = normalize_key('{k}', {k})")
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+
+@contextmanager
+def _transaction(conn):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _key_value(value, field=None):
+    # Same normalization as data_manager._key
+    if value is None:
+        return None
+    value = str(value).strip()
+    normalize = KEY_NORMALIZERS.get(field)
+    return normalize(value) if normalize else value
+
+
+def _row_params(record, keys):
+    return [json.dumps(record, ensure_ascii=False)] + [_key_value(record.get(k), k) for k in keys]
+
+
+def _bump(conn, table):
+    conn.execute(
+        f'INSERT INTO {VERSIONS_TABLE} (tabela, revisao) VALUES (?, 1) '
+        f'ON CONFLICT(tabela) DO UPDATE SET revisao = revisao + 1', (table,)
+    )
+
+
+def _insert_sql(table, keys):
+    columns = ', '.join(('dados',) + tuple(keys))
+    marks = ', '.join('?' * (len(keys) + 1))
+    return f'INSERT INTO {table} ({columns}) VALUES ({marks})'
+
+
+def load(db_path, filename):
+    conn = get_connection(db_path)
+    if filename not in TABLES:
+        row = conn.execute(f'SELECT dados FROM {GENERIC_TABLE} WHERE nome = ?', (filename,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    table, _ = TABLES[filename]
+    return [json.loads(r[0]) for r in conn.execute(f'SELECT dados FROM {table} ORDER BY id')]
+
+
+def iterate(db_path, filename):
+    if filename not in TABLES:
+        yield from load(db_path, filename)
+        return
+
+    table, _ = TABLES[filename]
+    cursor = get_connection(db_path).execute(f'SELECT dados FROM {table} ORDER BY id')
+    for r in cursor:
+        yield json.loads(r[0])
+
+
+def save(db_path, filename, data):
+    conn = get_connection(db_path)
+    with _transaction(conn):
+        if filename not in TABLES:
+            conn.execute(
+                f'INSERT OR REPLACE INTO {GENERIC_TABLE} (nome, dados) VALUES (?, ?)',
+                (filename, json.dumps(data, ensure_ascii=False))
+            )
+            return
+        table, keys = TABLES[filename]
+        conn.execute(f'DELETE FROM {table}')
+        conn.executemany(_insert_sql(table, keys), [_row_params(r, keys) for r in data])
+        _bump(conn, table)
+
+
+def extend(db_path, filename, records):
+    if filename not in TABLES:
+        data = load(db_path, filename)
+        data.extend(records)
+        save(db_path, filename, data)
+        return
+
+    table, keys = TABLES[filename]
+    conn = get_connection(db_path)
+    with _transaction(conn):
+        conn.executemany(_insert_sql(table, keys), [_row_params(r, keys) for r in records])
+        _bump(conn, table)
+
+
+def update_by_key(db_path, filename, field, value, changes, unique=()):
+    """
+    Merges changes into the record whose key column field equals value (in place,
+    keeping its position). Returns the updated record or None.
+    Raises ValueError if field would change or a column in unique would clash.
+    """
+    table, keys = TABLES[filename]
+    conn = get_connection(db_path)
+    with _transaction(conn):
+        row = conn.execute(f'SELECT id, dados FROM {table} WHERE {field} = ? LIMIT 1',
+                           (_key_value(value, field),)).fetchone()
+        if row is None:
+            return None
+        current = json.loads(row[1])
+        record = dict(current, **changes)
+        if _key_value(record.get(field), field) != _key_value(current.get(field), field):
+            raise ValueError(f"{field} cannot be changed")
+        for k in unique:
+            if k in changes and _key_value(changes[k], k) != _key_value(current.get(k), k):
+                clash = conn.execute(f'SELECT 1 FROM {table} WHERE {k} = ? AND id != ? LIMIT 1',
+                                     (_key_value(changes[k], k), row[0])).fetchone()
+                if clash:
+                    raise ValueError(f"Duplicate {k}: {changes[k]}")
+        columns = ', '.join(f'{c} = ?' for c in ('dados',) + tuple(keys))
+        conn.execute(f'UPDATE {table} SET {columns} WHERE id = ?', _row_params(record, keys) + [row[0]])
+        _bump(conn, table)
+    return record
+
+
+def delete_by_key(db_path, filename, field, value):
+    table, _ = TABLES[filename]
+    conn = get_connection(db_path)
+    with _transaction(conn):
+        row = conn.execute(f'SELECT id FROM {table} WHERE {field} = ? LIMIT 1',
+                           (_key_value(value, field),)).fetchone()
+        if row is None:
+            return False
+        conn.execute(f'DELETE FROM {table} WHERE id = ?', (row[0],))
+        _bump(conn, table)
+    return True
+
+
+def _where(filename, criteria):
+    """
+    Builds a WHERE clause. Key columns use their index; other fields fall
+    back to json_extract over the stored record. Values are compared as text.
+    Field names are interpolated, so they must come from code, never from a request.
+    """
+    _, keys = TABLES[filename]
+    clauses, params = [], []
+    for field, value in criteria.items():
+        if field in keys:
+            clauses.append(f'{field} = ?')
+            params.append(_key_value(value, field))
+        else:
+            clauses.append(f"CAST(json_extract(dados, '$.{field}') AS TEXT) = ?")
+            params.append(_key_value(value))
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+def get_by_key(db_path, filename, field, value):
+    if filename not in TABLES:
+        return next((r for r in load(db_path, filename) if _key_value(r.get(field), field) == _key_value(value, field)), None)
+
+    table, _ = TABLES[filename]
+    where, params = _where(filename, {field: value})
+    row = get_connection(db_path).execute(f'SELECT dados FROM {table}{where} LIMIT 1', params).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def filter_data(db_path, filename, criteria):
+    if filename not in TABLES:
+        return [r for r in load(db_path, filename)
+                if all(_key_value(r.get(f), f) == _key_value(v, f) for f, v in criteria.items())]
+
+    table, _ = TABLES[filename]
+    where, params = _where(filename, criteria)
+    cursor = get_connection(db_path).execute(f'SELECT dados FROM {table}{where} ORDER BY id', params)
+    return [json.loads(r[0]) for r in cursor]
+
+
+def sum_field(db_path, filename, fields, criteria):
+    if filename not in TABLES:
+        return sum(_product(r, fields) for r in filter_data(db_path, filename, criteria))
+
+    table, _ = TABLES[filename]
+    expr = ' * '.join(f"json_extract(dados, '$.{f}')" for f in fields)
+    where, params = _where(filename, criteria)
+    # SUM keeps integers as integers (like Python's sum); COALESCE covers empty tables
+    row = get_connection(db_path).execute(f'SELECT COALESCE(SUM({expr}), 0) FROM {table}{where}', params).fetchone()
+    return row[0]
+
+
+def load_range(db_path, filename, field, start, end):
+    table, _ = TABLES[filename]
+    cursor = get_connection(db_path).execute(
+        f'SELECT dados FROM {table} WHERE {field} BETWEEN ? AND ? ORDER BY id', (start, end)
+    )
+    return [json.loads(r[0]) for r in cursor]
+
+
+def version(db_path, filename):
+    conn = get_connection(db_path)
+    if filename not in TABLES:
+        row = conn.execute(f'SELECT dados FROM {GENERIC_TABLE} WHERE nome = ?', (filename,)).fetchone()
+        return hash(row[0]) if row else None
+    # Every write bumps the table's revision (other connections included)
+    table, _ = TABLES[filename]
+    row = conn.execute(f'SELECT revisao FROM {VERSIONS_TABLE} WHERE tabela = ?', (table,)).fetchone()
+    return tuple(conn.execute(f'SELECT COUNT(*), MAX(id) FROM {table}').fetchone()) + (row[0] if row else 0,)
+
+
+def count(db_path, filename):
+    if filename not in TABLES:
+        return len(load(db_path, filename))
+    table, _ = TABLES[filename]
+    return get_connection(db_path).execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def _product(record, fields):
+    value = 1
+    for f in fields:
+        value *= record.get(f, 0)
+    return value
+
+
+def query_page(db_path, filename, sort, descending, q, search, offset, limit, after):
+    """
+    One page of a table, sorted by sort (then id) and filtered by a
+    case-insensitive substring q. after is the (sort value, id) of the previous
+    page's last row: the page continues from there (keyset) and offset is ignored.
+    Returns (items, total or None when q is set, cursor of the last item when
+    there is a next page, else None).
+    """
+    table, _ = TABLES[filename]
+    for field in (sort,) + tuple(search):
+        if field is not None and not field.isidentifier():
+            raise ValueError(f'Invalid field name: {field!r}')
+
+    # Sorted on the JSON value (not the text key column), so numbers sort as numbers
+    value = 'NULL' if sort is None else f"json_extract(dados, '$.{sort}')"
+    expr = f'{value} COLLATE NOCASE'
+    clauses, params = [], []
+
+    if q and q.strip():
+        needle = q.strip().lower()
+        fields = [f"lower(CAST(json_extract(dados, '$.{f}') AS TEXT))" for f in search] or ['lower(dados)']
+        clauses.append('(' + ' OR '.join(f'instr({f}, ?) > 0' for f in fields) + ')')
+        params += [needle] * len(fields)
+
+    if after is not None:
+        last_value, last_id = after
+        if sort is None:
+            clauses.append('id < ?' if descending else 'id > ?')
+            params.append(last_id)
+        elif descending:
+            # NULLs come last in descending order
+            if last_value is None:
+                clauses.append(f'({expr} IS NULL AND id < ?)')
+                params.append(last_id)
+            else:
+                clauses.append(f'({expr} < ? OR ({expr} = ? AND id < ?) OR {expr} IS NULL)')
+                params += [last_value, last_value, last_id]
+        else:
+            # NULLs come first in ascending order
+            if last_value is None:
+                clauses.append(f'({expr} IS NOT NULL OR id > ?)')
+                params.append(last_id)
+            else:
+                clauses.append(f'({expr} > ? OR ({expr} = ? AND id > ?))')
+                params += [last_value, last_value, last_id]
+        offset = 0
+
+    where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    direction = 'DESC' if descending else 'ASC'
+    order = f'id {direction}' if sort is None else f'{expr} {direction}, id {direction}'
+    conn = get_connection(db_path)
+    rows = conn.execute(
+        f'SELECT dados, {value}, id FROM {table}{where} ORDER BY {order} LIMIT ? OFFSET ?',
+        params + [limit + 1, offset]
+    ).fetchall()
+
+    items = [json.loads(r[0]) for r in rows[:limit]]
+    last = (rows[limit - 1][1], rows[limit - 1][2]) if len(rows) > limit else None
+    total = None if q and q.strip() else conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    return items, total, last
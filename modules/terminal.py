@@ -0,0 +1,135 @@
+# Módulo: Terminal
+# Descrição: Registro dos comandos do terminal web (nome -> função, perfis
+# permitidos, política de cache) e despacho, com a saída dos comandos de
+# leitura guardada até mudarem as coleções que eles leem.
+
+import threading
+
+try:
+    from modules import data_manager
+except ImportError:
+    import data_manager
+
+# nome ou apelido -> comando registrado (ver comando())
+COMANDOS = {}
+
+# Ordem dos grupos na ajuda
+GRUPOS = ["Geral", "CLI (Interface de Linha de Comando)", "Operacional", "Estoque", "Financeiro", "RH"]
+
+ACESSO_NEGADO = {
+    'output': '<span class="text-danger">Acesso negado! Você não tem permissão para este comando.</span>',
+    'type': 'error'
+}
+
+# Saídas guardadas: (comando, argumentos, usuário) -> (versão das coleções, resposta).
+# Ao passar de TAMANHO_CACHE entradas, as mais antigas são descartadas.
+TAMANHO_CACHE = 256
+_cache = {}
+_cache_lock = threading.Lock()
+_stats = {'execucoes': 0, 'acertos': 0}
+
+
+def comando(nome, *apelidos, perfis=None, colecoes=None, por_usuario=False, grupo="Geral", uso=None, ajuda=""):
+    """
+    Decorador que registra uma função como comando do terminal.
+
+    A função recebe (argumentos, contexto) - argumentos é a tupla de palavras
+    depois do nome e contexto tem 'usuario' e 'perfil' - e devolve o
+    dicionário da resposta ({'output': ..., 'type': ...}).
+
+    Args:
+        perfis (list, optional): Perfis que podem executar (None = todos)
+        colecoes (tuple, optional): Coleções lidas pelo comando. Se informadas,
+            a resposta fica em cache até a versão de alguma delas mudar; só
+            para comandos que não alteram dados.
+        por_usuario (bool): A resposta depende do usuário (entra na chave do cache)
+        grupo, uso, ajuda: Como o comando aparece na ajuda (uso=None: não aparece)
+    """
+    def registrar(funcao):
+        entrada = {
+            'nome': nome,
+            'funcao': funcao,
+            'perfis': perfis,
+            'colecoes': tuple(colecoes) if colecoes is not None else None,
+            'por_usuario': por_usuario,
+            'grupo': grupo,
+            'uso': uso,
+            'ajuda': ajuda,
+        }
+        for chave in (nome,) + apelidos:
+            COMANDOS[chave] = entrada
+        return funcao
+    return registrar
+
+
+def texto_ajuda():
+    """Lista dos comandos registrados, por grupo, no formato da tela de ajuda."""
+    por_grupo = {}
+    vistos = set()
+    for entrada in COMANDOS.values():
+        if entrada['uso'] is None or entrada['nome'] in vistos:
+            continue
+        vistos.add(entrada['nome'])
+        por_grupo.setdefault(entrada['grupo'], []).append(entrada)
+
+    grupos = GRUPOS + sorted(set(por_grupo) - set(GRUPOS))
+    linhas = ['', '<span class="text-primary">Comandos Disponíveis:</span>']
+    for grupo in grupos:
+        if grupo not in por_grupo:
+            continue
+        linhas += ['', f'<span class="text-success">{grupo}:</span>']
+        linhas += [f"  {entrada['uso']:<20} - {entrada['ajuda']}" for entrada in por_grupo[grupo]]
+    return "\n".join(linhas) + "\n"
+
+
+def executar(linha, usuario=None, perfil=None):
+    """
+    Executa uma linha digitada no terminal e devolve o dicionário da resposta.
+    Confere o perfil e, nos comandos com coleções, usa a saída guardada
+    enquanto nenhuma das coleções mudou de versão.
+    """
+    partes = linha.strip().lower().split()
+    entrada = COMANDOS.get(partes[0]) if partes else None
+    if entrada is None:
+        return {
+            'output': f'<span class="text-danger">Comando não reconhecido: "{linha.strip().lower()}"</span>\nDigite "help" para ver os comandos disponíveis.',
+            'type': 'error'
+        }
+    if entrada['perfis'] is not None and perfil not in entrada['perfis']:
+        return ACESSO_NEGADO
+
+    argumentos = tuple(partes[1:])
+    contexto = {'usuario': usuario, 'perfil': perfil}
+    if entrada['colecoes'] is None:
+        return entrada['funcao'](argumentos, contexto)
+
+    # A versão é lida antes de executar: se os dados mudarem no meio, a
+    # próxima chamada vê outra versão e executa de novo
+    versao = tuple(data_manager.data_version(c) for c in entrada['colecoes'])
+    chave = (entrada['nome'], argumentos, (usuario, perfil) if entrada['por_usuario'] else None)
+    with _cache_lock:
+        guardado = _cache.get(chave)
+        if guardado is not None and guardado[0] == versao:
+            _stats['acertos'] += 1
+            return guardado[1]
+
+    resposta = entrada['funcao'](argumentos, contexto)
+    with _cache_lock:
+        _stats['execucoes'] += 1
+        _cache.pop(chave, None)
+        _cache[chave] = (versao, resposta)
+        while len(_cache) > TAMANHO_CACHE:
+            del _cache[next(iter(_cache))]
+    return resposta
+
+
+def limpar_cache():
+    """Descarta todas as saídas guardadas."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def estatisticas():
+    """Quantas execuções de comandos com cache houve e quantas vieram do cache."""
+    with _cache_lock:
+        return dict(_stats)
@@ -0,0 +1,276 @@
+import sys
+import os
+import argparse
+import datetime
+import json
+import random
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data_manager, operacional, rh
+
+# Rows per collection for each named scale
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+COLLECTIONS = ('produtos', 'funcionarios', 'producao', 'despesas')
+
+# Production history: at most this many days, more lines per shift beyond it
+MAX_DAYS = 3650
+START_DATE = datetime.date(2016, 1, 4)
+
+PECAS = ['Motor V8', 'Motor 2.0 Flex', 'Chassi', 'Câmbio Automático', 'Câmbio Manual', 'Eixo Traseiro',
+         'Suspensão Dianteira', 'Radiador', 'Bateria 60Ah', 'Alternador', 'Painel Digital', 'Banco Dianteiro',
+         'Farol LED', 'Pneu 205/55 R16', 'Disco de Freio', 'Pastilha de Freio', 'Para-choque', 'Porta Dianteira']
+VARIANTES = ['Standard', 'Turbo', 'Reforçado', 'Premium', 'Econômico', 'Sport']
+FORNECEDORES = ['MotorTech Ltda', 'AçoBrasil S/A', 'AutoPeças Paulista', 'Eletro Auto', 'Borracharia Nacional',
+                'Vidros & Cia', 'Metalúrgica Sul', 'Plásticos do Vale']
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+         'Larissa', 'Marcos', 'Natália', 'Otávio', 'Patrícia', 'Rafael', 'Sabrina', 'Tiago', 'Vanessa', 'William']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira', 'Almeida',
+              'Ribeiro', 'Carvalho', 'Gomes', 'Martins', 'Rocha', 'Barbosa', 'Mendes']
+RUAS = ['Rua das Flores', 'Av. Brasil', 'Rua XV de Novembro', 'Av. Paulista', 'Rua da Indústria', 'Rua do Porto']
+DESPESAS = [('Agua', 'Água e Saneamento', 8_000), ('Luz', 'Energia Elétrica', 25_000),
+            ('Aluguel', 'Aluguel da Fábrica', 50_000), ('Manutencao', 'Manutenção Equipamentos', 15_000),
+            ('Seguranca', 'Segurança e Limpeza', 12_000), ('Impostos', 'Impostos e Taxas', 30_000)]
+
+def _rng(seed, collection):
+    # One independent stream per collection: generating only one of them gives the same rows
+    return random.Random(f"{seed}:{collection}")
+
+def _cpf(base):
+    """Formatted CPF with valid check digits for a 9-digit base."""
+    digitos = [int(c) for c in f"{base:09d}"]
+    for tamanho in (9, 10):
+        soma = sum(d * (tamanho + 1 - i) for i, d in enumerate(digitos))
+        digitos.append((soma * 10 // 11) % 10)
+    s = ''.join(map(str, digitos))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+def _matricula_sequenciais():
+    """
+    Matrícula sequentials in order, skipping the hex values above 999 that
+    are written with digits only (0x400 -> '400' would repeat sequential 400).
+    """
+    n = 1
+    while True:
+        if n <= 999 or not format(n, 'X').isdigit():
+            yield n
+        n += 1
+
+def gerar_produtos(n, seed):
+    rng = _rng(seed, 'produtos')
+    for i in range(n):
+        fabricacao = START_DATE + datetime.timedelta(days=rng.randrange(MAX_DAYS))
+        yield {
+            "codigo": 1001 + i,
+            "nome": f"{rng.choice(PECAS)} {rng.choice(VARIANTES)}",
+            "data_fabricacao": fabricacao.strftime('%d/%m/%Y'),
+            "fornecedor": rng.choice(FORNECEDORES),
+            "quantidade": rng.randint(1, 500),
+            "valor_compra": round(rng.uniform(20, 20_000), 2),
+        }
+
+def gerar_funcionarios(n, seed, ultimo):
+    """
+    Employees with cargos from rh.SETORES_DA_EMPRESA. CPFs come from an
+    affine permutation of the 9-digit bases and matrículas from distinct
+    sequentials, so both are unique without remembering the ones handed out.
+    ultimo: one-item list that receives the last sequential used.
+    """
+    rng = _rng(seed, 'funcionarios')
+    rng_matricula = _rng(seed, 'matricula')  # 6th digit of rh.gerar_matricula
+    cargos = [(setor, cargo, valor) for setor, itens in rh.SETORES_DA_EMPRESA.items() for cargo, valor in itens.items()]
+    passo = rng.randrange(1, 10**9, 2)
+    while passo % 5 == 0:
+        passo = rng.randrange(1, 10**9, 2)
+    deslocamento = rng.randrange(10**9)
+    seq = _matricula_sequenciais()
+    for i in range(n):
+        setor, cargo, valor = rng.choice(cargos)
+        sequencial = next(seq)
+        ultimo[0] = sequencial
+        cadastro = START_DATE + datetime.timedelta(days=rng.randrange(MAX_DAYS), seconds=rng.randrange(86400))
+        yield {
+            "nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+            "cpf": _cpf((passo * i + deslocamento) % 10**9),
+            "rg": f"{rng.randrange(10**8):08d}-{rng.randrange(10)}",
+            "CTPS": f"{rng.randrange(10**5):05d}",
+            "endereco": f"{rng.choice(RUAS)} {rng.randint(1, 3000)}",
+            "telefone": f"(11) 9{rng.randrange(10**4):04d}-{rng.randrange(10**4):04d}",
+            "qtd_filhos": rng.choice((0, 0, 0, 1, 1, 2, 3)),
+            "cargo": cargo,
+            "valor_hora": valor,
+            "matricula": rh.gerar_matricula(setor, cargo, sequencial=sequencial, avisar=False, rng=rng_matricula),
+            "data_cadastro": cadastro.strftime('%d/%m/%Y %H:%M:%S'),
+        }
+
+def gerar_producao(n, seed):
+    """Chronological rows: every day, each shift, on as many lines as n needs."""
+    rng = _rng(seed, 'producao')
+    linhas = -(-n // (len(operacional.TURNOS) * MAX_DAYS))
+    dia, feitos = START_DATE, 0
+    while feitos < n:
+        for turno in operacional.TURNOS:
+            for linha in range(linhas):
+                if feitos == n:
+                    return
+                yield {
+                    "dia": operacional.DIAS_SEMANA[dia.weekday()],
+                    "turno": turno,
+                    "quantidade": rng.randint(15, 40),
+                    "data": dia.isoformat(),
+                    "linha": f"L{linha + 1:03d}",
+                }
+                feitos += 1
+        dia += datetime.timedelta(days=1)
+
+def gerar_despesas(n, seed):
+    """Monthly bills, in order, spread over the same MAX_DAYS window."""
+    rng = _rng(seed, 'despesas')
+    meses = MAX_DAYS * 12 // 365
+    for i in range(n):
+        tipo, descricao, base = DESPESAS[i % len(DESPESAS)]
+        mes = i * meses // n
+        yield {
+            "tipo": tipo,
+            "descricao": descricao,
+            "valor": round(base * rng.uniform(0.8, 1.25), 2),
+            "data": f"{START_DATE.year + mes // 12:04d}-{mes % 12 + 1:02d}-01",
+        }
+
+class _JsonArrayWriter:
+    """Writes a JSON array one record per line, to a temp file renamed on close."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+        self.file.write('[')
+        self.count = 0
+
+    def write(self, record):
+        self.file.write(('\n' if self.count == 0 else ',\n') + json.dumps(record, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self.file.write('\n]\n' if self.count else ']\n')
+        data_manager.set_file_mode(self.file.fileno(), self.path)
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+def _reset(filename):
+    """Removes the append log of a collection (and the segments of a partitioned one)."""
+    if os.path.exists(data_manager._log_path(filename)):
+        os.remove(data_manager._log_path(filename))
+    if filename in data_manager.PARTITIONED_FILES:
+        shutil.rmtree(os.path.join(data_manager.DATA_DIR, os.path.splitext(filename)[0]), ignore_errors=True)
+
+def _write_collection(filename, records, progress):
+    _reset(filename)
+    writer = _JsonArrayWriter(os.path.join(data_manager.DATA_DIR, filename))
+    for record in records:
+        writer.write(record)
+        progress()
+    writer.close()
+    return writer.count
+
+def _write_partitioned(filename, records, progress):
+    """
+    Chronological records straight into their monthly segments (one file
+    open at a time) and an empty base file; yields the records it wrote.
+    """
+    _reset(filename)
+    _JsonArrayWriter(os.path.join(data_manager.DATA_DIR, filename)).close()
+    writer, mes = None, None
+    try:
+        for record in records:
+            chave = data_manager._partition_key(filename, record)
+            if chave != mes:
+                if writer is not None:
+                    writer.close()
+                writer, mes = _JsonArrayWriter(os.path.join(data_manager.DATA_DIR, data_manager._segment_name(filename, chave))), chave
+            writer.write(record)
+            progress()
+            yield record
+    finally:
+        if writer is not None:
+            writer.close()
+
+def generate_dataset(out_dir, rows, seed=42, collections=COLLECTIONS, verbose=True):
+    """
+    Writes synthetic produtos, funcionarios, producao and despesas
+    collections with rows records each into out_dir, in the layout
+    data_manager reads (monthly producao segments, rollup and matrícula
+    counter included). Same seed and rows -> same files.
+    Records are streamed to disk as they are generated, so memory use does
+    not grow with rows. Returns {collection: records written}.
+    """
+    data_manager.DATA_DIR = os.path.abspath(out_dir)
+    os.makedirs(data_manager.DATA_DIR, exist_ok=True)
+    data_manager.invalidate_cache()
+    inicio = time.perf_counter()
+    escritos = {}
+
+    def progresso(nome):
+        contador = [0]
+        def tick():
+            contador[0] += 1
+            if verbose and contador[0] % 1_000_000 == 0:
+                print(f"  {nome}: {contador[0]:,} rows ({time.perf_counter() - inicio:.0f}s)")
+        return tick
+
+    for nome in collections:
+        filename = nome + '.json'
+        if nome == 'producao':
+            linhas = _write_partitioned(filename, gerar_producao(rows, seed), progresso(nome))
+            rollup = operacional.calcular_rollup(linhas)
+            rollup["versao"] = operacional.versao_producao()
+            data_manager.save_data(operacional.ROLLUP_FILE, rollup)
+            escritos[nome] = rollup["registros"]
+        elif nome == 'funcionarios':
+            ultimo = [0]
+            escritos[nome] = _write_collection(filename, gerar_funcionarios(rows, seed, ultimo), progresso(nome))
+            contadores = data_manager.load_data(data_manager.SEQUENCES_FILE)
+            contadores = contadores if isinstance(contadores, dict) else {}
+            contadores[rh.SEQUENCIA_MATRICULA] = ultimo[0]
+            data_manager.save_data(data_manager.SEQUENCES_FILE, contadores)
+        elif nome == 'produtos':
+            escritos[nome] = _write_collection(filename, gerar_produtos(rows, seed), progresso(nome))
+        elif nome == 'despesas':
+            escritos[nome] = _write_collection(filename, gerar_despesas(rows, seed), progresso(nome))
+        else:
+            raise ValueError(f"Unknown collection: {nome}")
+        if verbose:
+            print(f"[OK] {filename}: {escritos[nome]:,} record(s)")
+
+    data_manager.invalidate_cache()
+    return escritos
+
+def _rows(valor):
+    valor = valor.lower()
+    if valor in SCALES:
+        return SCALES[valor]
+    try:
+        return int(valor.replace('_', ''))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"use one of {', '.join(SCALES)} or a number of rows")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates a synthetic Carangos dataset.")
+    parser.add_argument('out_dir', help="target data directory (use it with DATA_DIR=...)")
+    parser.add_argument('--scale', type=_rows, default=SCALES['1k'],
+                        help=f"rows per collection: {', '.join(SCALES)} or a number (default 1k)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', default=','.join(COLLECTIONS),
+                        help="comma-separated collections (default: all)")
+    args = parser.parse_args()
+
+    colecoes = [c.strip() for c in args.only.split(',') if c.strip()]
+    desconhecidas = set(colecoes) - set(COLLECTIONS)
+    if desconhecidas:
+        parser.error(f"unknown collection(s): {', '.join(sorted(desconhecidas))}")
+    print(f"--- Generating {args.scale:,} rows per collection in {args.out_dir} (seed {args.seed}) ---")
+    generate_dataset(args.out_dir, args.scale, args.seed, colecoes)
+    print("--- Generation Complete ---")
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data_manager, sqlite_backend
+
+def migrate_to_sqlite():
+    """
+    Copies the JSON collections in DATA_DIR into the SQLite database used
+    when DATA_BACKEND=sqlite. Existing rows of each table are replaced.
+    """
+    db_path = data_manager.SQLITE_PATH or os.path.join(data_manager.DATA_DIR, 'carangos.db')
+    print(f"--- Migrating JSON data to {db_path} ---")
+
+    for filename in sqlite_backend.TABLES:
+        # Reads through the JSON backend regardless of DATA_BACKEND
+        data_manager.DATA_BACKEND = 'json'
+        records = data_manager.load_data(filename)
+
+        sqlite_backend.save(db_path, filename, records)
+        print(f"[OK] {filename}: {len(records)} record(s)")
+
+    print("--- Migration Complete ---")
+
+if __name__ == "__main__":
+    migrate_to_sqlite()
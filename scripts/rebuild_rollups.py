@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data_manager, operacional
+
+def rebuild_rollups():
+    """
+    Recomputes the production rollups from the raw rows in producao.json,
+    compares them with the incrementally maintained ones and saves the result.
+    Returns True when the maintained rollups were already correct.
+    """
+    print(f"--- Rebuilding {operacional.ROLLUP_FILE} ---")
+    divergencias = operacional.reconstruir_rollup()
+
+    rollup = data_manager.load_data(operacional.ROLLUP_FILE)
+    print(f"Rows: {rollup['registros']} | Total: {rollup['total']}")
+
+    if divergencias:
+        print(f"[FIXED] Incremental rollup differed in: {', '.join(divergencias)}")
+    else:
+        print("[OK] Incremental rollup matches the raw data")
+
+    print("--- Rebuild Complete ---")
+    return not divergencias
+
+if __name__ == "__main__":
+    sys.exit(0 if rebuild_rollups() else 1)
@@ -14,6 +14,10 @@ class CarangosAppTestCase(unittest.TestCase):
             filepath = os.path.join('data', filename)
             if os.path.exists(filepath):
                 os.remove(filepath)
+            # Coleções append-only também guardam linhas no log
+            logpath = os.path.join('data', filename.replace('.json', '.log.jsonl'))
+            if os.path.exists(logpath):
+                os.remove(logpath)
                 
         app.config['TESTING'] = True
         app.config['WTF_CSRF_ENABLED'] = False
@@ -0,0 +1,471 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+import shutil
+import threading
+import multiprocessing
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from modules import data_manager, sqlite_backend
+
+
+class TestDataManagerCache(unittest.TestCase):
+
+    def setUp(self):
+        """Usa um diretório de dados temporário para cada teste"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        data_manager.reset_cache_stats()
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_segunda_leitura_usa_cache(self):
+        """Testa se a segunda leitura não reprocessa o arquivo"""
+        data_manager.save_data('produtos.json', [{'codigo': 'P1', 'quantidade': 1}])
+
+        data_manager.load_data('produtos.json')
+        data_manager.load_data('produtos.json')
+
+        stats = data_manager.cache_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_alteracao_externa_invalida_cache(self):
+        """Testa se uma escrita fora do data_manager é detectada pelo mtime/tamanho"""
+        data_manager.save_data('produtos.json', [{'codigo': 'P1'}])
+        self.assertEqual(len(data_manager.load_data('produtos.json')), 1)
+
+        filepath = os.path.join(self.tmpdir, 'produtos.json')
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump([{'codigo': 'P1'}, {'codigo': 'P2'}], f)
+
+        self.assertEqual(len(data_manager.load_data('produtos.json')), 2)
+
+    def test_copia_nao_corrompe_cache(self):
+        """Testa se alterar o resultado de load_data não afeta leituras seguintes"""
+        data_manager.save_data('produtos.json', [{'codigo': 'P1', 'quantidade': 1}])
+
+        produtos = data_manager.load_data('produtos.json')
+        produtos[0]['quantidade'] = 999
+        produtos.append({'codigo': 'P2'})
+
+        novamente = data_manager.load_data('produtos.json')
+        self.assertEqual(novamente, [{'codigo': 'P1', 'quantidade': 1}])
+
+    def test_view_somente_leitura(self):
+        """Testa se load_view impede alterações nos registros"""
+        data_manager.save_data('producao.json', [{'dia': 'Segunda', 'turno': 'Manhã', 'quantidade': 10}])
+
+        view = data_manager.load_view('producao.json')
+        self.assertEqual(sum(row['quantidade'] for row in view), 10)
+        with self.assertRaises(TypeError):
+            view[0]['quantidade'] = 0
+
+
+class TestDataManagerLog(unittest.TestCase):
+
+    def setUp(self):
+        """Usa um diretório de dados temporário para cada teste"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        self.registro = {'dia': 'Segunda', 'turno': 'Manhã', 'quantidade': 10}
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_append_nao_reescreve_snapshot(self):
+        """Testa se o append grava apenas no log, preservando o snapshot"""
+        data_manager.save_data('producao.json', [self.registro])
+        snapshot = os.path.join(self.tmpdir, 'producao.json')
+        antes = os.stat(snapshot).st_mtime_ns
+
+        data_manager.append_data('producao.json', {'dia': 'Terça', 'turno': 'Noite', 'quantidade': 5})
+
+        self.assertEqual(os.stat(snapshot).st_mtime_ns, antes)
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir, 'producao.log.jsonl')))
+        dados = data_manager.load_data('producao.json')
+        self.assertEqual(len(dados), 2)
+        self.assertEqual(dados[1], {'dia': 'Terça', 'turno': 'Noite', 'quantidade': 5})
+
+    def test_compactacao(self):
+        """Testa se compactar move o log para o snapshot sem perder linhas"""
+        data_manager.extend_data('producao.json', [self.registro] * 3)
+        data_manager.compact('producao.json')
+
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, 'producao.log.jsonl')))
+        with open(os.path.join(self.tmpdir, 'producao.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [self.registro] * 3)
+
+    def test_linha_truncada_ignorada(self):
+        """Testa se uma linha incompleta no fim do log não descarta o resto"""
+        data_manager.append_data('producao.json', self.registro)
+        with open(os.path.join(self.tmpdir, 'producao.log.jsonl'), 'a', encoding='utf-8') as f:
+            f.write('{"dia": "Ter')
+
+        self.assertEqual(data_manager.load_data('producao.json'), [self.registro])
+
+        # O próximo append começa em uma linha nova e não se perde
+        data_manager.append_data('producao.json', self.registro)
+        self.assertEqual(data_manager.load_data('producao.json'), [self.registro] * 2)
+
+    def test_segmentos_mensais(self):
+        """Testa a divisão por mês, a leitura completa e a consulta por intervalo"""
+        antigo = dict(self.registro)
+        setembro = dict(self.registro, data='2026-09-30')
+        outubro = dict(self.registro, data='2026-10-01')
+        data_manager.save_data('producao.json', [antigo, outubro])
+        data_manager.append_data('producao.json', setembro)
+
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir, 'producao', '2026-10.json')))
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir, 'producao', '2026-09.log.jsonl')))
+        # Base (sem data) primeiro, depois os meses em ordem cronológica
+        self.assertEqual(data_manager.load_data('producao.json'), [antigo, setembro, outubro])
+        self.assertEqual(list(data_manager.iter_data('producao.json')), [antigo, setembro, outubro])
+        self.assertEqual(data_manager.load_range('producao.json', '2026-10-01', '2026-12-31'), [outubro])
+
+        # Regravar sem um mês remove o segmento dele
+        data_manager.save_data('producao.json', [antigo])
+        self.assertEqual(data_manager.load_data('producao.json'), [antigo])
+        self.assertEqual(os.listdir(os.path.join(self.tmpdir, 'producao')), [])
+
+    def test_indice_codigo_produto(self):
+        """Testa busca e duplicidade pelo índice de código (snapshot e log, código normalizado)"""
+        data_manager.save_data('produtos.json', [{'codigo': 2, 'nome': 'Pneu'}])
+        self.assertTrue(data_manager.insert_unique('produtos.json', {'codigo': 'P003', 'nome': 'Volante'}))
+
+        self.assertEqual(data_manager.get_by_key('produtos.json', 'codigo', '2')['nome'], 'Pneu')
+        self.assertEqual(data_manager.get_by_key('produtos.json', 'codigo', 'P003')['nome'], 'Volante')
+        self.assertIsNone(data_manager.get_by_key('produtos.json', 'codigo', 'P004'))
+
+        self.assertFalse(data_manager.insert_unique('produtos.json', {'codigo': ' 2 ', 'nome': 'Outro'}))
+        self.assertFalse(data_manager.insert_unique('produtos.json', {'codigo': 'P003', 'nome': 'Outro'}))
+        self.assertEqual(data_manager.count_data('produtos.json'), 2)
+
+    def test_alteracao_e_remocao_pontuais(self):
+        """Testa update/delete por CPF sem regravar o snapshot, com índices de CPF e matrícula"""
+        data_manager.save_data('funcionarios.json', [
+            {'nome': 'Ana', 'cpf': '123.456.789-00', 'matricula': '120015'},
+            {'nome': 'Bia', 'cpf': '987.654.321-00', 'matricula': '130027'},
+        ])
+        data_manager.append_data('funcionarios.json', {'nome': 'Caio', 'cpf': '11122233344', 'matricula': '110038'})
+        snapshot = os.path.join(self.tmpdir, 'funcionarios.json')
+        antes = os.stat(snapshot).st_mtime_ns
+
+        # CPF normalizado: com ou sem pontuação
+        self.assertEqual(data_manager.get_by_key('funcionarios.json', 'cpf', '12345678900')['nome'], 'Ana')
+        self.assertEqual(data_manager.update_by_key('funcionarios.json', '123.456.789-00', {'nome': 'Ana Maria'})['nome'], 'Ana Maria')
+        self.assertTrue(data_manager.delete_by_key('funcionarios.json', '98765432100'))
+        self.assertFalse(data_manager.delete_by_key('funcionarios.json', '98765432100'))
+        self.assertIsNone(data_manager.update_by_key('funcionarios.json', '000', {'nome': 'X'}))
+        self.assertEqual(os.stat(snapshot).st_mtime_ns, antes)
+
+        self.assertEqual([f['nome'] for f in data_manager.load_data('funcionarios.json')], ['Ana Maria', 'Caio'])
+        self.assertEqual([f['nome'] for f in data_manager.iter_data('funcionarios.json')], ['Ana Maria', 'Caio'])
+        self.assertEqual(data_manager.get_by_key('funcionarios.json', 'matricula', '120015')['nome'], 'Ana Maria')
+        self.assertIsNone(data_manager.get_by_key('funcionarios.json', 'matricula', '130027'))
+
+        # Unicidade de CPF e matrícula; CPF removido pode voltar
+        self.assertFalse(data_manager.insert_unique('funcionarios.json', {'nome': 'Dup', 'cpf': '111.222.333-44', 'matricula': '1'}))
+        self.assertFalse(data_manager.insert_unique('funcionarios.json', {'nome': 'Dup', 'cpf': '1', 'matricula': '110038'}))
+        self.assertTrue(data_manager.insert_unique('funcionarios.json', {'nome': 'Bia', 'cpf': '987.654.321-00', 'matricula': '130027'}))
+        self.assertEqual(data_manager.get_by_key('funcionarios.json', 'cpf', '98765432100')['nome'], 'Bia')
+        with self.assertRaises(ValueError):
+            data_manager.update_by_key('funcionarios.json', '12345678900', {'matricula': '110038'})
+
+        # A compactação aplica as alterações no snapshot
+        data_manager.compact('funcionarios.json')
+        with open(snapshot, encoding='utf-8') as f:
+            self.assertEqual([r['nome'] for r in json.load(f)], ['Ana Maria', 'Caio', 'Bia'])
+
+    def test_iter_data_stream(self):
+        """Testa a leitura em streaming de snapshot + log"""
+        data_manager.save_data('producao.json', [self.registro])
+        data_manager.append_data('producao.json', self.registro)
+
+        self.assertEqual(list(data_manager.iter_data('producao.json')), [self.registro] * 2)
+
+    def test_paginacao(self):
+        """Testa página por offset e por cursor, ordenação (com empates) e busca no backend JSON"""
+        produtos = _produtos_paginacao()
+        data_manager.save_data('produtos.json', produtos)
+
+        pagina = data_manager.query_page('produtos.json', sort='quantidade', page=2, per_page=5)
+        self.assertEqual(pagina['total'], 23)
+        # Empates mantêm a ordem de gravação
+        por_quantidade = sorted(produtos, key=lambda p: p['quantidade'])
+        self.assertEqual([p['codigo'] for p in pagina['items']], [p['codigo'] for p in por_quantidade[5:10]])
+        self.assertEqual(_percorrer_paginas('produtos.json', sort='quantidade', per_page=5),
+                         [p['codigo'] for p in por_quantidade])
+        self.assertEqual(_percorrer_paginas('produtos.json', sort='codigo', descending=True, per_page=4),
+                         list(range(23, 0, -1)))
+
+        # Busca sem diferenciar maiúsculas; com busca o total não é contado
+        aco = [p['codigo'] for p in produtos if p['nome'] and 'aço' in p['nome'].lower()]
+        self.assertEqual(_percorrer_paginas('produtos.json', sort='codigo', q='AÇO', search=('nome',), per_page=3), aco)
+        pagina = data_manager.query_page('produtos.json', sort='codigo', q='aço', search=('nome',), page=2, per_page=3)
+        self.assertIsNone(pagina['total'])
+        self.assertEqual([p['codigo'] for p in pagina['items']], aco[3:6])
+
+        # Página seguinte pelo cursor: continua depois do último item mesmo com inserções antes dele
+        pagina = data_manager.query_page('produtos.json', sort='codigo', per_page=10)
+        data_manager.append_data('produtos.json', {'codigo': 0, 'nome': 'Novo', 'quantidade': 1})
+        seguinte = data_manager.query_page('produtos.json', sort='codigo', per_page=10, after=pagina['next'])
+        self.assertEqual(seguinte['items'][0]['codigo'], 11)
+        with self.assertRaises(ValueError):
+            data_manager.query_page('produtos.json', after='nao-e-cursor')
+        # JSON válido com formato errado (ou null) também é rejeitado
+        for posicao in (5, 'x', [1, 'x'], [1, 2, 3], None, [[9, 'a'], 1], {'a': 1}):
+            with self.assertRaises(ValueError):
+                data_manager.query_page('produtos.json', after=data_manager.encode_cursor(posicao))
+
+def _percorrer_paginas(filename, **kwargs):
+    """Segue os cursores de query_page até a última página; devolve os códigos na ordem"""
+    codigos, cursor = [], None
+    while True:
+        pagina = data_manager.query_page(filename, after=cursor, **kwargs)
+        codigos += [p['codigo'] for p in pagina['items']]
+        cursor = pagina['next']
+        if cursor is None:
+            return codigos
+
+
+def _produtos_paginacao():
+    nomes = ['Pneu', 'aço', 'Aço inox', 'Vidro', None]
+    return [{'codigo': i, 'nome': nomes[i % 5], 'quantidade': i % 3} for i in range(1, 24)]
+
+
+def _processo_incrementa(data_dir, vezes):
+    """Processo filho: read-modify-write concorrente na mesma coleção"""
+    data_manager.DATA_DIR = data_dir
+    for _ in range(vezes):
+        with data_manager.file_lock('contador.json'):
+            dados = data_manager.load_data('contador.json')
+            dados.append(os.getpid())
+            data_manager.save_data('contador.json', dados)
+
+
+def _processo_sequencia(data_dir, vezes, fila):
+    """Processo filho: reserva valores do mesmo contador persistido"""
+    data_manager.DATA_DIR = data_dir
+    fila.put([data_manager.next_sequence('teste') for _ in range(vezes)])
+
+
+class TestDataManagerConcorrencia(unittest.TestCase):
+
+    def setUp(self):
+        """Usa um diretório de dados temporário para cada teste"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_appends_concorrentes_sem_perda(self):
+        """Testa 16 threads anexando ao log (com compactações no meio) sem perder registros"""
+        def trabalhador(t):
+            for i in range(250):
+                data_manager.append_data('producao.json', {'id': f'{t}-{i}', 'quantidade': 1})
+
+        with patch.object(data_manager, 'COMPACT_THRESHOLD', 8 * 1024):
+            threads = [threading.Thread(target=trabalhador, args=(t,)) for t in range(16)]
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+
+        dados = data_manager.load_data('producao.json')
+        self.assertEqual(len(dados), 4000)
+        self.assertEqual(len({r['id'] for r in dados}), 4000)
+
+    @unittest.skipUnless(data_manager.fcntl and 'fork' in multiprocessing.get_all_start_methods(), "Requer fcntl e fork")
+    def test_read_modify_write_entre_processos(self):
+        """Testa 4 processos (como workers do gunicorn) alterando a mesma coleção sem perder escritas"""
+        ctx = multiprocessing.get_context('fork')
+        processos = [ctx.Process(target=_processo_incrementa, args=(self.tmpdir, 100)) for _ in range(4)]
+        for p in processos:
+            p.start()
+        for p in processos:
+            p.join(60)
+            self.assertEqual(p.exitcode, 0)
+
+        self.assertEqual(len(data_manager.load_data('contador.json')), 400)
+
+    @unittest.skipUnless(data_manager.fcntl and 'fork' in multiprocessing.get_all_start_methods(), "Requer fcntl e fork")
+    def test_sequencia_sem_repeticao_entre_processos(self):
+        """Testa o contador persistido: 4 processos nunca recebem o mesmo valor"""
+        self.assertEqual(data_manager.next_sequence('teste', recover=lambda: 41), 42)
+        self.assertEqual(data_manager.next_sequence('teste', count=10), 43)
+
+        ctx = multiprocessing.get_context('fork')
+        fila = ctx.Queue()
+        processos = [ctx.Process(target=_processo_sequencia, args=(self.tmpdir, 50, fila)) for _ in range(4)]
+        for p in processos:
+            p.start()
+        valores = [v for _ in processos for v in fila.get(timeout=60)]
+        for p in processos:
+            p.join(60)
+            self.assertEqual(p.exitcode, 0)
+
+        self.assertEqual(sorted(valores), list(range(53, 253)))
+        # A recuperação só vale enquanto o contador não existe
+        self.assertEqual(data_manager.next_sequence('teste', recover=lambda: 0), 253)
+
+    def test_falha_na_escrita_preserva_arquivo(self):
+        """Testa se um erro no meio da gravação mantém o conteúdo anterior intacto"""
+        data_manager.save_data('produtos.json', [{'codigo': 'P1'}])
+
+        with patch('modules.data_manager.json.dump', side_effect=OSError('disco cheio')):
+            self.assertFalse(data_manager.save_data('produtos.json', [{'codigo': 'P2'}]))
+
+        self.assertEqual(data_manager.load_data('produtos.json'), [{'codigo': 'P1'}])
+        self.assertFalse([n for n in os.listdir(self.tmpdir) if n.endswith('.tmp')])
+
+    @unittest.skipUnless(hasattr(os, 'fchmod'), "Requer permissões POSIX")
+    def test_gravacao_preserva_permissoes(self):
+        """Testa se reescrever uma coleção mantém o modo do arquivo (mkstemp cria 0600)"""
+        caminho = os.path.join(self.tmpdir, 'despesas.json')
+        data_manager.save_data('despesas.json', [])
+        self.assertEqual(os.stat(caminho).st_mode & 0o777, 0o666 & ~data_manager._UMASK)
+
+        os.chmod(caminho, 0o644)
+        data_manager.save_data('despesas.json', [{'valor': 1}])
+        self.assertEqual(os.stat(caminho).st_mode & 0o777, 0o644)
+
+
+class TestDataManagerSQLite(unittest.TestCase):
+
+    def setUp(self):
+        """Seleciona o backend SQLite com um banco temporário"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patchers = [
+            patch.object(data_manager, 'DATA_BACKEND', 'sqlite'),
+            patch.object(data_manager, 'SQLITE_PATH', os.path.join(self.tmpdir, 'teste.db')),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.produtos = [
+            {'codigo': 'P001', 'nome': 'Roda', 'quantidade': 4, 'valor_compra': 100.0},
+            {'codigo': 2, 'nome': 'Pneu', 'quantidade': 10, 'valor_compra': 50.0},
+        ]
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        sqlite_backend.close_connections()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_mesma_api_load_save(self):
+        """Testa se load/save/append se comportam como no backend JSON"""
+        self.assertEqual(data_manager.load_data('produtos.json'), [])
+        data_manager.save_data('produtos.json', self.produtos)
+        data_manager.append_data('produtos.json', {'codigo': 'P003', 'nome': 'Volante', 'quantidade': 1, 'valor_compra': 300.0})
+
+        dados = data_manager.load_data('produtos.json')
+        self.assertEqual(dados[:2], self.produtos)
+        self.assertEqual(len(dados), 3)
+
+        # Arquivos fora do esquema são guardados inteiros
+        data_manager.save_data('config_teste.json', {'meta': 750})
+        self.assertEqual(data_manager.load_data('config_teste.json'), {'meta': 750})
+
+    def test_consultas_indexadas(self):
+        """Testa busca por chave, filtro e somas feitas no banco"""
+        data_manager.save_data('produtos.json', self.produtos)
+        data_manager.save_data('producao.json', [
+            {'dia': 'Segunda', 'turno': 'Manhã', 'quantidade': 10},
+            {'dia': 'Segunda', 'turno': 'Noite', 'quantidade': 5},
+            {'dia': 'Terça', 'turno': 'Manhã', 'quantidade': 7},
+        ])
+
+        self.assertEqual(data_manager.get_by_key('produtos.json', 'codigo', '2')['nome'], 'Pneu')
+        self.assertIsNone(data_manager.get_by_key('produtos.json', 'codigo', 'X'))
+        self.assertEqual(len(data_manager.filter_data('producao.json', dia='Segunda')), 2)
+        self.assertEqual(data_manager.sum_field('producao.json', 'quantidade'), 22)
+        self.assertEqual(data_manager.sum_field('producao.json', 'quantidade', turno='Manhã'), 17)
+        self.assertAlmostEqual(data_manager.sum_field('produtos.json', 'quantidade', 'valor_compra'), 900.0)
+        self.assertEqual(data_manager.count_data('produtos.json'), 2)
+
+        data_manager.append_data('producao.json', {'dia': 'Quinta', 'turno': 'Noite', 'quantidade': 3, 'data': '2026-10-01'})
+        self.assertEqual(len(data_manager.load_range('producao.json', '2026-10-01', '2026-10-31')), 1)
+
+    def test_alteracao_e_remocao_pontuais(self):
+        """Testa update/delete por CPF normalizado no banco"""
+        data_manager.save_data('funcionarios.json', [
+            {'nome': 'Ana', 'cpf': '123.456.789-00', 'matricula': '120015'},
+            {'nome': 'Bia', 'cpf': '987.654.321-00', 'matricula': '130027'},
+        ])
+        versao = data_manager.data_version('funcionarios.json')
+
+        self.assertEqual(data_manager.update_by_key('funcionarios.json', '12345678900', {'nome': 'Ana Maria'})['nome'], 'Ana Maria')
+        self.assertNotEqual(data_manager.data_version('funcionarios.json'), versao)
+        with self.assertRaises(ValueError):
+            data_manager.update_by_key('funcionarios.json', '12345678900', {'matricula': '130027'})
+        self.assertTrue(data_manager.delete_by_key('funcionarios.json', '987.654.321-00'))
+        self.assertFalse(data_manager.delete_by_key('funcionarios.json', '987.654.321-00'))
+        self.assertEqual(data_manager.load_data('funcionarios.json'),
+                         [{'nome': 'Ana Maria', 'cpf': '123.456.789-00', 'matricula': '120015'}])
+
+    def test_paginacao(self):
+        """Testa página por offset e por cursor, ordenação (com empates) e busca no banco"""
+        produtos = _produtos_paginacao()
+        data_manager.save_data('produtos.json', produtos)
+
+        pagina = data_manager.query_page('produtos.json', sort='quantidade', page=2, per_page=5)
+        self.assertEqual(pagina['total'], 23)
+        # Empates mantêm a ordem de gravação
+        por_quantidade = sorted(produtos, key=lambda p: p['quantidade'])
+        self.assertEqual([p['codigo'] for p in pagina['items']], [p['codigo'] for p in por_quantidade[5:10]])
+        self.assertEqual(_percorrer_paginas('produtos.json', sort='quantidade', per_page=5),
+                         [p['codigo'] for p in por_quantidade])
+        self.assertEqual(_percorrer_paginas('produtos.json', sort='codigo', descending=True, per_page=4),
+                         list(range(23, 0, -1)))
+
+        # Busca sem diferenciar maiúsculas; com busca o total não é contado
+        aco = [p['codigo'] for p in produtos if p['nome'] and 'aço' in p['nome'].lower()]
+        self.assertEqual(_percorrer_paginas('produtos.json', sort='codigo', q='AÇO', search=('nome',), per_page=3), aco)
+        pagina = data_manager.query_page('produtos.json', sort='codigo', q='aço', search=('nome',), page=2, per_page=3)
+        self.assertIsNone(pagina['total'])
+        self.assertEqual([p['codigo'] for p in pagina['items']], aco[3:6])
+
+        # Página seguinte pelo cursor: continua depois do último item mesmo com inserções antes dele
+        pagina = data_manager.query_page('produtos.json', sort='codigo', per_page=10)
+        data_manager.append_data('produtos.json', {'codigo': 0, 'nome': 'Novo', 'quantidade': 1})
+        seguinte = data_manager.query_page('produtos.json', sort='codigo', per_page=10, after=pagina['next'])
+        self.assertEqual(seguinte['items'][0]['codigo'], 11)
+        with self.assertRaises(ValueError):
+            data_manager.query_page('produtos.json', after='nao-e-cursor')
+        # JSON válido com formato errado (ou null) também é rejeitado
+        for posicao in (5, 'x', [1, 'x'], [1, 2, 3], None, [[9, 'a'], 1], {'a': 1}):
+            with self.assertRaises(ValueError):
+                data_manager.query_page('produtos.json', after=data_manager.encode_cursor(posicao))
+
+    def test_consultas_backend_json(self):
+        """Testa se os mesmos helpers funcionam no backend JSON"""
+        with patch.object(data_manager, 'DATA_BACKEND', 'json'), patch.object(data_manager, 'DATA_DIR', self.tmpdir):
+            data_manager.save_data('produtos.json', self.produtos)
+            self.assertEqual(data_manager.get_by_key('produtos.json', 'codigo', 2)['nome'], 'Pneu')
+            self.assertAlmostEqual(data_manager.sum_field('produtos.json', 'quantidade', 'valor_compra'), 900.0)
+            self.assertEqual(data_manager.count_data('produtos.json'), 2)
+            data_manager.invalidate_cache()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+import shutil
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from modules import estoque, data_manager
+
+class TestEstoque(unittest.TestCase):
+
+    def setUp(self):
+        """Catálogo pequeno em um diretório de dados temporário"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        data_manager.save_data('produtos.json', [
+            {"codigo": "P001", "nome": "Pneu Aro 15", "fornecedor": "Borrachas SA", "quantidade": 4, "valor_compra": 300.0},
+            {"codigo": "C010", "nome": "Câmbio Manual", "fornecedor": "Transmissões Ltda", "quantidade": 2, "valor_compra": 2500.0},
+            {"codigo": "C011", "nome": "Cabo de Câmbio", "fornecedor": "Transmissões Ltda", "quantidade": 10, "valor_compra": 80.0},
+            {"codigo": "P002", "nome": "Parafuso", "fornecedor": "Pneu & Cia", "quantidade": 500, "valor_compra": 0.5},
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_busca_sem_acento_e_por_prefixo(self):
+        """Testa se 'cambio' e 'câm' encontram 'Câmbio' e se a ordem segue a relevância"""
+        self.assertEqual([p["codigo"] for p in estoque.pesquisar_produto("cambio")], ["C011", "C010"])
+        self.assertEqual([p["codigo"] for p in estoque.pesquisar_produto("CÂM manual")], ["C010"])
+        # Nome pesa mais que fornecedor
+        self.assertEqual([p["codigo"] for p in estoque.pesquisar_produto("pneu")], ["P001", "P002"])
+        self.assertEqual([p["codigo"] for p in estoque.pesquisar_produto("p001")], ["P001"])
+        self.assertEqual(estoque.pesquisar_produto("inexistente"), [])
+
+    def test_limite(self):
+        """Testa o limite de resultados"""
+        self.assertEqual(len(estoque.pesquisar_produto("transmissoes", limite=1)), 1)
+        self.assertEqual(len(estoque.pesquisar_produto("transmissoes", limite=None)), 2)
+
+    @patch('builtins.print')
+    def test_indice_atualizado_no_cadastro(self, mock_print):
+        """Testa se o cadastro atualiza o índice e se uma alteração externa força a reconstrução"""
+        estoque.pesquisar_produto("pneu")
+        self.assertTrue(estoque.cadastrar_produto("V100", "Volante Esportivo", "2026-01-01", "Peças Br", 1, 900.0))
+        self.assertFalse(estoque.cadastrar_produto(" V100", "Outro", "2026-01-01", "Peças Br", 1, 1.0))
+        self.assertEqual([p["codigo"] for p in estoque.pesquisar_produto("volante")], ["V100"])
+
+        data_manager.append_data('produtos.json', {"codigo": "R1", "nome": "Retrovisor", "fornecedor": "X"})
+        self.assertEqual([p["codigo"] for p in estoque.pesquisar_produto("retro")], ["R1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+import shutil
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from modules import irpf, rh, data_manager
+
+class TestIrpf(unittest.TestCase):
+
+    def setUp(self):
+        """Diretório de dados temporário (sem irpf.json: só a tabela padrão)"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        irpf.recarregar()
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        irpf.recarregar()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_faixas_e_limites(self):
+        """Testa cada faixa da tabela padrão, inclusive os valores exatamente no limite"""
+        self.assertEqual(irpf.calcular(2000.0), 0.0)
+        self.assertEqual(irpf.calcular(2259.20), 0.0)
+        self.assertAlmostEqual(irpf.calcular(2500.0), 18.06, places=2)
+        self.assertEqual(irpf.calcular(2826.65), (2826.65 * 0.075) - 169.44)
+        self.assertEqual(irpf.calcular(4000.0), (4000.0 * 0.225) - 662.77)
+        self.assertEqual(irpf.calcular(10000.0), (10000.0 * 0.275) - 896.00)
+        self.assertEqual(rh.calcular_irpf(3000.0), irpf.calcular(3000.0))
+
+    def test_lote_igual_ao_escalar(self):
+        """Testa o lote (com e sem numpy) contra o cálculo de um salário por vez"""
+        salarios = [0.0, 1500.0, 2259.20, 2259.21, 2826.65, 3000.0, 3751.05, 4664.68, 4664.69, 25000.0]
+        esperado = [irpf.calcular(s) for s in salarios]
+        self.assertEqual([float(v) for v in irpf.calcular_lote(salarios)], esperado)
+        with patch.object(irpf, 'np', None):
+            self.assertEqual(irpf.calcular_lote(salarios), esperado)
+
+    def test_tabela_por_ano_do_arquivo(self):
+        """Testa a tabela lida de irpf.json e a vigência até o próximo ano cadastrado"""
+        data_manager.save_data('irpf.json', {
+            "2026": [
+                {"ate": 5000.00, "aliquota": 0.0, "deducao": 0.0},
+                {"ate": None, "aliquota": 0.275, "deducao": 1375.00},
+            ],
+        })
+        irpf.recarregar()
+        self.assertEqual(irpf.anos_disponiveis(), [2024, 2026])
+        self.assertEqual(irpf.calcular(4800.0, ano=2026), 0.0)
+        self.assertEqual(irpf.calcular(4800.0, ano=2030), 0.0)
+        # 2025 ainda usa a tabela de 2024
+        self.assertEqual(irpf.calcular(4800.0, ano=2025), irpf.calcular(4800.0, ano=2024))
+
+        lote = rh.calcular_folha_lote([{"cargo": "Analista", "valor_hora": 30.0}], horas_extras=0, ano=2026)
+        self.assertEqual(lote["irpf"], [0.0])
+
+        with self.assertRaises(ValueError):
+            irpf.calcular(3000.0, ano=2020)
+
+    def test_tabela_invalida(self):
+        """Testa se uma tabela sem a última faixa aberta é rejeitada"""
+        with self.assertRaises(ValueError):
+            irpf.compilar_tabela([{"ate": 1000.0, "aliquota": 0.0, "deducao": 0.0}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,16 @@
 import sys
 import os
+import json
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, mock_open, MagicMock
 
 # Adiciona o diretório atual ao path para importar os módulos
 sys.path.append(os.getcwd())
 
-from modules import operacional, estoque, financeiro, rh, data_manager
+from modules import operacional, estoque, financeiro, rh, data_manager, auth
+from werkzeug.security import generate_password_hash
 
 class TestModules(unittest.TestCase):
 
@@ -18,11 +22,17 @@ class TestModules(unittest.TestCase):
         filename = "test_data.json"
         data = [{"id": 1, "name": "Test"}]
         
-        # Test Save
-        with patch("builtins.open", mock_open()) as mock_file:
-            success = data_manager.save_data(filename, data)
-            self.assertTrue(success, "Falha ao salvar dados")
-            mock_file.assert_called_with(os.path.join(data_manager.DATA_DIR, filename), 'w', encoding='utf-8')
+        # Test Save (escrita atômica: arquivo temporário + rename no mesmo diretório)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            with patch.object(data_manager, "DATA_DIR", tmpdir):
+                success = data_manager.save_data(filename, data)
+                self.assertTrue(success, "Falha ao salvar dados")
+            with open(os.path.join(tmpdir, filename), encoding='utf-8') as f:
+                self.assertEqual(json.load(f), data, "Dados salvos incorretos")
+            self.assertFalse([n for n in os.listdir(tmpdir) if n.endswith('.tmp')], "Arquivo temporário não removido")
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
 
         # Test Load (Success)
         with patch("builtins.open", mock_open(read_data='[{"id": 1, "name": "Test"}]')) as mock_file:
@@ -143,6 +153,37 @@ class TestModules(unittest.TestCase):
                 self.assertEqual(matricula, "110017", f"Matrícula gerada incorretamente: {matricula}")
         print("  - Cálculos RH e Matrícula: OK")
 
+    def test_rh_folha_lote(self):
+        """Folha em lote igual às funções escalares (com e sem numpy)"""
+        print("\n[TEST] RH - Folha em lote")
+        funcionarios = [
+            {"cargo": cargo, "valor_hora": valor}
+            for cargo in ["Operário", "Gerente de Produção", "Diretor", "Analista"]
+            for valor in [5.0, 12.5, 14.3, 18.0, 23.7, 31.2, 80.0]
+        ]
+
+        esperado = {"bruto": [], "extra": [], "total_bruto": [], "irpf": [], "liquido": []}
+        for f in funcionarios:
+            bruto = rh.calcular_salario_bruto(160, f["valor_hora"])
+            extra = rh.calcular_horas_extras(10, f["valor_hora"], f["cargo"])
+            irpf = rh.calcular_irpf(bruto + extra)
+            esperado["bruto"].append(bruto)
+            esperado["extra"].append(extra)
+            esperado["total_bruto"].append(bruto + extra)
+            esperado["irpf"].append(irpf)
+            esperado["liquido"].append(rh.calcular_liquido(bruto + extra, irpf))
+
+        self.assertEqual(rh.calcular_folha_lote(funcionarios), esperado)
+        with patch.object(rh, "np", None):
+            self.assertEqual(rh.calcular_folha_lote(funcionarios), esperado)
+
+        # Horas por funcionário
+        horas = [100 + i for i in range(len(funcionarios))]
+        lote = rh.calcular_folha_lote(funcionarios, horas_trabalhadas=horas, horas_extras=0)
+        self.assertEqual(lote["bruto"], [h * f["valor_hora"] for h, f in zip(horas, funcionarios)])
+        self.assertEqual(rh.calcular_folha_lote([])["liquido"], [])
+        print("  - Folha em lote: OK")
+
     # =======================================================================
     # TESTES: OPERACIONAL
     # =======================================================================
@@ -176,5 +217,247 @@ class TestModules(unittest.TestCase):
         self.assertEqual(ideal['anual'], 12000)
         print("  - Estatísticas e Metas: OK")
 
+
+class TestRhMatricula(unittest.TestCase):
+
+    def setUp(self):
+        """Cadastro em um diretório de dados temporário"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        data_manager.save_data('funcionarios.json', [
+            {"nome": "Ana", "cpf": "1", "cargo": "Analista", "matricula": "120057"},
+            {"nome": "Bia", "cpf": "2", "cargo": "Operário", "matricula": "113E83"},
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_sequencial_recuperado_uma_vez(self):
+        """Sem contador gravado, o sequencial continua do maior já usado (0x3E8 = 1000)"""
+        self.assertEqual(rh.reservar_sequencial(), 1001)
+        # Depois disso o cadastro não é mais lido
+        with patch.object(rh, 'obter_proximo_sequencial', side_effect=AssertionError("varreu o cadastro")):
+            self.assertEqual(rh.reservar_sequencial(), 1002)
+            matricula = rh.gerar_matricula("ESTOQUE", "Auxiliar de Estoque")
+        self.assertEqual(matricula[:5], "213EB")
+
+    def test_admissao_em_lote(self):
+        """Admite vários funcionários com sequenciais consecutivos e uma gravação"""
+        novos = [{"nome": f"Func {i}", "cpf": str(100 + i), "cargo": "Operário", "valor_hora": 20.0} for i in range(300)]
+        admitidos, recusados = rh.admitir_funcionarios(novos)
+
+        self.assertEqual(recusados, [])
+        self.assertEqual(len({f["matricula"] for f in admitidos}), 300)
+        self.assertEqual([int(f["matricula"][2:-1], 16) for f in admitidos], list(range(1001, 1301)))
+        self.assertEqual(data_manager.count_data('funcionarios.json'), 302)
+        self.assertEqual(rh.reservar_sequencial(), 1301)
+
+    def test_cpf_e_matricula_unicos(self):
+        """CPF duplicado é recusado; matrícula que colide com uma gravada é gerada de novo"""
+        novos = [{"nome": n, "cpf": cpf, "cargo": "Operário", "valor_hora": 20.0}
+                 for n, cpf in (("Caio", "1"), ("Davi", "500"), ("Eva", "500"), ("Flor", "600"))]
+        with patch.object(rh, 'gerar_matricula', side_effect=["110011", "110021", "110031", "113E83", "110041"]):
+            admitidos, recusados = rh.admitir_funcionarios(novos)
+        self.assertEqual([f["nome"] for f in recusados], ["Caio", "Eva"])
+        self.assertEqual({f["nome"]: f["matricula"] for f in admitidos}, {"Davi": "110021", "Flor": "110041"})
+        self.assertEqual(data_manager.count_data('funcionarios.json'), 4)
+
+        # Cadastro individual (terminal e web): mesma checagem sob a trava
+        funcionario = {"nome": "Gil", "cpf": "700", "cargo": "Operário", "matricula": "120057"}
+        self.assertTrue(rh.inserir_funcionario(funcionario, "OPERACIONAL"))
+        self.assertNotEqual(funcionario["matricula"], "120057")
+        self.assertFalse(rh.inserir_funcionario({"nome": "Hugo", "cpf": "7.0.0", "matricula": "999999"}, "RH"))
+        self.assertEqual(data_manager.count_data('funcionarios.json'), 5)
+
+    def test_cadastro_em_arquivo_usa_sequencial_do_arquivo(self):
+        """Com filepath, a matrícula segue o arquivo e o contador da pasta de dados não avança"""
+        arquivo = os.path.join(self.tmpdir, 'outro_cadastro.json')
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump([{"nome": "Ivo", "cpf": "9", "cargo": "Operário", "matricula": "110071"}], f)
+
+        with patch.object(rh, 'validar_entrada', side_effect=["Joana", "Rua A", "800", "1", "2", "3"]), \
+             patch('builtins.input', return_value="0"), \
+             patch.object(rh, 'selecionar_setor', return_value=("OPERACIONAL", {})), \
+             patch.object(rh, 'selecionar_cargo', return_value=("Operário", 20.0)), \
+             patch.object(rh, 'reservar_sequencial', side_effect=AssertionError("usou o contador global")):
+            rh.cadastrar_funcionario(arquivo)
+
+        cadastro = rh.carregar_todos_funcionarios(arquivo)
+        self.assertEqual(len(cadastro), 2)
+        self.assertEqual(cadastro[1]["matricula"][2:5], "008")
+        self.assertEqual(rh.reservar_sequencial(), 1001)
+
+
+class TestRhCargos(unittest.TestCase):
+
+    def setUp(self):
+        """Diretório de dados temporário (sem cargos.json: só o registro embutido)"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        rh.recarregar_cargos()
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        rh.recarregar_cargos()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_registro_embutido(self):
+        """Setor, nível, valor base e hora extra vindos de SETORES_DA_EMPRESA/CARGO_NIVEL"""
+        self.assertEqual(rh.obter_cargo("Analista Financeiro"),
+                         {"setor": "FINANCEIRO", "nivel": "2", "valor_hora": 12.50, "hora_extra": True})
+        self.assertFalse(rh.obter_cargo("Gerente Financeiro")["hora_extra"])
+        self.assertEqual(rh.obter_setor_funcionario("Coordenador de RH"), "RH")
+        self.assertIsNone(rh.obter_setor_funcionario("Astronauta"))
+        # Cargos fora do registro seguem a regra pelo nome
+        self.assertFalse(rh.recebe_hora_extra("Diretor"))
+        self.assertEqual(rh.cargos_do_setor("ESTOQUE"), rh.SETORES_DA_EMPRESA["ESTOQUE"])
+
+    def test_extensao_por_arquivo(self):
+        """Cargos novos e ajustes lidos de cargos.json"""
+        data_manager.save_data('cargos.json', {
+            "Supervisor de Produção": {"setor": "OPERACIONAL", "nivel": "4", "valor_hora": 16.0},
+            "Analista Financeiro": {"hora_extra": False},
+        })
+        rh.recarregar_cargos()
+
+        self.assertEqual(rh.obter_setor_funcionario("Supervisor de Produção"), "OPERACIONAL")
+        self.assertTrue(rh.recebe_hora_extra("Supervisor de Produção"))
+        self.assertEqual(rh.obter_cargo("Analista Financeiro")["valor_hora"], 12.50)
+        self.assertEqual(rh.calcular_horas_extras(10, 12.50, "Analista Financeiro"), 0.0)
+        self.assertIn("Supervisor de Produção", rh.cargos_do_setor("OPERACIONAL"))
+        with patch("modules.rh.random.randint", return_value=3):
+            self.assertEqual(rh.gerar_matricula("OPERACIONAL", "Supervisor de Produção", sequencial=5), "140053")
+        # O registro embutido não é alterado
+        self.assertTrue(rh.CARGOS["Analista Financeiro"]["hora_extra"])
+
+class TestFinanceiroGrafo(unittest.TestCase):
+
+    def setUp(self):
+        """Diretório de dados temporário e grafo financeiro vazio"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        financeiro.invalidar_nos()
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        financeiro.invalidar_nos()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _calculos(self):
+        return financeiro.estatisticas_nos()['calculos']
+
+    def test_recalcula_so_o_que_mudou(self):
+        """Cada nó é calculado uma vez por versão dos dados de que depende"""
+        data_manager.save_data('funcionarios.json', [
+            {"cpf": "11111111111", "nome": "Ana", "cargo": "Analista Financeiro", "valor_hora": 12.50},
+        ])
+        data_manager.save_data('produtos.json', [
+            {"codigo": "P1", "nome": "Aço", "quantidade": 10, "valor_compra": 5.0},
+        ])
+
+        inicio = self._calculos()
+        indicadores = financeiro.calcular_indicadores_financeiros()
+        self.assertEqual(self._calculos() - inicio, 6)
+        self.assertEqual(indicadores['custo_estoque_total'], 50.0)
+
+        # Sem mudança nos dados: nada é recalculado
+        self.assertIs(financeiro.calcular_indicadores_financeiros(), indicadores)
+        self.assertEqual(self._calculos() - inicio, 6)
+
+        # O relatório da fábrica reaproveita água, energia e salários
+        financeiro.montar_relatorio_fabrica()
+        self.assertEqual(self._calculos() - inicio, 7)
+
+        # Novo funcionário: só água, energia, salários e indicadores
+        data_manager.append_data('funcionarios.json',
+                                 {"cpf": "22222222222", "nome": "Bia", "cargo": "Analista Financeiro", "valor_hora": 12.50})
+        novos = financeiro.calcular_indicadores_financeiros()
+        self.assertEqual(self._calculos() - inicio, 11)
+        self.assertGreater(novos['custo_fixo_total'], indicadores['custo_fixo_total'])
+        self.assertEqual(novos['custo_estoque_total'], 50.0)
+
+    def test_relatorio_fabrica_renderizadores(self):
+        """O relatório web não imprime nada; console/HTML/JSON/CSV saem do mesmo dicionário"""
+        self.assertIsNone(financeiro.montar_relatorio_fabrica())
+        data_manager.save_data('funcionarios.json', [
+            {"cpf": "11111111111", "nome": "Ana <Costa>", "cargo": "Analista Financeiro", "valor_hora": 12.50},
+        ])
+
+        with patch('builtins.print') as mock_print:
+            relatorio = financeiro.montar_relatorio_fabrica()
+        mock_print.assert_not_called()
+        self.assertEqual(relatorio['agua']['custo_total'], 1080.0)
+        self.assertEqual(relatorio['total'],
+                         relatorio['agua']['custo_total'] + relatorio['energia']['custo_total']
+                         + relatorio['salarios']['custo_total_bruto'])
+
+        self.assertIn("RESUMO MENSAL", financeiro.renderizar_relatorio(relatorio, 'console'))
+        self.assertIn("<table", financeiro.renderizar_relatorio(relatorio, 'html'))
+        self.assertEqual(json.loads(financeiro.renderizar_relatorio(relatorio, 'json'))['total'], relatorio['total'])
+        linhas = financeiro.renderizar_relatorio(relatorio, 'csv').splitlines()
+        self.assertEqual(linhas[0], "secao,item,valor")
+        self.assertIn("agua,custo_total,1080.00", linhas)
+        with self.assertRaises(ValueError):
+            financeiro.renderizar_relatorio(relatorio, 'pdf')
+
+        # O CLI continua imprimindo o relatório completo
+        with patch('builtins.print') as mock_print:
+            self.assertIs(financeiro.gerar_relatorio_fabrica(), relatorio)
+        self.assertIn("Ana <Costa>", mock_print.call_args[0][0])
+
+class TestAuth(unittest.TestCase):
+
+    def setUp(self):
+        """Diretório de dados temporário com um usuário de hash antigo"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        data_manager.save_data('users.json', [
+            {"username": "ana", "password": generate_password_hash("segredo", "pbkdf2:sha256:1000"), "role": "func_rh"},
+            {"username": "bia", "password": auth.gerar_hash("outra"), "role": "admin"},
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_autenticar_e_rehash(self):
+        """Senha errada não entra; a certa entra e troca o hash antigo pelo atual"""
+        antes = auth.estatisticas()
+        self.assertIsNone(auth.autenticar("ana", "errada"))
+        self.assertIsNone(auth.autenticar("ninguem", "segredo"))
+        self.assertTrue(auth.precisa_rehash(auth.buscar_usuario("ana")["password"]))
+
+        usuario = auth.autenticar("ana", "segredo")
+        self.assertEqual(usuario["role"], "func_rh")
+        novo = auth.buscar_usuario("ana")["password"]
+        self.assertFalse(auth.precisa_rehash(novo))
+        self.assertEqual(auth.autenticar("ana", "segredo")["password"], novo)
+        self.assertEqual(auth.autenticar("bia", "outra")["role"], "admin")
+
+        depois = auth.estatisticas()
+        self.assertEqual(depois["verificacoes"] - antes["verificacoes"], 4)
+        self.assertEqual(depois["rehashes"] - antes["rehashes"], 1)
+        self.assertEqual((depois["na_fila"], depois["em_execucao"]), (0, 0))
+
+    def test_fila_cheia(self):
+        """Sem vagas no pool a tentativa é recusada na hora"""
+        with patch.object(auth, '_vagas', MagicMock(acquire=MagicMock(return_value=False))):
+            with self.assertRaises(auth.FilaCheia):
+                auth.autenticar("bia", "outra")
+
+
 if __name__ == "__main__":
     unittest.main()
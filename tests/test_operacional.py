@@ -3,11 +3,13 @@ from unittest.mock import patch, MagicMock
 import sys
 import os
 import json
+import tempfile
+import shutil
 
 # Adiciona o diretório raiz ao path
 sys.path.append(os.getcwd())
 
-from modules import operacional
+from modules import operacional, data_manager
 
 class TestOperacional(unittest.TestCase):
     
@@ -38,6 +40,25 @@ class TestOperacional(unittest.TestCase):
         self.assertAlmostEqual(stats['media_por_turno']['Manhã'], 550/7, places=2)
         self.assertAlmostEqual(stats['media_por_turno']['Noite'], 250/7, places=2)
 
+    def test_agregar_producao(self):
+        """Testa a matriz dia × turno montada em uma passada a partir das linhas planas"""
+        registros = [
+            {"dia": dia_data["dia"], "turno": turno, "quantidade": qtd}
+            for dia_data in self.dados_exemplo
+            for turno, qtd in dia_data["turnos"].items()
+        ]
+        # Linhas repetidas somam; dia/turno desconhecidos são ignorados
+        registros.append({"dia": "Segunda", "turno": "Manhã", "quantidade": 5})
+        registros.append({"dia": "Feriado", "turno": "Manhã", "quantidade": 999})
+        registros.append({"dia": "Terça", "turno": "Madrugada", "quantidade": 999})
+        
+        dados = operacional.agregar_producao(registros)
+        
+        self.assertEqual([d["dia"] for d in dados], operacional.DIAS_SEMANA)
+        self.assertEqual(dados[0]["turnos"], {"Manhã": 105, "Tarde": 100, "Noite": 50})
+        self.assertEqual(dados[1:], self.dados_exemplo[1:])
+        self.assertEqual(operacional.calcular_estatisticas(dados)["total_semanal"], 1355)
+
     def test_simular_producao(self):
         """Testa a projeção mensal e anual"""
         total_semanal = 1000
@@ -48,11 +69,13 @@ class TestOperacional(unittest.TestCase):
 
     @patch('builtins.input', return_value='1000') # Simula entrada do usuário de 1000 como meta mensal
     @patch('builtins.print')
-    def test_calcular_capacidade_ideal_input(self, mock_print, mock_input):
-        """Testa o cálculo da capacidade ideal com input do usuário"""
-        # Teste sem argumento (ativa input)
-        ideal = operacional.calcular_capacidade_ideal()
+    @patch('modules.operacional.definir_meta', side_effect=lambda meta, planta: float(meta)) # Não grava o arquivo de metas
+    def test_calcular_capacidade_ideal_input(self, mock_definir, mock_print, mock_input):
+        """Testa o cálculo da capacidade ideal com a meta digitada no CLI"""
+        # A pergunta fica no CLI; calcular_capacidade_ideal só recebe o valor
+        ideal = operacional.calcular_capacidade_ideal(operacional.perguntar_meta_mensal())
         
+        mock_definir.assert_called_once_with('1000', None)
         self.assertEqual(ideal['mensal'], 1000)
         self.assertEqual(ideal['semanal'], 250) # 1000 / 4
         self.assertEqual(ideal['anual'], 12000) # 1000 * 12
@@ -67,9 +90,8 @@ class TestOperacional(unittest.TestCase):
 
     @patch('builtins.input', side_effect=['10', '20', '30'] * 7) # Input para 7 dias * 3 turnos
     @patch('builtins.print') # Silencia prints
-    @patch('json.dump') # Mock salvar arquivo
-    @patch('os.path.exists', return_value=False) # Finge que arquivo não existe
-    def test_cadastrar_producao_sucesso(self, mock_exists, mock_json_dump, mock_print, mock_input):
+    @patch('modules.data_manager.extend_data', return_value=True) # Mock salvar arquivo
+    def test_cadastrar_producao_sucesso(self, mock_extend, mock_print, mock_input):
         """Testa o cadastro de produção com inputs válidos"""
         resultado = operacional.cadastrar_producao()
         
@@ -78,12 +100,18 @@ class TestOperacional(unittest.TestCase):
         self.assertEqual(resultado[0]['turnos']['Manhã'], 10)
         self.assertEqual(resultado[0]['turnos']['Tarde'], 20)
         self.assertEqual(resultado[0]['turnos']['Noite'], 30)
+        
+        # Grava as 21 linhas (7 dias x 3 turnos) de uma só vez no formato plano
+        mock_extend.assert_called_once()
+        linhas = mock_extend.call_args[0][1]
+        self.assertEqual(len(linhas), 21)
+        self.assertEqual(linhas[0], {"dia": "Segunda", "turno": "Manhã", "quantidade": 10,
+                                     "data": operacional.data_do_dia("Segunda")})
 
     @patch('builtins.input', side_effect=['-10', '10', '20', '30'] + ['10', '10', '10'] * 20) # Um erro depois sucesso
     @patch('builtins.print')
-    @patch('json.dump')
-    @patch('os.path.exists', return_value=False)
-    def test_cadastrar_producao_validacao_negativo(self, mock_exists, mock_json_dump, mock_print, mock_input):
+    @patch('modules.data_manager.extend_data', return_value=True)
+    def test_cadastrar_producao_validacao_negativo(self, mock_extend, mock_print, mock_input):
         """Testa se o sistema rejeita números negativos"""
         # O side_effect tem um -10 primeiro, que deve ser rejeitado, pedindo input novamente (o 10)
         
@@ -93,5 +121,131 @@ class TestOperacional(unittest.TestCase):
         chamadas_erro = [call for call in mock_print.mock_calls if "não pode ser negativa" in str(call)]
         self.assertTrue(len(chamadas_erro) > 0, "Deveria ter exibido erro de valor negativo")
 
+
+class TestRollupProducao(unittest.TestCase):
+
+    def setUp(self):
+        """Usa um diretório de dados temporário para cada teste"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        self.semana = [
+            {"dia": dia, "turno": turno, "quantidade": 10}
+            for dia in operacional.DIAS_SEMANA
+            for turno in operacional.TURNOS
+        ]
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_registrar_atualiza_rollup(self):
+        """Testa se cada inserção atualiza o rollup persistido"""
+        operacional.registrar_producao(self.semana)
+        operacional.registrar_producao([{"dia": "Segunda", "turno": "Noite", "quantidade": 5}])
+
+        salvo = data_manager.load_data(operacional.ROLLUP_FILE)
+        self.assertEqual(salvo["registros"], 22)
+        self.assertEqual(salvo["total"], 215)
+        self.assertEqual(salvo["por_dia"]["Segunda"]["Noite"], 15)
+        self.assertEqual(salvo["por_turno"]["Noite"], 75)
+
+        # calcular_estatisticas recebe a matriz do rollup sem percorrer as linhas
+        stats = operacional.calcular_estatisticas(operacional.agregar_producao())
+        self.assertEqual(stats["total_semanal"], 215)
+        self.assertEqual(stats["total_por_turno"]["Noite"], 75)
+
+    def test_insercao_externa_e_correcao(self):
+        """Testa a atualização do rollup após append direto e após correção do histórico"""
+        operacional.registrar_producao(self.semana)
+        data_manager.append_data("producao.json", {"dia": "Terça", "turno": "Manhã", "quantidade": 7})
+        self.assertEqual(operacional.total_produzido(), 217)
+
+        operacional.corrigir_producao(self.semana[:3])
+        self.assertEqual(operacional.total_produzido(), 30)
+        self.assertEqual(operacional.obter_rollup()["por_dia"]["Terça"]["Manhã"], 0)
+
+    def test_insercao_retroativa(self):
+        """Testa o rollup com linhas gravadas em um segmento mensal anterior ao mais recente"""
+        linha = {"dia": "Segunda", "turno": "Manhã", "quantidade": 15, "data": "2026-10-05"}
+        operacional.registrar_producao([linha, dict(linha)])
+        operacional.registrar_producao([{"dia": "Terça", "turno": "Tarde", "quantidade": 89, "data": "2026-09-01"}])
+        self.assertEqual(operacional.total_produzido(), 119)
+        self.assertEqual(data_manager.load_data(operacional.ROLLUP_FILE)["total"], 119)
+
+        # Append direto (fora de registrar_producao) em um segmento antigo
+        data_manager.append_data("producao.json", {"dia": "Terça", "turno": "Noite", "quantidade": 1, "data": "2026-09-01"})
+        self.assertEqual(operacional.total_produzido(), 120)
+        self.assertEqual(operacional.obter_rollup()["por_semana"]["2026-W36"], 90)
+        self.assertEqual(operacional.reconstruir_rollup(), [])
+
+    def test_reconstruir_rollup(self):
+        """Testa se a reconstrução detecta e corrige um rollup divergente"""
+        operacional.registrar_producao(self.semana)
+        self.assertEqual(operacional.reconstruir_rollup(), [])
+
+        rollup = data_manager.load_data(operacional.ROLLUP_FILE)
+        rollup["total"] = 1
+        data_manager.save_data(operacional.ROLLUP_FILE, rollup)
+
+        self.assertEqual(operacional.reconstruir_rollup(), ["total"])
+        self.assertEqual(operacional.total_produzido(), 210)
+
+    def test_consulta_por_periodo(self):
+        """Testa linhas datadas em segmentos mensais e a consulta por intervalo de datas"""
+        linhas = [
+            {"dia": "Quarta", "turno": "Manhã", "quantidade": 10, "data": "2026-09-30"},
+            {"dia": "Quinta", "turno": "Manhã", "quantidade": 20, "data": "2026-10-01"},
+            {"dia": "Quinta", "turno": "Noite", "quantidade": 5, "data": "2026-10-01"},
+            {"dia": "Segunda", "turno": "Tarde", "quantidade": 7, "data": "2026-10-12"},
+        ]
+        operacional.registrar_producao(self.semana[:1] + linhas)
+
+        self.assertTrue(os.path.isdir(os.path.join(self.tmpdir, "producao")))
+        periodo = operacional.consultar_producao("2026-10-01", "2026-10-11")
+        self.assertEqual([r["quantidade"] for r in periodo], [20, 5])
+
+        # Semana ISO 2026-W40 (28/09 a 04/10): divide pelos 7 dias, não pelo histórico
+        semana = operacional.agregar_semana("2026-10-01")
+        self.assertEqual([d["data"] for d in semana][0], "2026-09-28")
+        stats = operacional.calcular_estatisticas(semana)
+        self.assertEqual(stats["total_semanal"], 35)
+        self.assertAlmostEqual(stats["media_diaria"], 5.0)
+
+        rollup = operacional.obter_rollup()
+        self.assertEqual(rollup["por_semana"], {"2026-W40": 35, "2026-W42": 7})
+        self.assertEqual(rollup["total"], 52)
+
+    def test_relatorio_semanal(self):
+        """Testa o relatório da semana: linhas datadas da semana, rollup sem data só como fallback"""
+        linhas = [
+            {"dia": "Quinta", "turno": "Manhã", "quantidade": 20, "data": "2026-10-01"},
+            {"dia": "Quinta", "turno": "Manhã", "quantidade": 30, "data": "2026-10-08"},
+        ]
+        operacional.registrar_producao(self.semana[:1] + linhas)
+
+        # Duas quintas de semanas diferentes não caem no mesmo balde
+        relatorio = operacional.relatorio_semanal("2026-10-03")
+        self.assertTrue(relatorio["datado"])
+        self.assertEqual((relatorio["semana"], relatorio["inicio"], relatorio["fim"]),
+                         ("2026-W40", "2026-09-28", "2026-10-04"))
+        self.assertEqual(operacional.calcular_estatisticas(relatorio["dados"])["total_semanal"], 20)
+        self.assertEqual(relatorio["total_historico"], 50 + self.semana[0]["quantidade"])
+
+        # Semana sem linhas datadas: matriz do rollup (todo o histórico)
+        relatorio = operacional.relatorio_semanal("2020-01-01")
+        self.assertFalse(relatorio["datado"])
+        self.assertEqual(operacional.calcular_estatisticas(relatorio["dados"])["total_semanal"],
+                         relatorio["total_historico"])
+        with self.assertRaises(ValueError):
+            operacional.relatorio_semanal("2026-13-01")
+
+    def test_data_do_dia(self):
+        """Testa a conversão entre dia da semana e data"""
+        self.assertEqual(operacional.data_do_dia("Domingo", "2026-10-14"), "2026-10-18")
+        self.assertEqual(operacional.dia_da_data("2026-10-12"), "Segunda")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import patch
+import io
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+# Adiciona diretório raiz para importar app
+sys.path.append(os.getcwd())
+
+from app import app
+from modules import data_manager, financeiro, operacional, terminal
+
+# Todos os comandos do terminal web (inclusive os de ajuda e os inválidos)
+COMANDOS = [
+    'help', 'ajuda', 'clear', 'limpar', 'whoami', 'status',
+    'producao', 'producao 2026-10-01', 'producao xyz', 'meta', 'meta 900', 'meta 800 2026-10', 'meta abc',
+    'estoque', 'produtos', 'financeiro', 'despesas',
+    'rh', 'funcionarios', 'folha',
+    'main', 'main operacional', 'main estoque', 'main financeiro', 'main rh', 'main xyz',
+    'comando_inexistente',
+]
+
+# Limite por comando (segundos): bem acima do normal, mas um input() bloqueado nunca passa
+LIMITE_SEGUNDOS = 2.0
+
+class TerminalSemStdinTest(unittest.TestCase):
+
+    def setUp(self):
+        """Cópia dos dados de exemplo em diretório temporário e sessão de admin"""
+        self.tmpdir = tempfile.mkdtemp()
+        origem = os.path.join(os.getcwd(), 'data')
+        for nome in os.listdir(origem):
+            if nome.endswith('.json') or nome.endswith('.jsonl'):
+                shutil.copy(os.path.join(origem, nome), self.tmpdir)
+        self.patcher = patch.object(data_manager, 'DATA_DIR', self.tmpdir)
+        self.patcher.start()
+        data_manager.invalidate_cache()
+        financeiro.invalidar_nos()
+        terminal.limpar_cache()
+
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = 'admin'
+            sess['username'] = 'admin'
+            sess['role'] = 'admin'
+
+    def tearDown(self):
+        self.patcher.stop()
+        data_manager.invalidate_cache()
+        financeiro.invalidar_nos()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_comandos_com_stdin_fechado(self):
+        """Nenhum comando lê a entrada padrão e todos respondem dentro do limite"""
+        stdin = io.StringIO()
+        stdin.close()
+        with patch.object(sys, 'stdin', stdin), \
+             patch('builtins.input', side_effect=AssertionError("input() chamado numa rota web")):
+            for comando in COMANDOS:
+                with self.subTest(comando=comando):
+                    inicio = time.perf_counter()
+                    resposta = self.client.post('/terminal/execute', json={'command': comando})
+                    decorrido = time.perf_counter() - inicio
+                    self.assertEqual(resposta.status_code, 200)
+                    self.assertIn('output', resposta.get_json())
+                    self.assertLess(decorrido, LIMITE_SEGUNDOS)
+
+    def test_meta_persistida(self):
+        """A meta gravada pelo terminal é a usada pelo relatório de produção"""
+        self.client.post('/terminal/execute', json={'command': 'meta 1000'})
+        self.assertEqual(operacional.obter_meta_mensal(), 1000.0)
+        self.assertEqual(operacional.calcular_capacidade_ideal()['semanal'], 250.0)
+
+        operacional.definir_meta(1200, periodo='2020-01')
+        self.assertEqual(operacional.obter_meta_mensal(periodo='2020-01-15'), 1200.0)
+        self.assertEqual(operacional.obter_meta_mensal(periodo='2020-02'), 1000.0)
+        self.assertEqual(operacional.obter_meta_mensal(planta='filial'), operacional.META_MENSAL_PADRAO)
+        with self.assertRaises(ValueError):
+            operacional.definir_meta(0)
+
+        resposta = self.client.post('/terminal/execute', json={'command': 'producao'})
+        self.assertIn('meta mensal: 1000', resposta.get_json()['output'])
+
+    def test_producao_da_semana(self):
+        """'producao data' mostra só a semana pedida, com o total histórico à parte"""
+        operacional.registrar_producao([
+            {"dia": "Quinta", "turno": "Manhã", "quantidade": 20, "data": "2026-10-01"},
+            {"dia": "Quinta", "turno": "Manhã", "quantidade": 30, "data": "2026-10-08"},
+        ])
+        saida = self.client.post('/terminal/execute', json={'command': 'producao 2026-10-01'}).get_json()['output']
+        self.assertIn('2026-W40 (2026-09-28 a 2026-10-04)', saida)
+        self.assertIn('Total Semanal:</span> 20 unidades', saida)
+        self.assertIn(f"Total Histórico:</span> {operacional.total_produzido()} unidades", saida)
+
+        resposta = self.client.get('/operacional?semana=2026-10-08')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('2026-W41', resposta.get_data(as_text=True))
+
+    def test_meta_mostra_o_periodo_gravado(self):
+        """'meta valor mês' responde com a meta e o mês que acabou de gravar"""
+        def executar(comando):
+            return self.client.post('/terminal/execute', json={'command': comando}).get_json()['output']
+
+        saida = executar('meta 800 2026-10')
+        self.assertIn('2026-10', saida)
+        self.assertIn('800 unidades', saida)
+        self.assertIn('200 unidades', saida)
+        self.assertEqual(operacional.obter_meta_mensal(periodo='2026-10'), 800.0)
+
+        saida = executar('meta 1000')
+        self.assertIn('padrão', saida)
+        self.assertIn('1000 unidades', saida)
+        self.assertIn('mês atual', executar('meta'))
+
+    def test_cache_por_versao_dos_dados(self):
+        """Comandos de leitura reaproveitam a saída até a coleção mudar"""
+        def executar(comando):
+            return self.client.post('/terminal/execute', json={'command': comando}).get_json()['output']
+
+        inicio = terminal.estatisticas()
+        primeira = executar('funcionarios')
+        self.assertEqual(executar('funcionarios'), primeira)
+        depois = terminal.estatisticas()
+        self.assertEqual(depois['execucoes'] - inicio['execucoes'], 1)
+        self.assertEqual(depois['acertos'] - inicio['acertos'], 1)
+
+        data_manager.append_data('funcionarios.json', {
+            "cpf": "98765432100", "nome": "Zuleica Nova", "cargo": "Analista de RH", "valor_hora": 11.50,
+        })
+        self.assertIn("Zuleica Nova", executar('funcionarios'))
+        self.assertEqual(terminal.estatisticas()['execucoes'] - inicio['execucoes'], 2)
+
+        # Perfil sem acesso não recebe a saída guardada
+        with self.client.session_transaction() as sess:
+            sess['role'] = 'func_estoque'
+        self.assertIn('Acesso negado', executar('funcionarios'))
+
+if __name__ == '__main__':
+    unittest.main()
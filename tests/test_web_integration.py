@@ -3,12 +3,17 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import re
+import shutil
+import tempfile
+import threading
+import time
 
 # Adiciona diretório raiz para importar app
 sys.path.append(os.getcwd())
 
 from app import app
-from modules import data_manager
+from modules import data_manager, instrumentation, profiler
 
 class WebIntegrationTest(unittest.TestCase):
     def setUp(self):
@@ -57,6 +62,192 @@ class WebIntegrationTest(unittest.TestCase):
         # O template deve conter o custo total: 10 * 50 = 500
         self.assertIn(b'500.00', response.data)
         print("\n✅ Rota /estoque acessada com sucesso e calculou custos")
+    def test_estoque_paginated_table(self):
+        """
+        Verifica se /estoque renderiza só uma página da tabela, ordenada e
+        filtrada no servidor, e se o link "Próxima" continua pelo cursor.
+        """
+        tmpdir = tempfile.mkdtemp()
+        try:
+            with patch.object(data_manager, 'DATA_DIR', tmpdir):
+                data_manager.invalidate_cache()
+                data_manager.save_data('produtos.json', [
+                    {'codigo': f'P{i:04d}', 'nome': f'Peça {i}', 'data_fabricacao': '2026-01-01',
+                     'fornecedor': 'F', 'quantidade': 1, 'valor_compra': 1.0}
+                    for i in range(300)
+                ])
+
+                response = self.client.get('/estoque?per_page=10&sort=-codigo')
+                html = response.data.decode('utf-8')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('P0299', html)
+                self.assertIn('P0290', html)
+                self.assertNotIn('P0289', html)
+                self.assertIn('de 30 (300 registros)', html)
+
+                proxima = re.search(r'href="(/estoque\?[^"]*after=[^"]*)"', html).group(1).replace('&amp;', '&')
+                html = self.client.get(proxima).data.decode('utf-8')
+                self.assertIn('P0289', html)
+                self.assertNotIn('P0290', html)
+
+                html = self.client.get('/estoque?q=pe%C3%A7a%2025').data.decode('utf-8')
+                self.assertIn('P0025', html)
+                self.assertNotIn('P0026', html)
+        finally:
+            data_manager.invalidate_cache()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_rh_cadastro_duplicado(self):
+        """
+        Verifica se /rh só informa sucesso quando o funcionário foi gravado
+        (CPF repetido, mesmo com outra formatação, é recusado).
+        """
+        tmpdir = tempfile.mkdtemp()
+        try:
+            with patch.object(data_manager, 'DATA_DIR', tmpdir):
+                data_manager.invalidate_cache()
+                form = {'nome': 'Ana', 'cpf': '123.456.789-00', 'rg': '1', 'endereco': 'Rua A', 'telefone': '1',
+                        'cargo': 'Operário', 'qtd_filhos': '0', 'valor_hora': '20'}
+                html = self.client.post('/rh', data=form, follow_redirects=True).data.decode('utf-8')
+                self.assertIn('cadastrado com sucesso', html)
+
+                html = self.client.post('/rh', data=dict(form, cpf='12345678900'), follow_redirects=True).data.decode('utf-8')
+                self.assertNotIn('cadastrado com sucesso', html)
+                self.assertIn('já existe', html)
+                self.assertEqual(data_manager.count_data('funcionarios.json'), 1)
+        finally:
+            data_manager.invalidate_cache()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_api_v1(self):
+        """
+        Verifica a API JSON: páginas por cursor, projeção com fields=,
+        exportação NDJSON completa e os mesmos perfis das páginas HTML.
+        """
+        tmpdir = tempfile.mkdtemp()
+        try:
+            with patch.object(data_manager, 'DATA_DIR', tmpdir):
+                data_manager.invalidate_cache()
+                data_manager.save_data('produtos.json', [
+                    {'codigo': f'P{i:04d}', 'nome': f'Peça {i}', 'data_fabricacao': '2026-01-01',
+                     'fornecedor': 'F', 'quantidade': 1, 'valor_compra': 1.0}
+                    for i in range(1234)
+                ])
+
+                codigos, url = [], '/api/v1/produtos?per_page=200&fields=codigo,nome'
+                while url:
+                    pagina = self.client.get(url).get_json()
+                    self.assertEqual(set(pagina['items'][0]), {'codigo', 'nome'})
+                    codigos += [p['codigo'] for p in pagina['items']]
+                    url = pagina['next'] and f"/api/v1/produtos?per_page=200&after={pagina['next']}&fields=codigo,nome"
+                self.assertEqual(codigos, [f'P{i:04d}' for i in range(1234)])
+                self.assertEqual(self.client.get('/api/v1/produtos?after=xx').status_code, 400)
+                # Base64 de um JSON válido, mas que não é um cursor (ou é null)
+                for posicao in ([1, 2], 'x', None):
+                    url = f'/api/v1/produtos?after={data_manager.encode_cursor(posicao)}'
+                    self.assertEqual(self.client.get(url).status_code, 400)
+                self.assertEqual(self.client.get(f'/estoque?after={data_manager.encode_cursor([1, 2])}').status_code, 200)
+
+                response = self.client.get('/api/v1/produtos?format=ndjson&fields=codigo')
+                self.assertEqual(response.mimetype, 'application/x-ndjson')
+                linhas = response.get_data(as_text=True).splitlines()
+                self.assertEqual(len(linhas), 1234)
+                self.assertEqual(linhas[-1], '{"codigo": "P1233"}')
+
+                self.assertIn('preco_venda', self.client.get('/api/v1/indicadores').get_json())
+                self.assertEqual(self.client.get('/api/v1/usuarios').status_code, 404)
+
+                with self.client.session_transaction() as sess:
+                    sess['role'] = 'func_rh'
+                self.assertEqual(self.client.get('/api/v1/produtos').status_code, 403)
+                self.assertEqual(self.client.get('/api/v1/funcionarios').status_code, 200)
+                with self.client.session_transaction() as sess:
+                    sess.clear()
+                self.assertEqual(self.client.get('/api/v1/produtos').status_code, 401)
+        finally:
+            data_manager.invalidate_cache()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_metrics(self):
+        """
+        Verifica as métricas por rota em /metrics (formato Prometheus), só
+        para admin, e a precisão do histograma HDR.
+        """
+        tmpdir = tempfile.mkdtemp()
+        try:
+            with patch.object(data_manager, 'DATA_DIR', tmpdir):
+                data_manager.invalidate_cache()
+                data_manager.save_data('produtos.json', [
+                    {'codigo': 'P1', 'nome': 'Peça', 'quantidade': 2, 'valor_compra': 10.0}
+                ])
+                instrumentation.reset()
+                self.client.get('/estoque')
+
+                response = self.client.get('/metrics')
+                texto = response.get_data(as_text=True)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+                self.assertIn('carangos_http_request_duration_seconds_count{endpoint="mod_estoque",method="GET"} 1', texto)
+                self.assertIn('carangos_http_responses_total{endpoint="mod_estoque",method="GET",status="200"} 1', texto)
+                self.assertIn('carangos_data_calls_total{endpoint="mod_estoque",function="query_page"} 1', texto)
+                self.assertIn('carangos_function_duration_seconds_count{function="estoque.calcular_custos"}', texto)
+                self.assertIn('carangos_data_read_bytes_total{endpoint="mod_estoque"}', texto)
+
+                with self.client.session_transaction() as sess:
+                    sess['role'] = 'presidente'
+                self.assertEqual(self.client.get('/metrics').status_code, 403)
+        finally:
+            data_manager.invalidate_cache()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        histograma = instrumentation.Histogram()
+        for i in range(1, 1001):
+            histograma.record(i / 1000)
+        for q in (0.5, 0.9, 0.99):
+            self.assertLessEqual(abs(histograma.percentile(q) - q) / q, 1 / histograma.SUB_BUCKETS)
+        self.assertEqual(histograma.cumulative()[-1][1], 1000)
+
+    def test_admin_profile(self):
+        """
+        Verifica o perfil por amostragem: pilhas agrupadas pela rota que a
+        thread atende, acesso só para ROLES_GLOBAL e um perfil por vez.
+        """
+        parar = threading.Event()
+
+        def rota_lenta():
+            while not parar.is_set():
+                sum(range(1000))
+
+        def thread_da_rota():
+            profiler._routes[threading.get_ident()] = 'mod_financeiro'
+            try:
+                rota_lenta()
+            finally:
+                profiler._leave()
+
+        thread = threading.Thread(target=thread_da_rota)
+        thread.start()
+        try:
+            time.sleep(0.05)
+            with self.client.session_transaction() as sess:
+                sess['role'] = 'presidente'
+            response = self.client.get('/admin/profile?seconds=0.3&interval_ms=5&route=mod_financeiro')
+            linhas = response.get_data(as_text=True).splitlines()
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(int(response.headers['X-Profile-Snapshots']), 10)
+            self.assertTrue(linhas)
+            self.assertTrue(all(l.startswith('mod_financeiro;') for l in linhas))
+            self.assertTrue(any('test_web_integration.py:rota_lenta' in l for l in linhas))
+
+            with profiler._running:
+                self.assertEqual(self.client.get('/admin/profile?seconds=0').status_code, 409)
+
+            with self.client.session_transaction() as sess:
+                sess['role'] = 'diretor_financeiro'
+            self.assertEqual(self.client.get('/admin/profile?seconds=0').status_code, 403)
+        finally:
+            parar.set()
+            thread.join()
 
 if __name__ == '__main__':
     unittest.main()